@@ -3,11 +3,22 @@
 from getpass import getpass
 
 from src.database import SessionLocal
+from src.migrate import pending
 from src.users.models import User
+from src.auth.epochs import token_epoch
 from src.auth.utils import hash_password, create_access_token
 
 
 def main():
+    # The schema comes only from migrations; this script creates no tables
+    waiting = pending()
+    if waiting:
+        print(
+            f"Schema migrations pending ({', '.join(r.name for r in waiting)}); "
+            "run python -m src.migrate upgrade first"
+        )
+        return
+
     db = SessionLocal()
 
     email = input("Admin email: ").strip()
@@ -51,6 +62,7 @@ def main():
         user.id,
         role=user.role,
         user_type=user.user_type,
+        extra_claims={"ver": token_epoch(db, user.id)},
     )
 
     print("\n=== Admin Bearer Token ===")
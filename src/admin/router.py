@@ -74,4 +74,4 @@ def activate_user(
 
     user.role = "member"
     db.commit()
-    return {"success": True"}
+    return {"success": True}
@@ -0,0 +1,76 @@
+# src/auth/bench_tokens.py
+
+import argparse
+import random
+import statistics
+import time
+
+from .utils import create_access_token, decode_access_token, token_cache, verify_token
+
+
+def make_tokens(count: int) -> list[str]:
+    return [
+        create_access_token(
+            {
+                "sub": str(i),
+                "email": f"user{i}@example.com",
+                "role": "member",
+                "user_type": "consumer",
+                "ver": 0,
+            }
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def measure(decode, tokens: list[str], calls: int, seed: int = 0) -> list[float]:
+    """
+    Per-call latency in microseconds for `calls` decodes of random tokens.
+    """
+    rnd = random.Random(seed)
+    picks = [rnd.choice(tokens) for _ in range(calls)]
+    timings = []
+    for token in picks:
+        started = time.perf_counter()
+        decode(token)
+        timings.append((time.perf_counter() - started) * 1e6)
+    return timings
+
+
+def report(label: str, timings: list[float]) -> None:
+    cuts = statistics.quantiles(timings, n=100)
+    print(
+        f"  {label:<9} mean {statistics.fmean(timings):7.1f} us"
+        f"   p50 {cuts[49]:7.1f}   p99 {cuts[98]:7.1f}   ({len(timings) / (sum(timings) / 1e6):,.0f}/s)"
+    )
+
+
+def run(token_count: int, calls: int) -> None:
+    tokens = make_tokens(token_count)
+    token_cache.clear()
+
+    uncached = measure(verify_token, tokens, calls)
+
+    for token in tokens:  # warm the cache
+        decode_access_token(token)
+    cached = measure(decode_access_token, tokens, calls)
+
+    print(f"[OK] {calls} decodes over {token_count} distinct tokens")
+    report("uncached", uncached)
+    report("cached", cached)
+    print(f"  speed-up  {statistics.fmean(uncached) / statistics.fmean(cached):.1f}x")
+    print(f"  cache     {token_cache.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare decode_access_token with and without the decoded-token cache."
+    )
+    parser.add_argument("--tokens", type=int, default=1000, help="distinct tokens in rotation")
+    parser.add_argument("--calls", type=int, default=50000)
+    args = parser.parse_args()
+    run(args.tokens, args.calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# src/auth/context.py
+
+from typing import List, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from ..collectives.models import CollectiveMembership
+
+
+def normalize_role(role: Optional[str]) -> str:
+    return (role or "").strip().lower()
+
+
+class AuthContext:
+    """
+    What one request knows about its caller, resolved at most once.
+
+    Built by auth.deps.get_auth_context. FastAPI caches a dependency's
+    value for the whole request, so require_roles() and every handler or
+    dependency that asks for the context share this instance: the role
+    is normalized once, and collective memberships are queried only on
+    first access, then memoized for the rest of the request.
+    """
+
+    def __init__(self, db: Session, user):
+        self.db = db
+        self.user = user
+        self.user_id: int = user.id
+        self.role = normalize_role(user.role)
+        self._memberships: Optional[List[CollectiveMembership]] = None
+
+    def has_role(self, *roles: str) -> bool:
+        return self.role in {normalize_role(r) for r in roles}
+
+    @property
+    def supplier_id(self) -> int:
+        """
+        Suppliers are users; negotiations reference them by user id.
+        """
+        return self.user_id
+
+    @property
+    def memberships(self) -> List[CollectiveMembership]:
+        """
+        The user's collective memberships (oldest first), collectives loaded.
+        """
+        if self._memberships is None:
+            self._memberships = (
+                self.db.query(CollectiveMembership)
+                .options(joinedload(CollectiveMembership.collective))
+                .filter(CollectiveMembership.user_id == self.user_id)
+                .order_by(CollectiveMembership.id)
+                .all()
+            )
+        return self._memberships
+
+    @property
+    def membership(self) -> Optional[CollectiveMembership]:
+        """
+        The user's first collective membership, or None.
+        """
+        memberships = self.memberships
+        return memberships[0] if memberships else None
+
+    @property
+    def collective_ids(self) -> List[int]:
+        return [m.collective_id for m in self.memberships]
+
+    def is_member_of(self, collective_id: int) -> bool:
+        return collective_id in self.collective_ids
@@ -5,10 +5,15 @@ from typing import Optional, Set
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from ..config import settings
+from ..database import get_async_db, get_db
+from ..users.models import User
+from .context import AuthContext, normalize_role
+from .epochs import is_current
+from .principals import load_principal, load_principal_async
+from .revocation import revocation_list
 from .security import oauth2_scheme
 from .utils import decode_access_token
-from ..database import get_db
-from ..users.models import User
 
 
 # ----------------------------------------------------------------------------
@@ -19,6 +24,53 @@ def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
 
 
+# Claims login_for_tokens puts in every token; ClaimsUser answers them directly
+CLAIM_ATTRIBUTES = ("email", "role", "user_type")
+
+
+class ClaimsUser:
+    """
+    Lazy stand-in for a User, built from verified token claims.
+
+    `id`, `email`, `role` and `user_type` come from the token, so role
+    checks and most handlers never touch the database. Reading any other
+    attribute loads the real User row once and delegates to it.
+
+    The claims are trusted because the token's epoch ("ver") is checked
+    against the user's current epoch, which is bumped whenever one of them
+    changes (see auth.epochs).
+    """
+
+    def __init__(self, db: Session, user_id: int, claims: dict):
+        self.id = user_id
+        for name in CLAIM_ATTRIBUTES:
+            if claims.get(name) is not None:
+                setattr(self, name, claims[name])
+        self._db = db
+        self._iat = claims.get("iat")
+        self._user: Optional[User] = None
+
+    def __getattr__(self, name: str):
+        # Only called for attributes not set from the claims
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def load(self) -> User:
+        """
+        The real User row (from the principal cache, or one query on first use).
+        """
+        if self._user is None:
+            user = load_principal(self._db, self.id, self._iat)
+            if user is None:
+                raise _credentials_exception()
+            self._user = user
+        return self._user
+
+    def __repr__(self) -> str:
+        return f"<ClaimsUser id={self.id} role={self.__dict__.get('role')!r}>"
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
@@ -27,18 +79,48 @@ def get_current_user(
     Decode the JWT access token and return the associated User.
 
     Uses auth.utils.decode_access_token(), which already knows how to:
-      - Verify signature & expiry using settings.SECRET_KEY and HS256.
+      - Verify signature & expiry using SECRET_KEY (HS256) or the key ring.
       - Raise ValueError on invalid/expired tokens.
 
     Expects:
       - payload["sub"] = user id (as string).
+      - payload["ver"] = the user's token epoch when it was issued
+        (missing on older tokens, which counts as 0).
+      - payload["jti"] = token id, checked against the revocation list.
+
+    With settings.AUTH_MODE = "claims" (the default) no query is made:
+    a ClaimsUser built from the token is returned, which loads the User row
+    only if the handler reads something the token does not carry. Tokens
+    without a role claim, and AUTH_MODE = "db", load the row up front.
     """
-    credentials_exception = HTTPException(
+    user_id, payload = _verified_subject(token)
+    if revocation_list.is_revoked(payload.get("jti")):
+        raise _credentials_exception()
+
+    if settings.AUTH_MODE == "claims" and payload.get("role") is not None:
+        return ClaimsUser(db, user_id, payload)
+
+    user = load_principal(db, user_id, payload.get("iat"))
+    if user is None:
+        raise _credentials_exception()
+
+    return user
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _verified_subject(token: str) -> tuple[int, dict]:
+    """
+    (user id, claims) of a valid, unrevoked token; 401 otherwise.
+    """
+    credentials_exception = _credentials_exception()
+
     try:
         payload = decode_access_token(token)
     except ValueError:
@@ -55,13 +137,46 @@ def get_current_user(
         # sub is not an int – token doesn't match expected format
         raise credentials_exception
 
-    user = get_user_by_id(db, user_id=user_id)
-    if user is None:
+    # Revoked: role/email/password changed or user deactivated since issue
+    if not is_current(user_id, payload.get("ver")):
         raise credentials_exception
 
+    return user_id, payload
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db=Depends(get_async_db),  # AsyncSession
+) -> User:
+    """
+    get_current_user() for `async def` endpoints on the async engine.
+
+    Always returns the real User (ClaimsUser cannot lazy-load through an
+    AsyncSession), but it normally comes from the principal cache, so a
+    repeat request still makes no query.
+    """
+    user_id, payload = _verified_subject(token)
+    if await revocation_list.is_revoked_async(db, payload.get("jti")):
+        raise _credentials_exception()
+
+    user = await load_principal_async(db, user_id, payload.get("iat"))
+    if user is None:
+        raise _credentials_exception()
+
     return user
 
 
+def get_auth_context(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> AuthContext:
+    """
+    The request's AuthContext (user, normalized role, memoized memberships).
+    Resolved once per request and shared by every dependency that asks.
+    """
+    return AuthContext(db, current_user)
+
+
 # ----------------------------------------------------------------------------
 # Role-based access helpers
 # ----------------------------------------------------------------------------
@@ -69,7 +184,7 @@ def get_current_user(
 def _normalize_roles(roles: Optional[Set[str]]) -> Set[str]:
     if not roles:
         return set()
-    return {r.lower() for r in roles}
+    return {normalize_role(r) for r in roles}
 
 
 def require_roles(*allowed_roles: str):
@@ -93,13 +208,29 @@ def require_roles(*allowed_roles: str):
     """
     allowed_normalized = _normalize_roles(set(allowed_roles))
 
-    def dependency(current_user: User = Depends(get_current_user)) -> User:
-        user_role = (current_user.role or "").lower()
-        if user_role not in allowed_normalized:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Insufficient permissions",
-            )
+    def dependency(ctx: AuthContext = Depends(get_auth_context)) -> User:
+        _check_role(ctx.role, allowed_normalized)
+        return ctx.user
+
+    return dependency
+
+
+def require_roles_async(*allowed_roles: str):
+    """
+    require_roles() for `async def` endpoints (uses get_current_user_async).
+    """
+    allowed_normalized = _normalize_roles(set(allowed_roles))
+
+    async def dependency(current_user: User = Depends(get_current_user_async)) -> User:
+        _check_role(normalize_role(current_user.role), allowed_normalized)
         return current_user
 
     return dependency
+
+
+def _check_role(role: str, allowed_normalized: Set[str]) -> None:
+    if role not in allowed_normalized:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Insufficient permissions",
+        )
@@ -0,0 +1,184 @@
+# src/auth/epochs.py
+
+import threading
+from typing import TYPE_CHECKING
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal, upsert_insert
+from ..users.models import User
+from .models import UserTokenEpoch
+from .principals import principal_cache
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Changing any of these revokes the user's outstanding tokens
+REVOKING_ATTRIBUTES = ("role", "user_type", "email", "hashed_password")
+
+# user_id -> epoch, for users whose epoch is above 0. Replaced wholesale on
+# reload, updated in place after a local commit.
+_epochs: dict[int, int] = {}
+_reload_lock = threading.Lock()
+_stop = threading.Event()
+_refresher: threading.Thread | None = None
+
+
+def token_epoch(db: Session, user_id: int) -> int:
+    """
+    The user's epoch as stored in the database; put it in the "ver" claim
+    of newly issued tokens.
+    """
+    epoch = db.scalar(select(UserTokenEpoch.epoch).where(UserTokenEpoch.user_id == user_id))
+    return epoch or 0
+
+
+async def token_epoch_async(db: "AsyncSession", user_id: int) -> int:
+    epoch = await db.scalar(select(UserTokenEpoch.epoch).where(UserTokenEpoch.user_id == user_id))
+    return epoch or 0
+
+
+def is_current(user_id: int, ver) -> bool:
+    """
+    Whether a token issued under epoch `ver` is still valid. Answered from
+    memory; other processes' changes are seen within
+    AUTH_EPOCH_REFRESH_SECONDS.
+    """
+    try:
+        ver = int(ver or 0)
+    except (TypeError, ValueError):
+        return False
+    return ver >= _epochs.get(user_id, 0)
+
+
+def reload_epochs() -> None:
+    with _reload_lock:
+        db: Session = SessionLocal()
+        try:
+            rows = db.execute(
+                select(UserTokenEpoch.user_id, UserTokenEpoch.epoch).where(UserTokenEpoch.epoch > 0)
+            ).all()
+        finally:
+            db.close()
+
+    global _epochs
+    previous, _epochs = _epochs, dict(rows)
+
+    # Users revoked by another process (e.g. create_admin_token)
+    changed = {uid for uid, epoch in _epochs.items() if previous.get(uid) != epoch}
+    principal_cache.invalidate(changed | (previous.keys() - _epochs.keys()))
+
+
+def _refresh_loop(interval: float) -> None:
+    while not _stop.wait(interval):
+        try:
+            reload_epochs()
+        except Exception as e:
+            print(f"[WARN] Token epoch refresh failed: {e}")
+
+
+def start_epochs(interval: float | None = None) -> None:
+    """
+    Load all epochs and start a daemon thread that reloads them every
+    `interval` seconds (AUTH_EPOCH_REFRESH_SECONDS).
+    """
+    global _refresher
+
+    try:
+        reload_epochs()
+    except Exception as e:
+        print(f"[WARN] Token epochs not loaded: {e}")
+
+    if _refresher is not None:
+        return
+
+    interval = interval or settings.AUTH_EPOCH_REFRESH_SECONDS
+    _stop.clear()
+    _refresher = threading.Thread(
+        target=_refresh_loop,
+        args=(interval,),
+        name="auth-epoch-refresh",
+        daemon=True,
+    )
+    _refresher.start()
+
+
+def stop_epochs() -> None:
+    global _refresher
+    _stop.set()
+    if _refresher is not None:
+        _refresher.join(timeout=5)
+        _refresher = None
+
+
+# ----------------------------------------------------------------------
+# Bump on ORM changes
+# ----------------------------------------------------------------------
+
+def bump_epochs(session: Session, user_ids) -> dict[int, int]:
+    """
+    Increment the epoch of `user_ids` in the session's transaction.
+    Returns the new epochs.
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return {}
+
+    connection = session.connection()
+    table = UserTokenEpoch.__table__
+
+    insert = upsert_insert(connection)
+    if insert is not None:
+        # One statement, and no race between two transactions inserting
+        # the first row for the same user
+        stmt = insert(table).values([{"user_id": uid, "epoch": 1} for uid in user_ids])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={"epoch": table.c.epoch + 1, "updated_at": func.now()},
+        )
+        return dict(connection.execute(stmt.returning(table.c.user_id, table.c.epoch)).all())
+
+    connection.execute(
+        update(table).where(table.c.user_id.in_(user_ids)).values(epoch=table.c.epoch + 1)
+    )
+    existing = set(connection.scalars(select(table.c.user_id).where(table.c.user_id.in_(user_ids))))
+    missing = [uid for uid in user_ids if uid not in existing]
+    if missing:
+        connection.execute(table.insert(), [{"user_id": uid, "epoch": 1} for uid in missing])
+
+    return dict(
+        connection.execute(
+            select(table.c.user_id, table.c.epoch).where(table.c.user_id.in_(user_ids))
+        ).all()
+    )
+
+
+def _collect_changes(session: Session, flush_context) -> None:
+    user_ids = set()
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            attrs = inspect(obj).attrs
+            if any(attrs[name].history.has_changes() for name in REVOKING_ATTRIBUTES):
+                user_ids.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            user_ids.add(obj.id)
+
+    if user_ids:
+        session.info.setdefault("token_epochs", {}).update(bump_epochs(session, user_ids))
+
+
+def _apply_changes(session: Session) -> None:
+    _epochs.update(session.info.pop("token_epochs", {}))
+
+
+def _discard_changes(session: Session, previous_transaction) -> None:
+    session.info.pop("token_epochs", None)
+
+
+event.listen(SessionLocal, "after_flush", _collect_changes)
+event.listen(SessionLocal, "after_commit", _apply_changes)
+event.listen(SessionLocal, "after_soft_rollback", _discard_changes)
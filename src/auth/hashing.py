@@ -0,0 +1,179 @@
+# src/auth/hashing.py
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+
+# ---------------------------------------------------------------------------
+# Password hashing (PBKDF2 only – NO bcrypt)
+# ---------------------------------------------------------------------------
+
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    except Exception:
+        return False
+
+
+class HashingBusy(Exception):
+    """
+    Raised when the hashing queue is full; main.py turns it into a 503
+    with a Retry-After header.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+class HashingExecutor:
+    """
+    Runs PBKDF2 hashes in a pool of worker processes.
+
+    PBKDF2 holds the GIL for the whole hash, so running it inline in the
+    request threadpool stalls every other request in the worker during a
+    login spike. Here the calling thread only waits on a future, and hashes
+    run on as many cores as there are pool processes.
+
+    At most `max_pending` hashes may be queued or running; beyond that
+    run() raises HashingBusy instead of letting the queue (and latency)
+    grow. Until start() is called, or with workers=0, hashes run inline,
+    which is what scripts such as create_admin_token.py get.
+    """
+
+    def __init__(self, workers: int, max_pending: int, retry_after: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.inline = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def start(self) -> None:
+        if self._pool is not None or self.workers <= 0:
+            return
+        # spawn, not fork: the parent already runs threads (catalog, epochs)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # Start every worker now rather than on the first logins
+        for future in [self._pool.submit(_hash, "warm-up") for _ in range(self.workers)]:
+            future.result()
+        print(f"[INFO] Password hashing pool started with {self.workers} processes")
+
+    def stop(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingBusy(self.retry_after)
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+
+    def _release(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+
+    def _pool_died(self) -> None:
+        print("[WARN] Password hashing pool died; hashing inline")
+        self._pool = None
+
+    def run(self, fn, *args):
+        pool = self._pool
+        if pool is None:
+            with self._lock:
+                self.inline += 1
+            return fn(*args)
+
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            return pool.submit(fn, *args).result()
+        except BrokenProcessPool:
+            self._pool_died()
+            return fn(*args)
+        finally:
+            self._release(started)
+
+    async def run_async(self, fn, *args):
+        """
+        run() for `async def` endpoints: awaits the pool's future directly,
+        without tying up a threadpool thread. Inline hashes go to the
+        threadpool so they never block the event loop.
+        """
+        pool = self._pool
+        if pool is None:
+            with self._lock:
+                self.inline += 1
+            return await run_in_threadpool(fn, *args)
+
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            return await asyncio.wrap_future(pool.submit(fn, *args))
+        except BrokenProcessPool:
+            self._pool_died()
+            return await run_in_threadpool(fn, *args)
+        finally:
+            self._release(started)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers if self._pool is not None else 0,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "peak_pending": self.peak_pending,
+                "completed": self.completed,
+                "inline": self.inline,
+                "rejected": self.rejected,
+                "mean_ms": round(self.total_seconds / self.completed * 1000, 2) if self.completed else None,
+                "max_ms": round(self.max_seconds * 1000, 2),
+            }
+
+
+def _default_workers() -> int:
+    if settings.AUTH_HASH_WORKERS is not None:
+        return settings.AUTH_HASH_WORKERS
+    return os.cpu_count() or 1
+
+
+hashing_executor = HashingExecutor(
+    workers=_default_workers(),
+    max_pending=settings.AUTH_HASH_MAX_PENDING,
+    retry_after=settings.AUTH_HASH_RETRY_AFTER_SECONDS,
+)
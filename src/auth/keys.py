@@ -0,0 +1,210 @@
+# src/auth/keys.py
+
+import argparse
+import os
+from pathlib import Path
+
+from jose import jwk
+from jose.backends import RSAKey
+from jose.backends.base import Key
+from jose.utils import base64url_decode, base64url_encode
+
+from ..config import settings
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+except ImportError:  # only needed with AUTH_KEYS_DIR set
+    serialization = None
+
+
+class Ed25519Key(Key):
+    """
+    EdDSA (Ed25519) key for python-jose, which only ships RSA, EC and
+    HMAC keys. Registered under "EdDSA" below, so jwt.encode/decode
+    accept it like any other key object.
+    """
+
+    def __init__(self, key, algorithm):
+        if isinstance(key, dict):
+            key = ed25519.Ed25519PublicKey.from_public_bytes(base64url_decode(key["x"].encode()))
+        elif isinstance(key, (str, bytes)):
+            key = _load_pem(key.encode() if isinstance(key, str) else key)
+        self._key = key
+        self._algorithm = algorithm
+
+    def is_public(self) -> bool:
+        return isinstance(self._key, ed25519.Ed25519PublicKey)
+
+    def sign(self, msg):
+        return self._key.sign(msg)
+
+    def verify(self, msg, sig):
+        key = self._key if self.is_public() else self._key.public_key()
+        try:
+            key.verify(sig, msg)
+            return True
+        except InvalidSignature:
+            return False
+
+    def public_key(self):
+        if self.is_public():
+            return self
+        return Ed25519Key(self._key.public_key(), self._algorithm)
+
+    def to_dict(self):
+        raw = self.public_key()._key.public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw
+        )
+        return {"alg": self._algorithm, "kty": "OKP", "crv": "Ed25519", "x": base64url_encode(raw).decode()}
+
+
+if serialization is not None:
+    jwk.register_key("EdDSA", Ed25519Key)
+
+
+def _load_pem(data: bytes):
+    try:
+        return serialization.load_pem_private_key(data, password=None)
+    except ValueError:
+        return serialization.load_pem_public_key(data)
+
+
+def _construct(pem: bytes) -> tuple[str, Key, bool]:
+    """
+    Parse one PEM into (algorithm, jose key object, is_private).
+    The algorithm follows from the key type: RSA -> RS256, Ed25519 -> EdDSA.
+    """
+    key = _load_pem(pem)
+    private = hasattr(key, "private_bytes")
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return "RS256", RSAKey(key, "RS256"), private
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return "EdDSA", Ed25519Key(key, "EdDSA"), private
+    raise ValueError(f"Unsupported key type {type(key).__name__}")
+
+
+class KeyRing:
+    """
+    Parsed signing/verification keys by kid.
+
+    Built once from a directory of `<kid>.pem` files: private keys can sign
+    and verify, public keys only verify (keys being retired, or keys of
+    other issuers). Tokens are signed with `signing_kid` and carry it in
+    their header, so verification is a dict lookup on a ready key object.
+
+    To rotate, add the new key file, point AUTH_SIGNING_KID at it and
+    restart; keep the old file until the tokens it signed have expired.
+    """
+
+    def __init__(self, keys: dict[str, tuple[str, Key, bool]], signing_kid: str):
+        alg, key, private = keys.get(signing_kid, (None, None, False))
+        if not private:
+            raise ValueError(f"AUTH_SIGNING_KID {signing_kid!r} has no private key in the key ring")
+        self.signing_kid = signing_kid
+        self.signing_algorithm = alg
+        self.signing_key = key
+        # Verification only needs the public half; private material stays
+        # in signing_key alone
+        self.verifiers = {kid: (alg, key.public_key()) for kid, (alg, key, _) in keys.items()}
+        self.jwks = {
+            "keys": [
+                {**key.to_dict(), "kid": kid, "use": "sig"}
+                for kid, (alg, key) in sorted(self.verifiers.items())
+            ]
+        }
+        # Stands in for SECRET_KEY in the decoded-token cache: entries are
+        # dropped when the set of trusted keys changes
+        self.fingerprint = "keyring:" + ",".join(sorted(self.verifiers))
+
+    @classmethod
+    def load(cls, keys_dir: str, signing_kid: str) -> "KeyRing":
+        if serialization is None:
+            raise RuntimeError("AUTH_KEYS_DIR needs the 'cryptography' package")
+        keys = {}
+        for path in sorted(Path(keys_dir).glob("*.pem")):
+            try:
+                keys[path.stem] = _construct(path.read_bytes())
+            except ValueError as e:
+                raise ValueError(f"{path}: {e}") from e
+        return cls(keys, signing_kid)
+
+
+_key_ring: KeyRing | None = None
+_key_ring_loaded = False
+
+
+def key_ring() -> KeyRing | None:
+    """
+    The configured key ring, loaded on first use; None when AUTH_KEYS_DIR
+    is not set and tokens are signed with SECRET_KEY (HS256).
+    """
+    global _key_ring, _key_ring_loaded
+    if not _key_ring_loaded:
+        if settings.AUTH_KEYS_DIR:
+            _key_ring = KeyRing.load(settings.AUTH_KEYS_DIR, settings.AUTH_SIGNING_KID)
+        _key_ring_loaded = True
+    return _key_ring
+
+
+# ----------------------------------------------------------------------
+# Key generation
+# ----------------------------------------------------------------------
+
+
+def generate_key(keys_dir: str, kid: str, key_type: str) -> Path:
+    if serialization is None:
+        raise RuntimeError("Generating keys needs the 'cryptography' package")
+    if key_type == "ed25519":
+        key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+    path = Path(keys_dir) / f"{kid}.pem"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage JWT signing keys.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="write a new private key as <dir>/<kid>.pem")
+    gen.add_argument("--kid", required=True)
+    gen.add_argument("--type", choices=["ed25519", "rsa"], default="ed25519")
+    gen.add_argument("--dir", default=settings.AUTH_KEYS_DIR or "keys")
+
+    sub.add_parser("show", help="print the configured key ring")
+
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        try:
+            path = generate_key(args.dir, args.kid, args.type)
+        except FileExistsError:
+            print(f"[ERROR] Key {args.kid!r} already exists in {args.dir}")
+            return
+        print(f"[OK] Wrote {path}")
+        print(f"[INFO] Sign with it: AUTH_KEYS_DIR={args.dir} AUTH_SIGNING_KID={args.kid}")
+        return
+
+    ring = key_ring()
+    if ring is None:
+        print("[INFO] AUTH_KEYS_DIR not set; tokens are signed with SECRET_KEY (HS256)")
+        return
+    for kid, (alg, key) in sorted(ring.verifiers.items()):
+        marker = " (signing)" if kid == ring.signing_kid else ""
+        print(f"  {kid:<20} {alg}{marker}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# src/auth/models.py
+
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+
+from ..database import Base
+
+
+class UserTokenEpoch(Base):
+    """
+    Token epoch per user. Tokens carry the epoch they were issued under
+    ("ver" claim); bumping it revokes every token issued before.
+
+    Users that never had their role, email or password changed have no row
+    (epoch 0). No FK to users so the row can outlive a deleted user.
+    """
+
+    __tablename__ = "user_token_epochs"
+
+    user_id = Column(Integer, primary_key=True)
+    epoch = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class RevokedToken(Base):
+    """
+    A token revoked before its expiry (logout, refresh-token rotation).
+    Rows are swept once `expires_at` (the token's exp, unix seconds) passes.
+    """
+
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String, unique=True, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    expires_at = Column(Integer, nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now())
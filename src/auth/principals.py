@@ -0,0 +1,184 @@
+# src/auth/principals.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from ..config import settings
+from ..database import SessionLocal
+from ..users.models import User
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class PrincipalCache:
+    """
+    Per-process LRU of authenticated users, keyed by (user_id, token iat).
+
+    Values are detached User instances holding every column. They are never
+    handed out directly: get() merges a copy into the caller's session
+    without a query, so relationships still lazy-load and each request owns
+    its instance. Entries expire after `ttl` seconds, which bounds how stale
+    a change made by another process can be.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[int, int], tuple[float, User]] = OrderedDict()
+        self.generation = 0  # bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, db: Session, user_id: int, iat: int) -> User | None:
+        user = self.lookup(user_id, iat)
+        return db.merge(user, load=False) if user is not None else None
+
+    def lookup(self, user_id: int, iat: int) -> User | None:
+        """
+        The cached detached instance itself; merge it before use.
+        """
+        key = (user_id, iat)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user: User, iat: int, generation: int) -> None:
+        """
+        Cache a detached copy of `user` (a freshly loaded, unmodified row).
+
+        `generation` is the value read before loading it; if an invalidation
+        happened since, the row may predate it and is not cached.
+        """
+        if self.max_size <= 0:
+            return
+        snapshot = _detached_copy(user)
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[(user.id, iat)] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end((user.id, iat))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_ids) -> None:
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        with self._lock:
+            self.generation += 1
+            for key in [k for k in self._entries if k[0] in user_ids]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def _detached_copy(user: User) -> User:
+    """
+    A detached User with the same identity and column values as `user`,
+    which stays attached to its own session.
+    """
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def load_principal(db: Session, user_id: int, iat) -> User | None:
+    """
+    The User for a verified token, from the principal cache when possible.
+    Tokens without an iat claim are not cached.
+    """
+    if iat is not None:
+        user = principal_cache.get(db, user_id, iat)
+        if user is not None:
+            return user
+
+    generation = principal_cache.generation
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is not None and iat is not None:
+        principal_cache.put(user, iat, generation)
+    return user
+
+
+async def load_principal_async(db: "AsyncSession", user_id: int, iat) -> User | None:
+    """
+    load_principal() on an AsyncSession.
+    """
+    if iat is not None:
+        cached = principal_cache.lookup(user_id, iat)
+        if cached is not None:
+            return await db.merge(cached, load=False)
+
+    generation = principal_cache.generation
+    user = await db.scalar(select(User).where(User.id == user_id))
+    if user is not None and iat is not None:
+        principal_cache.put(user, iat, generation)
+    return user
+
+
+# ----------------------------------------------------------------------
+# Invalidation on ORM changes
+# ----------------------------------------------------------------------
+
+def _collect_changes(session: Session, flush_context) -> None:
+    user_ids = {
+        obj.id
+        for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, User)
+    }
+    if user_ids:
+        session.info.setdefault("principal_user_ids", set()).update(user_ids)
+        # Drop now as well as on commit, so a concurrent request cannot
+        # re-cache the old row in between.
+        principal_cache.invalidate(user_ids)
+
+
+def _apply_changes(session: Session) -> None:
+    principal_cache.invalidate(session.info.pop("principal_user_ids", ()))
+
+
+def _discard_changes(session: Session, previous_transaction) -> None:
+    session.info.pop("principal_user_ids", None)
+
+
+event.listen(SessionLocal, "after_flush", _collect_changes)
+event.listen(SessionLocal, "after_commit", _apply_changes)
+event.listen(SessionLocal, "after_soft_rollback", _discard_changes)
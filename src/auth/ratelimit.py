@@ -0,0 +1,231 @@
+# src/auth/ratelimit.py
+
+import importlib
+import threading
+from abc import ABC, abstractmethod
+import time
+from array import array
+from collections import OrderedDict
+
+from ..config import settings
+
+
+class RateLimitStore(ABC):
+    """
+    Backend for sliding-window counters.
+
+    acquire() gets every (key, limit, window) rule of one attempt and must
+    record the attempt against all of them or none. It returns (0.0, None)
+    when the attempt is allowed, otherwise the seconds until it would be
+    and the key of the rule that blocked it.
+    Methods are async so a backend shared between workers (Redis, a
+    database) can do I/O without blocking the event loop.
+    """
+
+    @abstractmethod
+    async def acquire(
+        self, rules: list[tuple[str, int, float]], now: float
+    ) -> tuple[float, str | None]:
+        ...
+
+    @abstractmethod
+    async def reset(self, key: str) -> None:
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+
+class _Ring:
+    """
+    Timestamps of the last `limit` attempts for one key. Once full, the
+    slot about to be overwritten holds the oldest attempt, which is all
+    the sliding window needs to look at.
+    """
+
+    __slots__ = ("times", "head", "count")
+
+    def __init__(self, limit: int):
+        self.times = array("d", bytes(8 * limit))
+        self.head = 0
+        self.count = 0
+
+    def wait(self, limit: int, window: float, now: float) -> float:
+        if self.count < limit:
+            return 0.0
+        return max(0.0, self.times[self.head] + window - now)
+
+    def record(self, now: float) -> None:
+        times = self.times
+        times[self.head] = now
+        self.head = (self.head + 1) % len(times)
+        if self.count < len(times):
+            self.count += 1
+
+
+class LocalRateLimitStore(RateLimitStore):
+    """
+    In-process store: one ring buffer per key, at most `max_keys` keys
+    (least recently used dropped first). Each worker process counts on
+    its own, so with N workers the effective limits are up to N times
+    higher; configure a shared backend where that matters.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._rings: "OrderedDict[str, _Ring]" = OrderedDict()
+        self.evictions = 0
+
+    def _ring(self, key: str, limit: int) -> _Ring:
+        ring = self._rings.get(key)
+        if ring is None or len(ring.times) != limit:
+            ring = self._rings[key] = _Ring(limit)
+            if len(self._rings) > self.max_keys:
+                self._rings.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._rings.move_to_end(key)
+        return ring
+
+    async def acquire(
+        self, rules: list[tuple[str, int, float]], now: float
+    ) -> tuple[float, str | None]:
+        with self._lock:
+            rings = []
+            for key, limit, window in rules:
+                ring = self._ring(key, limit)
+                wait = ring.wait(limit, window, now)
+                if wait > 0:
+                    return wait, key
+                rings.append(ring)
+            for ring in rings:
+                ring.record(now)
+            return 0.0, None
+
+    async def reset(self, key: str) -> None:
+        with self._lock:
+            self._rings.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"keys": len(self._rings), "max_keys": self.max_keys, "evictions": self.evictions}
+
+
+class LoginLimited(Exception):
+    """
+    Raised by LoginRateLimiter.check(); the login route turns it into a 429.
+    """
+
+    def __init__(self, retry_after: float, scope: str):
+        super().__init__(f"Too many login attempts ({scope})")
+        self.retry_after = retry_after
+        self.scope = scope
+
+
+class LoginRateLimiter:
+    """
+    Sliding-window limits on login attempts per email and per client IP.
+
+    check() runs before the user lookup and the password hash, so a
+    rejected attempt costs a dict lookup and a few comparisons. Every
+    allowed attempt counts against both windows; a successful login
+    clears the email's window so its owner is not locked out by their
+    own earlier typos.
+    """
+
+    def __init__(
+        self,
+        store: RateLimitStore,
+        email_limit: int,
+        email_window: float,
+        ip_limit: int,
+        ip_window: float,
+    ):
+        self.store = store
+        self.email_limit = email_limit
+        self.email_window = email_window
+        self.ip_limit = ip_limit
+        self.ip_window = ip_window
+        # Counters are bumped without a lock; they are for monitoring only
+        self.allowed = 0
+        self.rejected_email = 0
+        self.rejected_ip = 0
+        self.errors = 0
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        return "login:email:" + email.strip().lower()
+
+    async def check(self, email: str, ip: str | None) -> None:
+        """
+        Record an attempt, or raise LoginLimited without recording it.
+        A failing backend lets the attempt through rather than locking
+        everybody out.
+        """
+        rules = []
+        if self.email_limit > 0:
+            rules.append((self._email_key(email), self.email_limit, self.email_window))
+        if self.ip_limit > 0 and ip:
+            rules.append(("login:ip:" + ip, self.ip_limit, self.ip_window))
+        if not rules:
+            return
+
+        try:
+            wait, blocked = await self.store.acquire(rules, time.time())
+        except Exception as e:
+            self.errors += 1
+            print(f"[WARN] Login rate limit backend failed: {e}")
+            return
+
+        if blocked is None:
+            self.allowed += 1
+            return
+
+        if blocked.startswith("login:ip:"):
+            self.rejected_ip += 1
+            raise LoginLimited(wait, "ip")
+        self.rejected_email += 1
+        raise LoginLimited(wait, "email")
+
+    async def succeeded(self, email: str) -> None:
+        try:
+            await self.store.reset(self._email_key(email))
+        except Exception as e:
+            self.errors += 1
+            print(f"[WARN] Login rate limit backend failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "email_limit": f"{self.email_limit}/{self.email_window:g}s",
+            "ip_limit": f"{self.ip_limit}/{self.ip_window:g}s",
+            "allowed": self.allowed,
+            "rejected_email": self.rejected_email,
+            "rejected_ip": self.rejected_ip,
+            "backend_errors": self.errors,
+            "store": self.store.stats(),
+        }
+
+
+def _load_store(spec: str) -> RateLimitStore:
+    """
+    "local", or "package.module:ClassName" for a RateLimitStore subclass
+    that takes no arguments. A class missing acquire() or reset() fails
+    here, at import, rather than on the first login.
+    """
+    if spec == "local":
+        return LocalRateLimitStore(settings.AUTH_LOGIN_LIMIT_MAX_KEYS)
+    module_name, _, class_name = spec.partition(":")
+    store_class = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(store_class, type) and issubclass(store_class, RateLimitStore)):
+        raise TypeError(f"AUTH_LOGIN_LIMIT_BACKEND {spec!r} is not a RateLimitStore subclass")
+    return store_class()
+
+
+login_limiter = LoginRateLimiter(
+    store=_load_store(settings.AUTH_LOGIN_LIMIT_BACKEND),
+    email_limit=settings.AUTH_LOGIN_EMAIL_LIMIT,
+    email_window=settings.AUTH_LOGIN_EMAIL_WINDOW_SECONDS,
+    ip_limit=settings.AUTH_LOGIN_IP_LIMIT,
+    ip_window=settings.AUTH_LOGIN_IP_WINDOW_SECONDS,
+)
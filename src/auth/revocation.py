@@ -0,0 +1,247 @@
+# src/auth/revocation.py
+
+import hashlib
+import math
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal, engine, upsert_insert
+from .models import RevokedToken
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Sized for `capacity` items at `error_rate` false positives; positions
+    come from one 128-bit BLAKE2b digest split into two 64-bit halves
+    (double hashing), so a lookup is one hash plus k bit tests.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        bits = self.bits
+        for pos in self._positions(item):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        for pos in self._positions(item):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+# refresh() re-reads this many ids below the highest it has seen: ids are
+# handed out when a row is inserted, not when it commits, so with concurrent
+# revocations (Postgres sequences) a lower id can become visible after a
+# higher one has already been read
+REFRESH_OVERLAP_IDS = 1000
+
+
+class RevocationList:
+    """
+    Revoked token ids (jti) in revoked_tokens, fronted by a Bloom filter.
+
+    The filter holds every unexpired revoked jti, so a token that was never
+    revoked (nearly all of them) is cleared in memory without a query. Only
+    filter hits are confirmed against the table. Rows written by other
+    processes are picked up by refresh(); sweep() deletes expired rows and
+    rebuilds the filter, which cannot forget items on its own.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._last_id = 0
+        # Counters are bumped without the lock; they are for monitoring only
+        self.checks = 0
+        self.lookups = 0
+        self.revoked_hits = 0
+
+    def might_be_revoked(self, jti: str | None) -> bool:
+        self.checks += 1
+        return jti is not None and jti in self._bloom
+
+    def is_revoked(self, jti: str | None) -> bool:
+        if not self.might_be_revoked(jti):
+            return False
+        db: Session = SessionLocal()
+        try:
+            return self._confirm(db.scalar(select(RevokedToken.id).where(RevokedToken.jti == jti)))
+        finally:
+            db.close()
+
+    async def is_revoked_async(self, db: "AsyncSession", jti: str | None) -> bool:
+        if not self.might_be_revoked(jti):
+            return False
+        return self._confirm(await db.scalar(select(RevokedToken.id).where(RevokedToken.jti == jti)))
+
+    def _confirm(self, row_id) -> bool:
+        self.lookups += 1
+        if row_id is not None:
+            self.revoked_hits += 1
+        return row_id is not None
+
+    def revoke_statement(self, jti: str, expires_at: int, user_id: int | None = None):
+        """
+        INSERT for the caller to execute and commit in its own transaction.
+        A duplicate jti (already revoked) inserts no row on SQLite and
+        Postgres (ON CONFLICT DO NOTHING, rowcount 0) and raises
+        IntegrityError elsewhere. The jti goes into the filter right away;
+        if the insert is rolled back that only costs a query on later checks.
+        """
+        with self._lock:
+            self._bloom.add(jti)
+        upsert = upsert_insert(engine)
+        if upsert is not None:
+            return (
+                upsert(RevokedToken)
+                .values(jti=jti, expires_at=int(expires_at), user_id=user_id)
+                .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+            )
+        return insert(RevokedToken).values(jti=jti, expires_at=int(expires_at), user_id=user_id)
+
+    def refresh(self) -> None:
+        """
+        Add rows revoked since the last refresh (by any process) to the
+        filter, re-reading a trailing window of REFRESH_OVERLAP_IDS ids for
+        rows that committed out of id order.
+        """
+        db: Session = SessionLocal()
+        try:
+            rows = db.execute(
+                select(RevokedToken.id, RevokedToken.jti)
+                .where(RevokedToken.id > self._last_id - REFRESH_OVERLAP_IDS)
+                .order_by(RevokedToken.id)
+            ).all()
+        finally:
+            db.close()
+        with self._lock:
+            bloom = self._bloom
+            for id_, jti in rows:
+                # The overlap re-reads rows already added; only count new ones
+                if jti not in bloom:
+                    bloom.add(jti)
+                self._last_id = max(self._last_id, id_)
+
+    def sweep(self, now: float | None = None) -> int:
+        """
+        Delete rows whose token has expired anyway and rebuild the filter
+        from the rest. Returns the number of rows deleted.
+        """
+        now = int(now if now is not None else time.time())
+        db: Session = SessionLocal()
+        try:
+            deleted = db.execute(delete(RevokedToken).where(RevokedToken.expires_at < now)).rowcount
+            db.commit()
+            rows = db.execute(select(RevokedToken.id, RevokedToken.jti).order_by(RevokedToken.id)).all()
+        finally:
+            db.close()
+
+        bloom = BloomFilter(max(self.capacity, len(rows) * 2), self.error_rate)
+        for _, jti in rows:
+            bloom.add(jti)
+        with self._lock:
+            self._bloom = bloom
+            self._last_id = rows[-1][0] if rows else 0
+        # Revocations committed while the new filter was being built
+        self.refresh()
+        return deleted
+
+    def stats(self) -> dict:
+        return {
+            "filter_items": self._bloom.count,
+            "filter_bits": self._bloom.size,
+            "checks": self.checks,
+            "lookups": self.lookups,
+            "revoked": self.revoked_hits,
+            "false_positives": self.lookups - self.revoked_hits,
+        }
+
+
+revocation_list = RevocationList(
+    capacity=settings.AUTH_REVOCATION_CAPACITY,
+    error_rate=settings.AUTH_REVOCATION_ERROR_RATE,
+)
+
+
+# ----------------------------------------------------------------------
+# Background refresh and sweep
+# ----------------------------------------------------------------------
+
+_stop = threading.Event()
+_refresher: threading.Thread | None = None
+
+
+def _refresh_loop(interval: float, sweep_every: float) -> None:
+    next_sweep = time.monotonic() + sweep_every
+    while not _stop.wait(interval):
+        try:
+            if time.monotonic() >= next_sweep:
+                deleted = revocation_list.sweep()
+                next_sweep = time.monotonic() + sweep_every
+                if deleted:
+                    print(f"[INFO] Swept {deleted} expired revoked tokens")
+            else:
+                revocation_list.refresh()
+        except Exception as e:
+            print(f"[WARN] Token revocation refresh failed: {e}")
+
+
+def start_revocations() -> None:
+    """
+    Build the filter from revoked_tokens (sweeping expired rows first) and
+    start a daemon thread that refreshes it every AUTH_EPOCH_REFRESH_SECONDS
+    and sweeps every AUTH_REVOCATION_SWEEP_SECONDS.
+    """
+    global _refresher
+
+    try:
+        revocation_list.sweep()
+    except Exception as e:
+        print(f"[WARN] Token revocations not loaded: {e}")
+
+    if _refresher is not None:
+        return
+
+    _stop.clear()
+    _refresher = threading.Thread(
+        target=_refresh_loop,
+        args=(settings.AUTH_EPOCH_REFRESH_SECONDS, settings.AUTH_REVOCATION_SWEEP_SECONDS),
+        name="auth-revocation-refresh",
+        daemon=True,
+    )
+    _refresher.start()
+
+
+def stop_revocations() -> None:
+    global _refresher
+    _stop.set()
+    if _refresher is not None:
+        _refresher.join(timeout=5)
+        _refresher = None
@@ -1,44 +1,72 @@
 # src/auth/router.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 
-from ..database import get_db
+from ..database import get_async_db
 from ..users import models as user_models
 from ..users.schemas import UserOut
 from . import schemas
 from .utils import (
     create_access_token,
     create_refresh_token,
-    verify_password,
+    verify_password_async,
     decode_access_token,
+    token_cache,
 )
-from .deps import get_current_user
+from .deps import get_current_user_async, require_roles_async
+from .security import oauth2_scheme
+from .epochs import is_current, token_epoch_async
+from .keys import key_ring
+from .hashing import hashing_executor
+from .principals import principal_cache
+from .ratelimit import LoginLimited, login_limiter
+from .revocation import revocation_list
 
 # NOTE: no prefix here; main.py already does prefix="/auth"
+#
+# This router is async end to end (AsyncSession from get_async_db, hashes
+# awaited on the hashing pool), so its requests never wait for a threadpool
+# slot. It is the reference for porting the other routers, which still use
+# the sync get_db / get_current_user.
 router = APIRouter()
 
 
 @router.post("/login", response_model=schemas.TokenPair)
-def login_for_tokens(
+async def login_for_tokens(
     credentials: schemas.LoginRequest,
-    db: Session = Depends(get_db),
+    request: Request,
+    db=Depends(get_async_db),  # AsyncSession
 ):
     """
     Exchange email+password for an access token and refresh token.
+
+    Attempts over the per-email or per-IP limit get a 429 before the user
+    lookup and the password hash.
     """
-    user = (
-        db.query(user_models.User)
-        .filter(user_models.User.email == credentials.email)
-        .first()
+    try:
+        await login_limiter.check(credentials.email, request.client.host if request.client else None)
+    except LoginLimited as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please retry later",
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        )
+
+    user = await db.scalar(
+        select(user_models.User).where(user_models.User.email == credentials.email)
     )
 
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
+    await login_limiter.succeeded(credentials.email)
 
     # Claims embedded in the token
     claims = {
@@ -46,6 +74,7 @@ def login_for_tokens(
         "email": user.email,
         "role": user.role,
         "user_type": user.user_type,
+        "ver": await token_epoch_async(db, user.id),
     }
 
     access_token = create_access_token(claims)
@@ -59,9 +88,15 @@ def login_for_tokens(
 
 
 @router.post("/refresh", response_model=schemas.TokenRefreshResponse)
-def refresh_tokens(body: schemas.TokenRefreshRequest):
+async def refresh_tokens(
+    body: schemas.TokenRefreshRequest,
+    db=Depends(get_async_db),  # AsyncSession
+):
     """
     Exchange a refresh token for a new access + refresh pair.
+
+    Refresh tokens are single-use: the presented one is revoked as part of
+    the exchange, so replaying it (or racing two exchanges) gets a 401.
     """
     try:
         payload = decode_access_token(body.refresh_token)
@@ -77,11 +112,28 @@ def refresh_tokens(body: schemas.TokenRefreshRequest):
             detail="Not a refresh token",
         )
 
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
+        user_id = None
+    if user_id is None or not is_current(user_id, payload.get("ver")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+        )
+
+    if not await _revoke(db, payload, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has already been used",
+        )
+
     claims = {
         "sub": payload.get("sub"),
         "email": payload.get("email"),
         "role": payload.get("role"),
         "user_type": payload.get("user_type"),
+        "ver": payload.get("ver", 0),
     }
 
     new_access = create_access_token(claims)
@@ -94,11 +146,80 @@ def refresh_tokens(body: schemas.TokenRefreshRequest):
     )
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    body: schemas.LogoutRequest | None = None,
+    token: str = Depends(oauth2_scheme),
+    db=Depends(get_async_db),  # AsyncSession
+):
+    """
+    Revoke the bearer access token and, if given, the refresh token.
+    """
+    tokens = [token] + ([body.refresh_token] if body and body.refresh_token else [])
+    for raw in tokens:
+        try:
+            payload = decode_access_token(raw)
+        except ValueError:
+            continue  # expired or invalid: nothing to revoke
+        try:
+            user_id = int(payload.get("sub"))
+        except (TypeError, ValueError):
+            user_id = None
+        await _revoke(db, payload, user_id)
+
+
+async def _revoke(db, payload: dict, user_id: int | None) -> bool:
+    """
+    Add the token's jti to the revocation list. Returns False if it was
+    already revoked. Tokens from before jti was added cannot be revoked.
+    """
+    jti = payload.get("jti")
+    if jti is None:
+        return True
+    if await revocation_list.is_revoked_async(db, jti):
+        return False
+    try:
+        result = await db.execute(revocation_list.revoke_statement(jti, payload["exp"], user_id))
+        if result.rowcount == 0:
+            await db.rollback()
+            return False
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return False
+    return True
+
+
 @router.get("/me", response_model=UserOut)
-def read_current_user(
-    current_user: user_models.User = Depends(get_current_user),
+async def read_current_user(
+    current_user: user_models.User = Depends(get_current_user_async),
 ):
     """
     Return the currently authenticated user (based on Bearer token).
     """
     return current_user
+
+
+@router.get("/jwks.json")
+async def jwks(response: Response):
+    """
+    Public keys tokens are signed with (JWK Set), so other services can
+    verify tokens locally. Empty while tokens are signed with SECRET_KEY.
+    """
+    response.headers["Cache-Control"] = "public, max-age=300"
+    ring = key_ring()
+    return ring.jwks if ring is not None else {"keys": []}
+
+
+@router.get("/stats")
+async def auth_stats(current_admin=Depends(require_roles_async("admin"))):
+    """
+    Counters of the per-process auth caches and hashing pool (admin only).
+    """
+    return {
+        "principal_cache": principal_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "hashing": hashing_executor.stats(),
+        "revocations": revocation_list.stats(),
+        "login_limiter": login_limiter.stats(),
+    }
@@ -1,5 +1,7 @@
 # src/auth/schemas.py
 
+from typing import Optional
+
 from pydantic import BaseModel, EmailStr
 
 
@@ -18,6 +20,10 @@ class TokenRefreshRequest(BaseModel):
     refresh_token: str
 
 
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+
 class TokenRefreshResponse(BaseModel):
     access_token: str
     refresh_token: str
@@ -0,0 +1,81 @@
+# src/auth/token_cache.py
+
+import hashlib
+import threading
+import time
+from typing import Any, Dict
+
+
+class DecodedTokenCache:
+    """
+    Verified JWT payloads keyed by the SHA-256 digest of the raw token.
+
+    A hit skips base64/JSON parsing and the HMAC check. Entries are only
+    served until the token's own `exp`, the cache never holds more than
+    `max_size` entries, and everything is dropped as soon as the signing
+    secret differs from the one the entries were verified with.
+    Only successfully verified tokens are stored.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: dict[bytes, tuple[float, Dict[str, Any]]] = {}
+        self._secret: str | None = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key: bytes, secret: str) -> Dict[str, Any] | None:
+        now = time.time()
+        with self._lock:
+            if secret != self._secret:
+                self._entries.clear()
+                self._secret = secret
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self.hits += 1
+        # Callers may modify the payload they get back
+        return dict(entry[1])
+
+    def put(self, key: bytes, secret: str, payload: Dict[str, Any]) -> None:
+        exp = payload.get("exp")
+        if self.max_size <= 0 or not isinstance(exp, (int, float)):
+            return
+        with self._lock:
+            if secret != self._secret:
+                return
+            if len(self._entries) >= self.max_size:
+                self._evict(time.time())
+            self._entries[key] = (exp, dict(payload))
+
+    def _evict(self, now: float) -> None:
+        # Drop expired tokens first; if none had expired, the oldest quarter
+        expired = [k for k, (exp, _) in self._entries.items() if exp <= now]
+        if not expired:
+            expired = list(self._entries)[: max(1, self.max_size // 4)]
+        for k in expired:
+            del self._entries[k]
+        self.evictions += len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
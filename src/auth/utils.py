@@ -1,38 +1,49 @@
 # src/auth/utils.py
 
+import uuid
 from datetime import datetime, timedelta
 from typing import Any, Dict, Union
 
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 
 from ..config import settings
+from .hashing import _hash, _verify, hashing_executor, pwd_context  # noqa: F401
+from .keys import key_ring
+from .token_cache import DecodedTokenCache
 
 # ---------------------------------------------------------------------------
-# Password hashing (PBKDF2 only – NO bcrypt)
+# Password hashing (PBKDF2 only – NO bcrypt), run on hashing_executor
 # ---------------------------------------------------------------------------
 
-pwd_context = CryptContext(
-    schemes=["pbkdf2_sha256"],
-    deprecated="auto",
-)
-
 def hash_password(password: str) -> str:
     """
     Hash a plain-text password using PBKDF2-SHA256.
+    Raises HashingBusy when the hashing queue is full.
     """
-    return pwd_context.hash(password)
+    return hashing_executor.run(_hash, password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a plain-text password against a PBKDF2-SHA256 hash.
     Returns False if the hash format is unknown or invalid.
+    Raises HashingBusy when the hashing queue is full.
     """
-    try:
-        return pwd_context.verify(plain_password, hashed_password)
-    except Exception:
-        return False
+    return hashing_executor.run(_verify, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    hash_password() for async endpoints.
+    """
+    return await hashing_executor.run_async(_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    verify_password() for async endpoints.
+    """
+    return await hashing_executor.run_async(_verify, plain_password, hashed_password)
 
 
 # ---------------------------------------------------------------------------
@@ -52,8 +63,17 @@ def _create_token_from_claims(
     to_encode["iat"] = int(now.timestamp())
     to_encode["exp"] = int((now + expires_delta).timestamp())
     to_encode["type"] = token_type
-
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+    to_encode["jti"] = uuid.uuid4().hex
+
+    ring = key_ring()
+    if ring is None:
+        return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(
+        to_encode,
+        ring.signing_key,
+        algorithm=ring.signing_algorithm,
+        headers={"kid": ring.signing_kid},
+    )
 
 
 def create_access_token(
@@ -119,13 +139,43 @@ def create_refresh_token(
     )
 
 
-def decode_access_token(token: str) -> Dict[str, Any]:
+token_cache = DecodedTokenCache(max_size=settings.AUTH_TOKEN_CACHE_SIZE)
+
+
+def verify_token(token: str) -> Dict[str, Any]:
     """
-    Decode & validate a JWT (access OR refresh).
+    Full signature and claim validation, without the cache.
     Raises ValueError on failure.
+
+    With a key ring, the token's `kid` header picks the (already parsed)
+    key and its algorithm; tokens without a known kid are rejected.
     """
+    ring = key_ring()
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        if ring is None:
+            return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+        verifier = ring.verifiers.get(jwt.get_unverified_header(token).get("kid"))
+        if verifier is None:
+            raise ValueError("Invalid or expired token")
+        alg, key = verifier
+        return jwt.decode(token, key, algorithms=[alg])
     except JWTError as e:
         raise ValueError("Invalid or expired token") from e
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Decode & validate a JWT (access OR refresh).
+    Raises ValueError on failure.
+
+    Tokens verified before are answered from token_cache until they expire
+    (or SECRET_KEY / the key ring changes).
+    """
+    ring = key_ring()
+    secret = settings.SECRET_KEY if ring is None else ring.fingerprint
+    key = token_cache.key(token)
+    payload = token_cache.get(key, secret)
+    if payload is None:
+        payload = verify_token(token)
+        token_cache.put(key, secret, payload)
+    return payload
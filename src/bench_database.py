@@ -0,0 +1,172 @@
+# src/bench_database.py
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from .database import Base, build_engine
+from .collectives.models import Collective, CollectiveMembership
+from . import create_db  # noqa: F401  (registers every model on Base)
+
+
+def seed(Session, collectives: int, members: int) -> None:
+    db = Session()
+    try:
+        db.add_all(
+            Collective(name=f"Collective {i}", slug=f"collective-{i}", description="bench")
+            for i in range(1, collectives + 1)
+        )
+        db.flush()
+        rnd = random.Random(0)
+        db.add_all(
+            CollectiveMembership(user_id=user_id, collective_id=rnd.randint(1, collectives))
+            for user_id in range(1, members + 1)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def reader(Session, collectives: int, stop: threading.Event, timings: list, errors: list) -> None:
+    """
+    What a collective page does: the collective plus its member count.
+    """
+    rnd = random.Random(threading.get_ident())
+    db = Session()
+    try:
+        while not stop.is_set():
+            collective_id = rnd.randint(1, collectives)
+            started = time.perf_counter()
+            try:
+                db.get(Collective, collective_id)
+                db.scalar(
+                    select(func.count(CollectiveMembership.id)).where(
+                        CollectiveMembership.collective_id == collective_id
+                    )
+                )
+                db.rollback()  # end the read transaction, like a request would
+            except OperationalError as e:
+                db.rollback()
+                errors.append(str(e.orig))
+                continue
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        db.close()
+
+
+def writer(Session, collectives: int, first_user: int, stop: threading.Event, timings: list, errors: list) -> None:
+    """
+    What /collectives/{id}/join does: insert one membership and commit.
+    """
+    rnd = random.Random(first_user)
+    user_id = first_user
+    db = Session()
+    try:
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                db.add(CollectiveMembership(user_id=user_id, collective_id=rnd.randint(1, collectives)))
+                db.commit()
+            except OperationalError as e:
+                db.rollback()
+                errors.append(str(e.orig))
+                continue
+            finally:
+                user_id += 1
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        db.close()
+
+
+def run_profile(profile: str, directory: str, readers: int, writers: int, seconds: float) -> dict:
+    path = os.path.join(directory, f"bench_{profile}.db")
+    engine = build_engine(f"sqlite:///{path}", profile)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    collectives = 200
+    seed(Session, collectives, members=20000)
+
+    stop = threading.Event()
+    read_ms, write_ms, errors = [], [], []
+    threads = [
+        threading.Thread(target=reader, args=(Session, collectives, stop, read_ms, errors))
+        for _ in range(readers)
+    ] + [
+        threading.Thread(target=writer, args=(Session, collectives, 10**6 * (i + 1), stop, write_ms, errors))
+        for i in range(writers)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    journal = engine.connect().exec_driver_sql("PRAGMA journal_mode").scalar()
+    engine.dispose()
+    return {
+        "profile": profile,
+        "journal": journal,
+        "reads": read_ms,
+        "writes": write_ms,
+        "errors": errors,
+        "seconds": seconds,
+    }
+
+
+def _pct(values: list[float], p: int) -> str:
+    if len(values) < 2:
+        return "-"
+    return f"{statistics.quantiles(values, n=100)[p - 1]:.2f}"
+
+
+def report(result: dict) -> None:
+    reads, writes, seconds = result["reads"], result["writes"], result["seconds"]
+    print(f"[OK] profile={result['profile']} (journal_mode={result['journal']})")
+    print(f"  reads   {len(reads) / seconds:9.0f}/s   p50 {_pct(reads, 50):>8} ms   p99 {_pct(reads, 99):>8} ms")
+    print(f"  writes  {len(writes) / seconds:9.0f}/s   p50 {_pct(writes, 50):>8} ms   p99 {_pct(writes, 99):>8} ms")
+    if result["errors"]:
+        print(f"  [WARN] {len(result['errors'])} failed operations, e.g. {result['errors'][0]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Concurrent read/write throughput of SQLite with the default vs production profile."
+    )
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument(
+        "--dir",
+        help="where to create the scratch databases (default: a temp dir; "
+        "use the real data disk, tmpfs hides fsync costs)",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        results = [
+            run_profile(profile, directory, args.readers, args.writers, args.seconds)
+            for profile in ("default", "production")
+        ]
+
+    print(f"[INFO] {args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile")
+    for result in results:
+        report(result)
+    before, after = results
+    if before["reads"] and before["writes"]:
+        print(
+            f"  production vs default: reads x{len(after['reads']) / len(before['reads']):.2f}, "
+            f"writes x{len(after['writes']) / len(before['writes']):.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
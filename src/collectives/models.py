@@ -45,7 +45,8 @@ class CollectiveMembership(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    collective_id = Column(Integer, ForeignKey("collectives.id"), nullable=False)
+    # user_id lookups use uq_user_collective (it leads with user_id)
+    collective_id = Column(Integer, ForeignKey("collectives.id"), nullable=False, index=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
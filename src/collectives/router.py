@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, read_only
 from ..users.models import User
 from ..auth.deps import get_current_user, require_roles
 from . import models, schemas, services
@@ -15,12 +15,14 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.CollectiveOut])
+@read_only
 def list_collectives(db: Session = Depends(get_db)):
     collectives = db.query(models.Collective).all()
     return collectives
 
 
 @router.get("/with-stats", response_model=List[schemas.CollectiveWithStats])
+@read_only
 def list_collectives_with_stats(db: Session = Depends(get_db)):
     """
     Return all collectives plus member_count for each.
@@ -1,18 +1,25 @@
 # src/create_db.py
 
-from .database import Base, engine
+from .database import engine
 
 # Import all models so SQLAlchemy is aware of them
 from .users import models as user_models              # noqa: F401
+from .auth import models as auth_models                # noqa: F401
 from .collectives import models as collective_models  # noqa: F401
 from .suppliers import models as supplier_models      # noqa: F401
 from .procedures import models as procedure_models    # noqa: F401
 from .negotiations import models as negotiation_models  # noqa: F401
+from .migrations import models as migration_models      # noqa: F401
+from .procedures.search import search_backend
+from .migrate import upgrade
 
 
 def main():
-    print("Creating SQLite database...")
-    Base.metadata.create_all(bind=engine)
+    print(f"Creating {engine.dialect.name} database...")
+    # Tables, then whatever later revisions add (indexes, columns, the
+    # search index) that an existing database lacks
+    upgrade(engine)
+    print(f"Procedure search index: {search_backend(engine)}")
     print("Done.")
 
 
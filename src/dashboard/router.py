@@ -1,14 +1,16 @@
 # src/dashboard/router.py
 
 from fastapi import APIRouter, Depends
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
-from ..database import get_db
+from ..database import count_where, get_db, read_only
 from ..users import models as user_models
-from ..auth.deps import get_current_user, require_roles
+from ..auth.context import AuthContext
+from ..auth.deps import get_auth_context, require_roles
 from ..negotiations import models as negotiation_models
 from ..collectives import models as collective_models
 
@@ -20,24 +22,18 @@ router = APIRouter()
 
 
 @router.get("/me", summary="Generic dashboard for the logged-in user")
+@read_only
 def my_dashboard(
-    current_user: user_models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    ctx: AuthContext = Depends(get_auth_context),
 ):
-    # Find the first collective this user belongs to (if any)
-    membership = (
-        db.query(collective_models.CollectiveMembership)
-        .filter(collective_models.CollectiveMembership.user_id == current_user.id)
-        .first()
-    )
+    current_user = ctx.user
+
+    # The first collective this user belongs to (if any)
+    membership = ctx.membership
 
     collective_data = None
     if membership:
-        collective = (
-            db.query(collective_models.Collective)
-            .filter(collective_models.Collective.id == membership.collective_id)
-            .first()
-        )
+        collective = membership.collective
         if collective:
             collective_data = {
                 "id": collective.id,
@@ -62,6 +58,7 @@ def my_dashboard(
 
 
 @router.get("/member", summary="Member dashboard")
+@read_only
 def member_dashboard(
     # role enum values (from the 422 error): "Member", "Insurance Supplier",
     # "Healthcare Provider", "admin"
@@ -78,6 +75,7 @@ def member_dashboard(
 
 
 @router.get("/supplier", summary="Supplier dashboard (basic)")
+@read_only
 def supplier_dashboard(
     current_user: user_models.User = Depends(
         require_roles("Insurance Supplier", "Healthcare Provider", "admin")
@@ -92,6 +90,7 @@ def supplier_dashboard(
 
 
 @router.get("/admin", summary="Admin dashboard")
+@read_only
 def admin_dashboard(
     current_user: user_models.User = Depends(require_roles("admin")),
     db: Session = Depends(get_db),
@@ -137,10 +136,12 @@ class SupplierDashboardResponse(BaseModel):
     response_model=SupplierDashboardResponse,
     summary="Full provider portal negotiation dashboard",
 )
+@read_only
 def supplier_negotiation_dashboard(
     current_user: user_models.User = Depends(
         require_roles("Insurance Supplier", "Healthcare Provider", "admin")
     ),
+    ctx: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
 ):
     """
@@ -148,7 +149,7 @@ def supplier_negotiation_dashboard(
     Segmented into open vs closed for provider portal.
     """
 
-    supplier_id = current_user.id
+    supplier_id = ctx.supplier_id
 
     negotiations = (
         db.query(negotiation_models.Negotiation)
@@ -227,6 +228,7 @@ class PublicOverviewResponse(BaseModel):
     response_model=PublicOverviewResponse,
     summary="Public overview of collectives and participation",
 )
+@read_only
 def public_overview(db: Session = Depends(get_db)):
     """
     Public, unauthenticated overview for the splash page:
@@ -257,22 +259,16 @@ def public_overview(db: Session = Depends(get_db)):
             )
         )
 
-    # ---- Totals by role (using enum values we know) ----
-    total_members = (
-        db.query(user_models.User)
-        .filter(user_models.User.role == "Member")
-        .count()
-    )
-    total_insurers = (
-        db.query(user_models.User)
-        .filter(user_models.User.role == "Insurance Supplier")
-        .count()
-    )
-    total_providers = (
-        db.query(user_models.User)
-        .filter(user_models.User.role == "Healthcare Provider")
-        .count()
-    )
+    # ---- Totals by role (using enum values we know), one pass over users ----
+    role = user_models.User.role
+    bind = db.get_bind()
+    total_members, total_insurers, total_providers = db.execute(
+        select(
+            count_where(bind, role == "Member"),
+            count_where(bind, role == "Insurance Supplier"),
+            count_where(bind, role == "Healthcare Provider"),
+        ).where(role.in_(("Member", "Insurance Supplier", "Healthcare Provider")))
+    ).one()
 
     return PublicOverviewResponse(
         collectives=summaries,
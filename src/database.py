@@ -1,16 +1,120 @@
 # src/database.py
-from sqlalchemy import create_engine
+import threading
+import time
+
+from fastapi import Request
+from sqlalchemy import case, create_engine, event, func
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import StaticPool
 
 from .config import settings
 
-# SQLite engine – note connect_args is needed for SQLite
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {},
-    future=True,
-    echo=False,
-)
+
+# ---------------------------------------------------------------------------
+# Engine construction: SQLite pragmas and per-dialect pool settings
+# ---------------------------------------------------------------------------
+
+def normalize_database_url(url: str) -> str:
+    """
+    Postgres URLs without a driver ("postgres://...", "postgresql://...",
+    as hosting providers hand them out) use psycopg 3, which serves both
+    the sync and the async engine. An explicit driver is kept.
+    """
+    scheme, sep, rest = url.partition("://")
+    if sep and scheme in ("postgres", "postgresql"):
+        return f"postgresql+psycopg{sep}{rest}"
+    return url
+
+
+def _is_memory_sqlite(url) -> bool:
+    database = url.database or ""
+    return database in ("", ":memory:") or "mode=memory" in database or url.query.get("mode") == "memory"
+
+
+def sqlite_pragmas(profile: str) -> list[tuple[str, object]]:
+    """
+    PRAGMAs run on every new SQLite connection for `profile`.
+
+    "production": WAL, so readers keep going while a write commits and
+    a writer waits for readers only at checkpoints; synchronous=NORMAL,
+    which in WAL mode is still safe against corruption and only loses the
+    last commits on power loss; a larger page cache and memory-mapped
+    reads; temp tables in memory; and a busy timeout so a writer queued
+    behind another waits instead of failing with "database is locked".
+    "default": SQLite's own defaults (rollback journal, synchronous=FULL).
+    """
+    if profile != "production":
+        return []
+    return [
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("cache_size", -settings.SQLITE_CACHE_SIZE_KB),
+        ("mmap_size", settings.SQLITE_MMAP_SIZE_BYTES),
+        ("temp_store", "MEMORY"),
+        ("busy_timeout", settings.SQLITE_BUSY_TIMEOUT_MS),
+    ]
+
+
+def engine_options(url: str) -> dict:
+    """
+    create_engine() arguments for `url`, by dialect.
+
+    SQLite files get a QueuePool (the page cache is per connection, so
+    keeping connections open keeps it warm) and no pre-ping; in-memory
+    SQLite shares one connection, otherwise each thread would see its
+    own empty database. Server databases get a recycled QueuePool,
+    pre-pinged unless DB_POOL_PRE_PING is off (e.g. behind a pooler that
+    already checks its server connections).
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        options = {"connect_args": {"check_same_thread": False}}
+        if _is_memory_sqlite(parsed):
+            options["poolclass"] = StaticPool
+        else:
+            options["pool_size"] = settings.DB_POOL_SIZE
+            options["max_overflow"] = settings.DB_MAX_OVERFLOW
+        return options
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
+
+
+def apply_sqlite_profile(sync_engine, profile: str, read_only: bool = False) -> None:
+    """
+    Run the profile's PRAGMAs on every connection `sync_engine` opens.
+    Read-only connections skip journal_mode, which the writer sets (it is
+    stored in the database file).
+    """
+    pragmas = sqlite_pragmas(profile)
+    if read_only:
+        pragmas = [(name, value) for name, value in pragmas if name != "journal_mode"]
+    if sync_engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def build_engine(url: str, profile: str | None = None, read_only: bool = False):
+    url = normalize_database_url(url)
+    new_engine = create_engine(url, future=True, echo=False, **engine_options(url))
+    apply_sqlite_profile(new_engine, profile or settings.SQLITE_PROFILE, read_only)
+    return new_engine
+
+
+engine = build_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -22,13 +126,232 @@ SessionLocal = sessionmaker(
 Base = declarative_base()
 
 
-def get_db():
+# ---------------------------------------------------------------------------
+# Dialect fast paths
+# ---------------------------------------------------------------------------
+
+def upsert_insert(bind):
+    """
+    The dialect's insert() construct, which has on_conflict_do_update() /
+    on_conflict_do_nothing(), for SQLite and Postgres; None elsewhere
+    (callers fall back to select-then-insert).
+    """
+    dialect = bind.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert
+
+
+def count_where(bind, condition):
+    """
+    count(*) of the rows matching `condition`, as a column expression, so
+    several counts over one table come from a single scan:
+
+        db.execute(select(count_where(bind, User.role == "a"),
+                          count_where(bind, User.role == "b")))
+
+    Postgres and SQLite (3.30+) get count(*) FILTER (WHERE ...), other
+    dialects sum(CASE ...).
+    """
+    if bind.dialect.name in ("postgresql", "sqlite"):
+        return func.count().filter(condition)
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+# ---------------------------------------------------------------------------
+# Read/write routing: routes marked @read_only get a session from the reader
+# pool, everything else the primary
+# ---------------------------------------------------------------------------
+
+def read_url(url: str) -> str | None:
+    """
+    Where read-only sessions connect: DATABASE_READ_URL if set, otherwise
+    for a SQLite file the same file opened with mode=ro (a separate pool,
+    so readers never queue behind writers for a connection). None means
+    reads go to the primary.
+    """
+    if settings.DATABASE_READ_URL:
+        return settings.DATABASE_READ_URL
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or _is_memory_sqlite(parsed):
+        return None
+    if parsed.query.get("uri"):
+        return None  # already a URI filename; leave it to DATABASE_READ_URL
+    return f"sqlite:///file:{parsed.database}?mode=ro&uri=true"
+
+
+# Replica replay lag in seconds; 0 when it has replayed everything it
+# received, NULL on a primary
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+
+class ReplicaMonitor:
+    """
+    Whether the reader pool may be used right now.
+
+    For a Postgres replica, its replay lag is measured at most every
+    `check_every` seconds (by whichever request gets there first; the
+    others use the last answer). While the lag exceeds `max_lag`, or the
+    replica cannot be reached, reads go to the primary. Other readers
+    (SQLite mode=ro on the primary's own file) are always current.
+    """
+
+    def __init__(self, read_engine, max_lag: float, check_every: float):
+        self.read_engine = read_engine
+        self.max_lag = max_lag
+        self.check_every = check_every
+        self.checks_lag = read_engine.dialect.name == "postgresql"
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._usable = True
+        self.lag = 0.0
+        self.fallbacks = 0
+
+    def usable(self) -> bool:
+        if not self.checks_lag:
+            return True
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_every and self._lock.acquire(blocking=False):
+            try:
+                self._checked_at = now
+                self._usable = self._check()
+            finally:
+                self._lock.release()
+        if not self._usable:
+            self.fallbacks += 1
+        return self._usable
+
+    def _check(self) -> bool:
+        try:
+            with self.read_engine.connect() as conn:
+                lag = conn.exec_driver_sql(REPLICA_LAG_SQL).scalar()
+        except Exception as e:
+            print(f"[WARN] Read replica unavailable, reading from the primary: {e}")
+            return False
+        self.lag = float(lag or 0.0)
+        return self.lag <= self.max_lag
+
+    def stats(self) -> dict:
+        return {"usable": self._usable, "lag_seconds": self.lag, "fallbacks": self.fallbacks}
+
+
+def _refuse_writes(session, flush_context, instances):
+    raise RuntimeError("Read-only session: this route is marked @read_only but tried to write")
+
+
+_read_url = read_url(settings.DATABASE_URL)
+if _read_url is not None:
+    read_engine = build_engine(_read_url, read_only=True)
+    ReadSessionLocal = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=read_engine,
+        future=True,
+    )
+    event.listen(ReadSessionLocal, "before_flush", _refuse_writes)
+    replica_monitor = ReplicaMonitor(
+        read_engine,
+        max_lag=settings.DATABASE_REPLICA_MAX_LAG_SECONDS,
+        check_every=settings.DATABASE_REPLICA_CHECK_SECONDS,
+    )
+else:
+    read_engine = None
+    ReadSessionLocal = None
+    replica_monitor = None
+
+
+def read_only(endpoint):
+    """
+    Mark a route handler as read-only, so its get_db session (shared with
+    the auth dependencies) comes from the reader pool. Put it below the
+    route decorator:
+
+        @router.get("/")
+        @read_only
+        def list_things(db: Session = Depends(get_db)):
+            ...
+    """
+    endpoint.__read_only__ = True
+    return endpoint
+
+
+def _is_read_only_request(request: Request | None) -> bool:
+    if request is None:
+        return False
+    route = request.scope.get("route")
+    return getattr(getattr(route, "endpoint", None), "__read_only__", False)
+
+
+def get_db(request: Request = None):
     from sqlalchemy.orm import Session
-    db: Session = SessionLocal()
+    if ReadSessionLocal is not None and _is_read_only_request(request) and replica_monitor.usable():
+        db: Session = ReadSessionLocal()
+    else:
+        db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+# ---------------------------------------------------------------------------
+# Async engine (aiosqlite locally, psycopg 3 on Postgres), used by routers
+# that have been ported to `async def`; everything else stays on SessionLocal.
+# ---------------------------------------------------------------------------
+
+def async_database_url(url: str) -> str:
+    """
+    The async-driver form of a sync DATABASE_URL. psycopg 3 is async
+    capable, so Postgres keeps psycopg (or asyncpg, if asked for).
+    """
+    scheme, sep, rest = normalize_database_url(url).partition("://")
+    dialect, _, driver = scheme.partition("+")
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if dialect == "postgresql":
+        return f"postgresql+{driver if driver in ('psycopg', 'asyncpg') else 'psycopg'}{sep}{rest}"
+    return url
+
+
+try:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        async_database_url(settings.DATABASE_URL),
+        echo=False,
+        **engine_options(settings.DATABASE_URL),
+    )
+    apply_sqlite_profile(async_engine.sync_engine, settings.SQLITE_PROFILE)
+
+    # Same Session subclass as SessionLocal, so the flush/commit hooks
+    # registered on it (cache invalidation, token epochs) fire here too
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        expire_on_commit=False,
+        autoflush=False,
+        sync_session_class=SessionLocal.class_,
+    )
+except ImportError:  # aiosqlite / psycopg / greenlet not installed
+    async_engine = None
+    AsyncSessionLocal = None
+
+
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError(
+            "Async database driver not installed (pip install aiosqlite greenlet, or psycopg)"
+        )
+    async with AsyncSessionLocal() as db:
+        yield db
 # Ensure all models are registered with SQLAlchemy
 from src.users import models as user_models
 from src.collectives import models as collective_models
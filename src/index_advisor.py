@@ -0,0 +1,141 @@
+# src/index_advisor.py
+
+import argparse
+import json
+import re
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from .database import engine
+
+# SQLite plan lines: "SCAN users" is a full table scan; "SCAN users USING
+# INDEX ..." walks an index and "SEARCH ..." seeks one
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+_SQLITE_TEMP_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+
+def load_captured(path: str) -> list[tuple[str, object]]:
+    """
+    (statement, parameters) pairs written by sql_metrics (SQL_CAPTURE_FILE).
+    """
+    captured = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                params = entry.get("parameters")
+                captured.append((entry["statement"], tuple(params) if isinstance(params, list) else params))
+    return captured
+
+
+def explain_sqlite(conn: Connection, statement: str, params) -> tuple[list[str], list[str]]:
+    """
+    (fully scanned tables, notes) from EXPLAIN QUERY PLAN.
+    """
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, params or ()).all()
+    scans, notes = [], []
+    for row in rows:
+        detail = row[-1]
+        match = _SQLITE_FULL_SCAN.match(detail)
+        if match:
+            scans.append(match.group(1))
+        elif detail.startswith(_SQLITE_TEMP_SORT):
+            notes.append("sorts without an index")
+    return scans, notes
+
+
+def explain_postgres(conn: Connection, statement: str, params) -> tuple[list[str], list[str]]:
+    """
+    (sequentially scanned tables, notes) from EXPLAIN (FORMAT JSON).
+    """
+    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, params or ()).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    scans, notes = [], []
+
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan":
+            scans.append(node.get("Relation Name"))
+        elif node.get("Node Type") == "Sort":
+            notes.append("sorts without an index")
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return scans, notes
+
+
+def table_rows(conn: Connection, table: str, cache: dict) -> int:
+    """
+    Rows in `table`. On Postgres the planner's estimate (count(*) there
+    reads the whole table), unless the table has never been analyzed.
+    """
+    if table not in cache:
+        estimate = None
+        if conn.dialect.name == "postgresql":
+            estimate = conn.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table}
+            ).scalar()
+        if estimate is None or estimate < 0:
+            estimate = conn.execute(text(f'SELECT count(*) FROM "{table}"')).scalar()
+        cache[table] = estimate
+    return cache[table]
+
+
+def advise(captured: list[tuple[str, object]], min_rows: int) -> int:
+    """
+    EXPLAIN every captured statement and print the ones that scan a table
+    of at least `min_rows` rows. Returns how many were flagged.
+    """
+    explain = explain_postgres if engine.dialect.name == "postgresql" else explain_sqlite
+    flagged = 0
+    failed = 0
+    row_counts: dict[str, int] = {}
+
+    with engine.connect() as conn:
+        for statement, params in captured:
+            try:
+                scans, notes = explain(conn, statement, params)
+            except Exception as e:
+                conn.rollback()
+                failed += 1
+                print(f"[WARN] Could not explain: {' '.join(statement.split())[:100]} ({e.__class__.__name__})")
+                continue
+
+            big = [(t, table_rows(conn, t, row_counts)) for t in dict.fromkeys(scans)]
+            big = [(t, n) for t, n in big if n >= min_rows]
+            if not big:
+                if notes:
+                    print(f"[INFO] {notes[0].capitalize()}: {' '.join(statement.split())[:160]}")
+                continue
+            flagged += 1
+            tables = ", ".join(f"{t} ({n} rows)" for t, n in big)
+            print(f"[WARN] Full scan of {tables}{'; ' + ', '.join(dict.fromkeys(notes)) if notes else ''}")
+            print(f"       {' '.join(statement.split())[:300]}")
+
+    print(
+        f"[OK] Explained {len(captured) - failed} statements on {engine.dialect.name}: "
+        f"{flagged} scan a table of {min_rows}+ rows"
+    )
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="EXPLAIN captured queries (SQL_CAPTURE_FILE) and flag full table scans."
+    )
+    parser.add_argument("capture", help="JSON-lines file written with SQL_CAPTURE_FILE set")
+    parser.add_argument(
+        "--min-rows",
+        type=int,
+        default=1000,
+        help="ignore scans of tables smaller than this (default 1000); "
+        "run against a database with production-like volumes",
+    )
+    args = parser.parse_args()
+    advise(load_captured(args.capture), args.min_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 # src/main.py
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import JSONResponse
 
 from .config import settings
+from .auth.deps import require_roles
+from .auth.epochs import start_epochs, stop_epochs
+from .auth.hashing import HashingBusy, hashing_executor
+from .auth.keys import key_ring
+from .auth.revocation import start_revocations, stop_revocations
 from .auth.router import router as auth_router
 from .users.router import router as users_router
 from .collectives.router import router as collectives_router
@@ -11,6 +17,8 @@ from .surveys.router import router as surveys_router
 from .negotiations.router import router as negotiations_router
 from .suppliers.router import router as suppliers_router
 from .users.router_admin import router as admin_users_router
+from .sql_metrics import SQLMetricsMiddleware, sql_metrics
+from .migrate import pending as pending_migrations
 
 # --- Optional routers (won't crash if missing) ---
 try:
@@ -66,6 +74,10 @@ origins = [
 
 app.openapi = custom_openapi
 
+# SQL statement counts per request. Added before CORS, so it runs inside it
+if settings.SQL_METRICS_MODE != "off":
+    app.add_middleware(SQLMetricsMiddleware, headers=settings.SQL_METRICS_MODE == "headers")
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -73,6 +85,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-SQL-Count", "X-SQL-Time-Ms", "X-SQL-N-Plus-One"]
+    if settings.SQL_METRICS_MODE == "headers"
+    else [],
 )
 
 # Core routers
@@ -95,6 +110,84 @@ if dashboard_router:
     app.include_router(dashboard_router, prefix="/dashboard", tags=["dashboard"])
 
 
+@app.on_event("startup")
+def load_signing_keys():
+    # Fail at boot, not on the first login, if the key ring is misconfigured
+    ring = key_ring()
+    if ring is not None:
+        print(f"[INFO] Signing tokens with {ring.signing_kid} ({ring.signing_algorithm}), {len(ring.verifiers)} keys trusted")
+
+
+@app.on_event("startup")
+def check_schema():
+    # Deploys run `python -m src.migrate upgrade` before starting new code
+    waiting = pending_migrations()
+    if waiting:
+        print(
+            f"[WARN] {len(waiting)} schema migration(s) pending ({', '.join(r.name for r in waiting)}); "
+            "run python -m src.migrate upgrade"
+        )
+
+
+@app.on_event("startup")
+def load_token_epochs():
+    start_epochs()
+
+
+@app.on_event("shutdown")
+def unload_token_epochs():
+    stop_epochs()
+
+
+@app.on_event("startup")
+def load_token_revocations():
+    start_revocations()
+
+
+@app.on_event("shutdown")
+def unload_token_revocations():
+    stop_revocations()
+
+
+@app.on_event("startup")
+def start_password_hashing():
+    hashing_executor.start()
+
+
+@app.on_event("shutdown")
+def stop_password_hashing():
+    hashing_executor.stop()
+
+
+@app.exception_handler(HashingBusy)
+def hashing_busy_handler(request: Request, exc: HashingBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+if procedures_router:
+    from .procedures.catalog import start_catalog, stop_catalog
+
+    @app.on_event("startup")
+    def load_procedure_catalog():
+        start_catalog()
+
+    @app.on_event("shutdown")
+    def unload_procedure_catalog():
+        stop_catalog()
+
+
 @app.get("/health", tags=["system"])
 def health_check():
     return {"status": "ok", "service": "health_republic"}
+
+
+@app.get("/metrics/sql", tags=["system"])
+def sql_metrics_report(current_admin=Depends(require_roles("admin"))):
+    """
+    SQL statements and time per route since startup, with N+1 suspects.
+    """
+    return sql_metrics.snapshot()
@@ -0,0 +1,158 @@
+# src/migrate.py
+
+import argparse
+import importlib
+import pkgutil
+import sys
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Engine
+
+from .database import engine
+from .migrations import versions
+from .migrations.models import SchemaMigration
+from .migrations.ops import Operations
+
+# Postgres advisory lock held while migrating, so two deploys starting at
+# once apply each revision only once
+LOCK_KEY = 7245318001
+
+
+class Revision:
+    """
+    A module in src/migrations/versions named <number>_<slug>.py, with a
+    `description` and an `upgrade(op)` that works through
+    migrations.ops.Operations. Revisions run in name order.
+    """
+
+    def __init__(self, name: str, module):
+        self.name = name
+        self.module = module
+        self.description = getattr(module, "description", "")
+
+    def upgrade(self, op: Operations) -> None:
+        self.module.upgrade(op)
+
+
+def revisions() -> list[Revision]:
+    names = sorted(m.name for m in pkgutil.iter_modules(versions.__path__) if m.name[:1].isdigit())
+    return [Revision(name, importlib.import_module(f"{versions.__name__}.{name}")) for name in names]
+
+
+def applied(bind: Engine = engine) -> dict:
+    """
+    schema_migrations rows by revision; empty on a database that predates
+    migrations.
+    """
+    if not inspect(bind).has_table(SchemaMigration.__tablename__):
+        return {}
+    with bind.connect() as conn:
+        return {row.revision: row for row in conn.execute(select(SchemaMigration.__table__))}
+
+
+def pending(bind: Engine = engine) -> list[Revision]:
+    done = applied(bind)
+    return [r for r in revisions() if r.name not in done]
+
+
+@contextmanager
+def _migration_lock(bind: Engine):
+    if bind.dialect.name != "postgresql":
+        yield
+        return
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": LOCK_KEY}).scalar():
+            print("[INFO] Another migration is running; waiting for it")
+            conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": LOCK_KEY})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": LOCK_KEY})
+
+
+def upgrade(bind: Engine = engine, target: str | None = None) -> int:
+    """
+    Apply the pending revisions in order, up to and including `target`.
+    Each is recorded in schema_migrations once all its operations have
+    finished; one that fails can be re-run (operations are idempotent).
+    Returns how many were applied.
+    """
+    from . import create_db  # noqa: F401  (registers every model on Base)
+
+    names = [r.name for r in revisions()]
+    if target is not None and target not in names:
+        raise ValueError(f"Unknown revision {target!r}; known: {', '.join(names)}")
+
+    with _migration_lock(bind):
+        SchemaMigration.__table__.create(bind=bind, checkfirst=True)
+        # Read under the lock: a concurrent deploy may have applied some
+        todo = [r for r in pending(bind) if target is None or r.name <= target]
+        if not todo:
+            print("[OK] Schema is up to date")
+            return 0
+
+        started = time.perf_counter()
+        for revision in todo:
+            print(f"[INFO] Applying {revision.name}: {revision.description}")
+            revision_started = time.perf_counter()
+            try:
+                revision.upgrade(Operations(bind, revision.name))
+            except Exception:
+                print(
+                    f"[ERROR] {revision.name} failed after {time.perf_counter() - revision_started:.2f}s; "
+                    "fix the cause and re-run, finished operations are skipped"
+                )
+                raise
+            elapsed = time.perf_counter() - revision_started
+            with bind.begin() as conn:
+                conn.execute(
+                    SchemaMigration.__table__.insert().values(
+                        revision=revision.name,
+                        description=revision.description,
+                        duration_seconds=round(elapsed, 3),
+                    )
+                )
+            print(f"[OK] {revision.name} applied in {elapsed:.2f}s")
+
+    print(f"[OK] {len(todo)} revision(s) applied in {time.perf_counter() - started:.2f}s")
+    return len(todo)
+
+
+def status(bind: Engine = engine) -> None:
+    done = applied(bind)
+    for revision in revisions():
+        row = done.get(revision.name)
+        if row is None:
+            print(f"[INFO] {revision.name}  pending  {revision.description}")
+        else:
+            print(
+                f"[OK] {revision.name}  applied {row.applied_at:%Y-%m-%d %H:%M} "
+                f"in {row.duration_seconds:.2f}s  {revision.description}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Schema migrations. Run `upgrade` as a pre-deploy step: revisions build "
+        "indexes and rewrite tables online, so the running version keeps serving."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="apply pending revisions")
+    upgrade_parser.add_argument("--to", help="stop after this revision")
+    commands.add_parser("status", help="list applied and pending revisions")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        status(engine)
+        return
+    try:
+        upgrade(engine, args.to)
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
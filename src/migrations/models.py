@@ -0,0 +1,20 @@
+# src/migrations/models.py
+
+from sqlalchemy import Column, DateTime, Float, String
+from sqlalchemy.sql import func
+
+from ..database import Base
+
+
+class SchemaMigration(Base):
+    """
+    One applied revision (src/migrations/versions/<revision>.py). A
+    revision is recorded only after all of its operations finished.
+    """
+
+    __tablename__ = "schema_migrations"
+
+    revision = Column(String, primary_key=True)
+    description = Column(String, nullable=True)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    duration_seconds = Column(Float, nullable=False)
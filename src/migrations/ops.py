@@ -0,0 +1,416 @@
+# src/migrations/ops.py
+
+import threading
+import time
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+
+from ..config import settings
+from ..database import Base
+
+# Postgres DDL that needs an exclusive lock gives up after
+# MIGRATION_LOCK_TIMEOUT_MS and is retried this many times, instead of
+# waiting behind a long transaction while every query queues behind it
+LOCK_RETRIES = 5
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def missing_indexes(bind: Engine) -> list:
+    """
+    Indexes declared on the models that an existing database lacks.
+    Tables that do not exist yet are skipped; create_all makes them whole.
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        missing.extend(ix for ix in sorted(table.indexes, key=lambda ix: ix.name) if ix.name not in present)
+    return missing
+
+
+class Progress:
+    """
+    "done/total" lines for a long operation, at most every
+    MIGRATION_PROGRESS_SECONDS.
+    """
+
+    def __init__(self, log, label: str, total: int, unit: str = "rows"):
+        self.log = log
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.started = self._reported = time.perf_counter()
+
+    def update(self, done: int) -> None:
+        now = time.perf_counter()
+        if now - self._reported < settings.MIGRATION_PROGRESS_SECONDS:
+            return
+        self._reported = now
+        share = f" ({done / self.total:.0%})" if self.total else ""
+        self.log(f"{self.label}: {done:,}/{self.total:,} {self.unit}{share}, {now - self.started:.1f}s")
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+class Operations:
+    """
+    What a revision's upgrade(op) does its work through.
+
+    Every operation is idempotent, so a revision that failed half way is
+    finished by running it again, and commits its own work in short
+    transactions so the app keeps serving while it runs:
+
+    - Postgres builds indexes CONCURRENTLY and runs other DDL under a lock
+      timeout (retried), so it never sits in the lock queue in front of
+      the app's queries.
+    - SQLite (WAL) never blocks readers; writers wait (busy_timeout) only
+      for one batch or statement at a time.
+
+    New databases get the current schema from create_all() in the
+    baseline revision, after which later revisions find their work done.
+    """
+
+    def __init__(self, bind: Engine, revision: str):
+        self.bind = bind
+        self.revision = revision
+        self.dialect = bind.dialect.name
+        self.batch_size = settings.MIGRATION_BATCH_SIZE
+
+    def log(self, message: str) -> None:
+        print(f"[INFO] {self.revision}: {message}")
+
+    def _q(self, name: str) -> str:
+        return self.bind.dialect.identifier_preparer.quote(name)
+
+    def _autocommit(self):
+        return self.bind.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+    def _run_locked(self, sql: str, params: dict | None = None) -> None:
+        if self.dialect != "postgresql":
+            with self.bind.begin() as conn:
+                conn.execute(text(sql), params or {})
+            return
+        for attempt in range(1, LOCK_RETRIES + 1):
+            try:
+                with self.bind.begin() as conn:
+                    conn.exec_driver_sql(f"SET LOCAL lock_timeout = {int(settings.MIGRATION_LOCK_TIMEOUT_MS)}")
+                    conn.execute(text(sql), params or {})
+                return
+            except OperationalError as e:
+                if getattr(e.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE or attempt == LOCK_RETRIES:
+                    raise
+                self.log(f"lock not available, retrying ({attempt}/{LOCK_RETRIES - 1})")
+                time.sleep(attempt)
+
+    def _integer_pk(self, table: str) -> str:
+        columns = inspect(self.bind).get_pk_constraint(table)["constrained_columns"]
+        if len(columns) != 1:
+            raise ValueError(f"{table}: batched operations need a single-column integer primary key")
+        return columns[0]
+
+    # ------------------------------------------------------------------
+    # Statements and tables
+    # ------------------------------------------------------------------
+
+    def execute(self, sql: str, params: dict | None = None) -> None:
+        """
+        One statement in its own transaction (Postgres: under the lock
+        timeout). The statement itself must be safe to run twice, e.g.
+        ALTER TABLE ... ADD CONSTRAINT guarded by IF NOT EXISTS.
+        """
+        started = time.perf_counter()
+        self._run_locked(sql, params)
+        self.log(f"{' '.join(sql.split())[:100]} ({time.perf_counter() - started:.2f}s)")
+
+    def create_all(self) -> None:
+        """
+        Create the tables the models declare that the database lacks.
+        """
+        existing = set(inspect(self.bind).get_table_names())
+        missing = [t for t in Base.metadata.sorted_tables if t.name not in existing]
+        started = time.perf_counter()
+        Base.metadata.create_all(bind=self.bind, tables=missing)
+        for table in missing:
+            self.log(f"created table {table.name}")
+        if missing:
+            self.log(f"{len(missing)} tables created in {time.perf_counter() - started:.2f}s")
+
+    def add_column(self, table: str, column) -> None:
+        """
+        ALTER TABLE ... ADD COLUMN for a Column built like the model's
+        (same name, type, nullability, server_default). Postgres 11+ adds a
+        nullable column, or one with a constant default, without rewriting
+        the table; a NOT NULL column needs a server_default on SQLite.
+        Fill it afterwards with backfill().
+        """
+        if column.name in {c["name"] for c in inspect(self.bind).get_columns(table)}:
+            self.log(f"{table}.{column.name} already exists")
+            return
+        spec = CreateColumn(column).compile(dialect=self.bind.dialect)
+        self.execute(f"ALTER TABLE {self._q(table)} ADD COLUMN {spec}")
+
+    # ------------------------------------------------------------------
+    # Indexes
+    # ------------------------------------------------------------------
+
+    def create_index(
+        self,
+        name: str,
+        table: str,
+        columns: list[str],
+        unique: bool = False,
+        using: str | None = None,
+    ) -> None:
+        """
+        Build an index without blocking writes:
+
+            op.create_index("ix_negotiations_status", "negotiations", ["status"])
+            op.create_index("ix_procedures_code_trgm", "procedures", ["code gin_trgm_ops"], using="gin")
+
+        `columns` are column names, or SQL expressions (anything that is not
+        a plain name) used as written. Postgres: CREATE INDEX CONCURRENTLY,
+        outside any transaction, with progress from
+        pg_stat_progress_create_index; an invalid index left by an earlier
+        failed build is dropped and rebuilt. SQLite: a plain build; WAL
+        readers carry on, writers wait for it.
+        """
+        ddl = "CREATE {unique}INDEX {concurrently}{name} ON {table} {using}({columns})".format(
+            unique="UNIQUE " if unique else "",
+            concurrently="CONCURRENTLY " if self.dialect == "postgresql" else "",
+            name=self._q(name),
+            table=self._q(table),
+            using=f"USING {using} " if using else "",
+            columns=", ".join(self._q(c) if c.isidentifier() else c for c in columns),
+        )
+        started = time.perf_counter()
+        if self.dialect == "postgresql":
+            valid = self._pg_index_valid(name)
+            if valid:
+                self.log(f"index {name} already exists")
+                return
+            if valid is False:
+                self.log(f"dropping invalid index {name} left by a failed build")
+                self._pg_drop_index(name)
+            self._pg_build_index(ddl, name)
+        else:
+            if name in {ix["name"] for ix in inspect(self.bind).get_indexes(table)}:
+                self.log(f"index {name} already exists")
+                return
+            with self.bind.begin() as conn:
+                conn.exec_driver_sql(ddl)
+        self.log(f"created index {name} ON {table} ({', '.join(columns)}) in {time.perf_counter() - started:.2f}s")
+
+    def create_missing_indexes(self) -> None:
+        """
+        create_index() for every index the models declare that the
+        database lacks.
+        """
+        missing = missing_indexes(self.bind)
+        for index in missing:
+            self.create_index(index.name, index.table.name, [c.name for c in index.columns], unique=index.unique)
+        if not missing:
+            self.log("all model indexes present")
+
+    def _pg_index_valid(self, name: str) -> bool | None:
+        with self.bind.connect() as conn:
+            return conn.execute(
+                text(
+                    "SELECT i.indisvalid FROM pg_index i "
+                    "WHERE i.indexrelid = to_regclass(:name)"
+                ),
+                {"name": self._q(name)},
+            ).scalar()
+
+    def _pg_drop_index(self, name: str) -> None:
+        with self._autocommit() as conn:
+            conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {self._q(name)}")
+
+    def _pg_build_index(self, ddl: str, name: str) -> None:
+        with self._autocommit() as conn:
+            pid = conn.exec_driver_sql("SELECT pg_backend_pid()").scalar()
+            stop = threading.Event()
+            watcher = threading.Thread(target=self._watch_index_build, args=(pid, name, stop), daemon=True)
+            watcher.start()
+            try:
+                conn.exec_driver_sql(ddl)
+            except Exception:
+                # A failed concurrent build leaves an INVALID index behind
+                self._pg_drop_index(name)
+                raise
+            finally:
+                stop.set()
+                watcher.join()
+
+    def _watch_index_build(self, pid: int, name: str, stop: threading.Event) -> None:
+        while not stop.wait(settings.MIGRATION_PROGRESS_SECONDS):
+            try:
+                with self.bind.connect() as conn:
+                    row = conn.execute(
+                        text(
+                            "SELECT phase, blocks_done, blocks_total, tuples_done, tuples_total "
+                            "FROM pg_stat_progress_create_index WHERE pid = :pid"
+                        ),
+                        {"pid": pid},
+                    ).first()
+            except Exception:
+                return
+            if row is None:
+                continue
+            phase, blocks_done, blocks_total, tuples_done, tuples_total = row
+            done, total = (tuples_done, tuples_total) if tuples_total else (blocks_done, blocks_total)
+            self.log(f"index {name}: {phase}" + (f" {done / total:.0%}" if total else ""))
+
+    # ------------------------------------------------------------------
+    # Batched data changes
+    # ------------------------------------------------------------------
+
+    def backfill(self, table: str, assignments: str, where: str | None = None) -> None:
+        """
+        UPDATE table SET assignments [WHERE where], in primary-key ranges
+        of MIGRATION_BATCH_SIZE ids, one transaction each, e.g. to fill a
+        denormalized counter:
+
+            op.backfill(
+                "collectives",
+                "member_count = (SELECT count(*) FROM collective_memberships m"
+                " WHERE m.collective_id = collectives.id)",
+            )
+        """
+        pk = self._q(self._integer_pk(table))
+        quoted = self._q(table)
+        with self.bind.connect() as conn:
+            low, high = conn.exec_driver_sql(f"SELECT min({pk}), max({pk}) FROM {quoted}").one()
+        if low is None:
+            self.log(f"{table} is empty, nothing to backfill")
+            return
+
+        sql = f"UPDATE {quoted} SET {assignments} WHERE {pk} >= :start AND {pk} < :end"
+        if where:
+            sql += f" AND ({where})"
+        progress = Progress(self.log, f"backfill {table}", high - low + 1, unit="ids")
+        updated = 0
+        for start in range(low, high + 1, self.batch_size):
+            end = start + self.batch_size
+            with self.bind.begin() as conn:
+                updated += conn.execute(text(sql), {"start": start, "end": end}).rowcount
+            progress.update(min(end, high + 1) - low)
+        self.log(f"backfilled {updated:,} rows of {table} in {progress.elapsed:.2f}s")
+
+    def rebuild_table(self, table) -> None:
+        """
+        SQLite: rebuild `table` (a model's Table) into its declared shape,
+        for changes its ALTER TABLE cannot make (dropping or retyping a
+        column, adding a constraint), while the app keeps writing to it:
+
+        1. create _rebuild_<name> from the model, with triggers mirroring
+           every insert, update and delete on the live table into it;
+        2. copy the existing rows in primary-key batches (INSERT OR IGNORE:
+           a row a trigger already copied is newer);
+        3. in one write transaction, drop the triggers and the old table,
+           rename the new one into place, build its indexes and recreate
+           the table's own triggers (e.g. the procedures_fts sync triggers),
+           which DROP TABLE removes.
+
+        Columns present in both are copied; new ones get their defaults. A
+        trigger that names a dropped column fails to recreate and rolls the
+        swap back, leaving the old table in place.
+        Postgres can make these changes in place: use add_column() or
+        execute("ALTER TABLE ...") there.
+        """
+        if self.dialect != "sqlite":
+            raise RuntimeError(f"rebuild_table() is for SQLite; use ALTER TABLE on {self.dialect}")
+
+        name, tmp = table.name, f"_rebuild_{table.name}"
+        inspector = inspect(self.bind)
+        if name not in inspector.get_table_names():
+            table.create(bind=self.bind)
+            self.log(f"created table {name}")
+            return
+
+        existing = {c["name"] for c in inspector.get_columns(name)}
+        columns = [c.name for c in table.columns if c.name in existing]
+        pk = self._integer_pk(name)
+        if pk not in columns:
+            raise ValueError(f"{name}: the rebuilt table must keep its primary key {pk}")
+
+        q = self._q
+        column_list = ", ".join(q(c) for c in columns)
+        new_values = ", ".join(f"NEW.{q(c)}" for c in columns)
+        create = str(CreateTable(table).compile(dialect=self.bind.dialect)).strip()
+        create = f"CREATE TABLE {q(tmp)} " + create[len(f"CREATE TABLE {q(name)} "):]
+        triggers = {
+            f"{tmp}_insert": f"AFTER INSERT ON {q(name)} BEGIN "
+            f"INSERT OR REPLACE INTO {q(tmp)} ({column_list}) VALUES ({new_values}); END",
+            f"{tmp}_update": f"AFTER UPDATE ON {q(name)} BEGIN "
+            f"DELETE FROM {q(tmp)} WHERE {q(pk)} = OLD.{q(pk)}; "
+            f"INSERT OR REPLACE INTO {q(tmp)} ({column_list}) VALUES ({new_values}); END",
+            f"{tmp}_delete": f"AFTER DELETE ON {q(name)} BEGIN "
+            f"DELETE FROM {q(tmp)} WHERE {q(pk)} = OLD.{q(pk)}; END",
+        }
+
+        with self._autocommit() as conn:
+            # Leftovers of an interrupted rebuild: start over
+            for trigger in triggers:
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {q(trigger)}")
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {q(tmp)}")
+
+            conn.exec_driver_sql(create)
+            for trigger, body in triggers.items():
+                conn.exec_driver_sql(f"CREATE TRIGGER {q(trigger)} {body}")
+
+            total = conn.exec_driver_sql(f"SELECT count(*) FROM {q(name)}").scalar()
+            progress = Progress(self.log, f"rebuild {name}", total)
+            copied, last = 0, None
+            while True:
+                after = "" if last is None else f"WHERE {q(pk)} > {int(last)}"
+                batch_last, batch_rows = conn.exec_driver_sql(
+                    f"SELECT max({q(pk)}), count(*) FROM "
+                    f"(SELECT {q(pk)} FROM {q(name)} {after} ORDER BY {q(pk)} LIMIT {int(self.batch_size)})"
+                ).one()
+                if batch_last is None:
+                    break
+                in_batch = f"{q(pk)} <= {int(batch_last)}" + ("" if last is None else f" AND {q(pk)} > {int(last)}")
+                conn.exec_driver_sql(
+                    f"INSERT OR IGNORE INTO {q(tmp)} ({column_list}) "
+                    f"SELECT {column_list} FROM {q(name)} WHERE {in_batch}"
+                )
+                copied += batch_rows
+                last = batch_last
+                progress.update(copied)
+            self.log(f"copied {copied:,} rows of {name} in {progress.elapsed:.2f}s")
+
+            swap_started = time.perf_counter()
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                # Read under the write lock, so none can be added before the drop
+                own_triggers = [
+                    (trigger, sql)
+                    for trigger, sql in conn.exec_driver_sql(
+                        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?",
+                        (name,),
+                    )
+                    if trigger not in triggers
+                ]
+                for trigger in triggers:
+                    conn.exec_driver_sql(f"DROP TRIGGER {q(trigger)}")
+                conn.exec_driver_sql(f"DROP TABLE {q(name)}")
+                conn.exec_driver_sql(f"ALTER TABLE {q(tmp)} RENAME TO {q(name)}")
+                for index in table.indexes:
+                    conn.exec_driver_sql(str(CreateIndex(index).compile(dialect=self.bind.dialect)))
+                for _, sql in own_triggers:
+                    conn.exec_driver_sql(sql)
+                conn.exec_driver_sql("COMMIT")
+            except Exception:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+            self.log(f"swapped in rebuilt {name} (write lock held {time.perf_counter() - swap_started:.2f}s)")
+            for trigger, _ in own_triggers:
+                self.log(f"recreated trigger {trigger} on {name}")
@@ -0,0 +1,7 @@
+# src/migrations/versions/0001_baseline.py
+
+description = "Tables declared on the models (databases from before migrations already have them)"
+
+
+def upgrade(op):
+    op.create_all()
@@ -0,0 +1,10 @@
+# src/migrations/versions/0002_model_indexes.py
+
+description = (
+    "Model indexes older databases lack: negotiations (supplier_id, updated_at), "
+    "collective_id on memberships and supplier bids, users.role"
+)
+
+
+def upgrade(op):
+    op.create_missing_indexes()
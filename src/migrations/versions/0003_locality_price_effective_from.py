@@ -0,0 +1,10 @@
+# src/migrations/versions/0003_locality_price_effective_from.py
+
+from sqlalchemy import Column, Date
+
+description = "procedure_locality_prices.effective_from, so older or future PFS loads keep current prices"
+
+
+def upgrade(op):
+    # Existing rows stay NULL: any dated load that is in effect replaces them
+    op.add_column("procedure_locality_prices", Column("effective_from", Date, nullable=True))
@@ -0,0 +1,65 @@
+# src/migrations/versions/0004_search_index.py
+
+from sqlalchemy.exc import DBAPIError
+
+description = "Procedure search index: FTS5 table and sync triggers (SQLite), pg_trgm GIN indexes (Postgres)"
+
+# External-content FTS5 table over procedures, maintained by triggers, so
+# bulk upserts keep it current inside the same transaction
+SQLITE_FTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS procedures_fts USING fts5(
+        code, description,
+        content='procedures', content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS procedures_fts_ai AFTER INSERT ON procedures BEGIN
+        INSERT INTO procedures_fts(rowid, code, description)
+        VALUES (new.id, new.code, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS procedures_fts_ad AFTER DELETE ON procedures BEGIN
+        INSERT INTO procedures_fts(procedures_fts, rowid, code, description)
+        VALUES ('delete', old.id, old.code, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS procedures_fts_au AFTER UPDATE OF code, description ON procedures
+    WHEN old.code IS NOT new.code OR old.description IS NOT new.description BEGIN
+        INSERT INTO procedures_fts(procedures_fts, rowid, code, description)
+        VALUES ('delete', old.id, old.code, old.description);
+        INSERT INTO procedures_fts(rowid, code, description)
+        VALUES (new.id, new.code, new.description);
+    END
+    """,
+    # Index whatever was imported before the triggers existed
+    "INSERT INTO procedures_fts(procedures_fts) VALUES ('rebuild')",
+]
+
+# Ordinary GIN indexes, so they never drift from the table
+POSTGRES_INDEXES = [
+    ("ix_procedures_code_trgm", "code gin_trgm_ops"),
+    ("ix_procedures_description_trgm", "description gin_trgm_ops"),
+    ("ix_procedures_description_tsv", "to_tsvector('simple', description)"),
+]
+
+
+def upgrade(op):
+    # Without FTS5/trigram support or the rights to create pg_trgm, search
+    # runs in-process (procedures.search.search_backend reports "memory")
+    try:
+        if op.dialect == "sqlite":
+            for ddl in SQLITE_FTS:
+                op.execute(ddl)
+        elif op.dialect == "postgresql":
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DBAPIError as e:
+        print(f"[WARN] {op.revision}: search index unavailable ({e.orig}); using in-process search")
+        return
+
+    if op.dialect == "postgresql":
+        for name, expression in POSTGRES_INDEXES:
+            op.create_index(name, "procedures", [expression], using="gin")
@@ -9,6 +9,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
 )
 from sqlalchemy.orm import relationship
 
@@ -64,6 +65,11 @@ class Negotiation(Base):
         order_by="NegotiationMessage.created_at",
     )
 
+    __table_args__ = (
+        # Supplier dashboard: WHERE supplier_id = ? ORDER BY updated_at DESC
+        Index("ix_negotiations_supplier_id_updated_at", "supplier_id", "updated_at"),
+    )
+
 
 class NegotiationRound(Base):
     __tablename__ = "negotiation_rounds"
@@ -4,12 +4,15 @@ from datetime import datetime
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
 
-from ..database import get_db
+from ..config import settings
+from ..database import get_db, read_only
 from ..users import models as user_models
-from ..auth.deps import get_current_user, require_roles
-from ..collectives import models as collective_models
+from ..auth.context import AuthContext
+from ..auth.deps import get_auth_context, get_current_user, require_roles
 from . import models, schemas
 from .strategy import evaluate_offer_against_target
 
@@ -79,8 +82,9 @@ def start_negotiation(
 
 
 @router.get("/", response_model=List[schemas.NegotiationOut])
+@read_only
 def list_negotiations(
-    current_user: user_models.User = Depends(get_current_user),
+    ctx: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
 ):
     """
@@ -91,21 +95,41 @@ def list_negotiations(
 
     This is a general endpoint; the member dashboard should use /negotiations/my.
     """
-    role = (current_user.role or "").lower()
-    if role not in {"member", "supplier", "admin"}:
+    if not ctx.has_role("member", "supplier", "admin"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Insufficient permissions",
         )
 
-    negotiations = db.query(models.Negotiation).order_by(models.Negotiation.id).all()
-    return negotiations
+    # Streamed like /admin/users/export: read in DB_STREAM_BATCH_SIZE batches
+    # (a server-side cursor on Postgres), each batch's rounds and messages
+    # with one query apiece, and each batch written out as JSON before the
+    # next is read. The session stays open until the body has been sent.
+    negotiations = db.scalars(
+        select(models.Negotiation)
+        .options(selectinload(models.Negotiation.rounds), selectinload(models.Negotiation.messages))
+        .order_by(models.Negotiation.id)
+        .execution_options(yield_per=settings.DB_STREAM_BATCH_SIZE)
+    )
+
+    def body():
+        separator = "["
+        for batch in negotiations.partitions():
+            yield separator + ",".join(
+                schemas.NegotiationOut.model_validate(n).model_dump_json() for n in batch
+            )
+            separator = ","
+        yield "[]" if separator == "[" else "]"
+
+    return StreamingResponse(body(), media_type="application/json")
 
 
 @router.get("/my", response_model=List[schemas.NegotiationOut])
+@read_only
 def list_my_negotiations(
     db: Session = Depends(get_db),
     current_user: user_models.User = Depends(require_roles("member", "admin")),
+    ctx: AuthContext = Depends(get_auth_context),
 ):
     """
     Return negotiations relevant to the current member/admin.
@@ -114,11 +138,7 @@ def list_my_negotiations(
     - If the user is not in any collective -> 403 Insufficient permissions
     - If in a collective -> negotiations for that collective
     """
-    membership = (
-        db.query(collective_models.CollectiveMembership)
-        .filter(collective_models.CollectiveMembership.user_id == current_user.id)
-        .first()
-    )
+    membership = ctx.membership
 
     if not membership:
         raise HTTPException(
@@ -137,6 +157,7 @@ def list_my_negotiations(
 
 
 @router.get("/{negotiation_id}", response_model=schemas.NegotiationOut)
+@read_only
 def get_negotiation(
     negotiation_id: int,
     db: Session = Depends(get_db),
@@ -0,0 +1,168 @@
+# src/pg_cluster.py
+
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+DATABASE = "health_republic"
+
+# Durability is pointless for a cluster that is deleted afterwards
+FAST_SETTINGS = ("fsync=off", "synchronous_commit=off", "full_page_writes=off")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _find(program: str, pg_bin: str | None) -> str | None:
+    if pg_bin:
+        path = os.path.join(pg_bin, program)
+        return path if os.path.exists(path) else None
+    return shutil.which(program)
+
+
+def _wait_until_ready(url: str, timeout: float) -> None:
+    import psycopg
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            psycopg.connect(url, connect_timeout=2).close()
+            return
+        except psycopg.OperationalError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+class TempCluster:
+    """
+    A throwaway Postgres server on 127.0.0.1 for running the app, scripts or
+    tests against Postgres: an initdb'd cluster under a temp directory when
+    initdb/pg_ctl are available (PATH or --pg-bin), otherwise a postgres
+    container. Trust auth, no fsync; everything is removed on stop().
+    """
+
+    def __init__(self, port: int | None = None, pg_bin: str | None = None, image: str = "postgres:16"):
+        self.port = port or _free_port()
+        self.pg_bin = pg_bin
+        self.image = image
+        self.datadir: str | None = None
+        self.container: str | None = None
+
+    @property
+    def url(self) -> str:
+        return f"postgresql+psycopg://postgres@127.0.0.1:{self.port}/{DATABASE}"
+
+    def start(self) -> "TempCluster":
+        initdb, pg_ctl = _find("initdb", self.pg_bin), _find("pg_ctl", self.pg_bin)
+        if initdb and pg_ctl:
+            self._start_local(initdb, pg_ctl)
+        elif shutil.which("docker"):
+            self._start_container()
+        else:
+            raise RuntimeError("Neither initdb/pg_ctl (set --pg-bin) nor docker found")
+        return self
+
+    def _start_local(self, initdb: str, pg_ctl: str) -> None:
+        if hasattr(os, "geteuid") and os.geteuid() == 0:
+            raise RuntimeError("initdb refuses to run as root; run as an unprivileged user or use docker")
+        self.datadir = tempfile.mkdtemp(prefix="hr-pg-")
+        subprocess.run(
+            [initdb, "-D", self.datadir, "-U", "postgres", "-A", "trust", "-E", "UTF8", "--no-sync"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        options = f"-p {self.port} -k {self.datadir} -c listen_addresses=127.0.0.1"
+        options += "".join(f" -c {setting}" for setting in FAST_SETTINGS)
+        subprocess.run(
+            [pg_ctl, "-D", self.datadir, "-l", os.path.join(self.datadir, "server.log"), "-o", options, "-w", "start"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        import psycopg
+
+        with psycopg.connect(f"postgresql://postgres@127.0.0.1:{self.port}/postgres", autocommit=True) as conn:
+            conn.execute(f"CREATE DATABASE {DATABASE}")
+
+    def _start_container(self) -> None:
+        command = [
+            "docker", "run", "-d", "--rm",
+            "-p", f"127.0.0.1:{self.port}:5432",
+            "-e", "POSTGRES_HOST_AUTH_METHOD=trust",
+            "-e", f"POSTGRES_DB={DATABASE}",
+            self.image,
+        ]
+        for setting in FAST_SETTINGS:
+            command += ["-c", setting]
+        self.container = subprocess.run(command, check=True, capture_output=True, text=True).stdout.strip()
+        # The image restarts the server once after initializing; wait it out
+        _wait_until_ready(self.url.replace("+psycopg", ""), timeout=60)
+
+    def stop(self) -> None:
+        if self.datadir:
+            subprocess.run(
+                [_find("pg_ctl", self.pg_bin), "-D", self.datadir, "-m", "immediate", "stop"],
+                stdout=subprocess.DEVNULL,
+            )
+            shutil.rmtree(self.datadir, ignore_errors=True)
+            self.datadir = None
+        if self.container:
+            subprocess.run(["docker", "stop", self.container], stdout=subprocess.DEVNULL)
+            self.container = None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a command against a throwaway Postgres (DATABASE_URL set, schema created), "
+        "e.g.: python -m src.pg_cluster -- python -m src.migrate status"
+    )
+    parser.add_argument("--pg-bin", help="directory with initdb and pg_ctl (default: PATH)")
+    parser.add_argument("--port", type=int, help="port to listen on (default: a free one)")
+    parser.add_argument("--image", default="postgres:16", help="image when falling back to docker")
+    parser.add_argument("--no-schema", action="store_true", help="skip python -m src.create_db")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="command to run (default: wait for Ctrl-C)")
+    args = parser.parse_args()
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+
+    cluster = TempCluster(port=args.port, pg_bin=args.pg_bin, image=args.image)
+    started = time.perf_counter()
+    try:
+        cluster.start()
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"[ERROR] Could not start Postgres: {e}")
+        cluster.stop()
+        sys.exit(1)
+    print(f"[OK] Postgres up in {time.perf_counter() - started:.1f}s: DATABASE_URL={cluster.url}")
+
+    env = {**os.environ, "DATABASE_URL": cluster.url}
+    env.pop("DATABASE_READ_URL", None)
+    returncode = 0
+    try:
+        if not args.no_schema:
+            subprocess.run([sys.executable, "-m", "src.create_db"], env=env, check=True)
+        if command:
+            returncode = subprocess.run(command, env=env).returncode
+        else:
+            print("[INFO] Ctrl-C to stop and delete the cluster")
+            while True:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    except subprocess.CalledProcessError as e:
+        returncode = e.returncode
+    finally:
+        cluster.stop()
+        print("[OK] Postgres stopped and removed")
+    sys.exit(returncode)
+
+
+if __name__ == "__main__":
+    main()
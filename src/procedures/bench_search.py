@@ -0,0 +1,86 @@
+# src/procedures/bench_search.py
+
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from . import models
+from .search import search_backend, search_procedures
+
+
+def sample_queries(db: Session, count: int, seed: int = 0) -> list[str]:
+    """
+    A mix of what the search box sends: exact codes, code prefixes while
+    typing, and one or two description words.
+    """
+    rows = db.execute(select(models.Procedure.code, models.Procedure.description)).all()
+    if not rows:
+        return []
+
+    rnd = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        code, description = rnd.choice(rows)
+        words = description.split() or [code]
+        kind = rnd.random()
+        if kind < 0.25:
+            queries.append(code)
+        elif kind < 0.5:
+            queries.append(code[: rnd.randint(1, len(code))])
+        elif kind < 0.8:
+            queries.append(rnd.choice(words)[:5])
+        else:
+            queries.append(" ".join(rnd.sample(words, min(2, len(words)))))
+    return queries
+
+
+def run(count: int, limit: int, backend: str | None) -> None:
+    db: Session = SessionLocal()
+    try:
+        backend = backend or search_backend(db.get_bind())
+        queries = sample_queries(db, count)
+        if not queries:
+            print("[ERROR] No procedures to search; import a fee schedule first.")
+            return
+
+        # Warm-up (builds the in-process index if that backend is used)
+        search_procedures(db, queries[0], limit, backend=backend)
+
+        timings = []
+        for q in queries:
+            started = time.perf_counter()
+            search_procedures(db, q, limit, backend=backend)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        cuts = statistics.quantiles(timings, n=100)
+        print(f"[OK] {len(queries)} searches, backend={backend}, limit={limit}")
+        print(f"  p50: {cuts[49]:.2f} ms")
+        print(f"  p95: {cuts[94]:.2f} ms")
+        print(f"  p99: {cuts[98]:.2f} ms")
+        print(f"  max: {max(timings):.2f} ms")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure /procedures search latency against the current database."
+    )
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument(
+        "--backend",
+        choices=["fts5", "pg_trgm", "memory"],
+        help="Force a search backend (default: whatever the database supports)",
+    )
+    args = parser.parse_args()
+    run(args.queries, args.limit, args.backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+# src/procedures/bulk.py
+
+import time
+from datetime import date
+from typing import Callable
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..database import upsert_insert
+from . import models
+from .fee_schedules import refresh_current_costs, write_versions
+from .localities import LocalityPriceBuffer
+
+
+BATCH_SIZE = 20000  # distinct codes buffered before an upsert + commit
+MAX_BATCH_ROWS = 250000  # ...or input rows, whichever comes first
+
+
+def _dialect_insert(db: Session):
+    """
+    Return the dialect-specific insert() construct that supports ON CONFLICT.
+    """
+    insert = upsert_insert(db.get_bind())
+    if insert is None:
+        raise RuntimeError(f"Bulk upsert is not supported for dialect '{db.get_bind().dialect.name}'")
+    return insert
+
+
+class BulkProcedureUpserter:
+    """
+    Set-based loader for the procedures table.
+
+    Rows are buffered and de-duplicated by code in memory. Every `batch_size`
+    distinct codes (or `max_rows` input rows, whichever comes first) the
+    buffer is written with one dialect-native
+    INSERT ... ON CONFLICT(code) DO UPDATE statement (executed over the whole
+    batch) and committed.
+
+    Merge rules match the old row-by-row importers:
+      - an empty description never overwrites an existing one
+      - a missing reference_cost never overwrites an existing one
+      - otherwise the last row seen for a code wins
+
+    created / updated are counted per distinct code per batch: a code that
+    already exists in the table when its batch is written counts as updated.
+
+    With `effective_from` set, each batch's costs are also stored as fee
+    schedule versions effective from that date (see fee_schedules.py), and
+    reference_cost on existing procedures is only ever set to the version in
+    effect today, so loading an older or future release keeps current prices.
+
+    With `with_localities`, rows may also carry a (carrier, locality) pair;
+    every such row's cost is kept per (code, locality) in
+    procedure_locality_prices, written in the same batches.
+
+    `on_flush`, if set, runs after a batch is written but before it is
+    committed, so anything it adds to the session (e.g. an import checkpoint)
+    lands in the same transaction as the batch.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        batch_size: int = BATCH_SIZE,
+        max_rows: int = MAX_BATCH_ROWS,
+        effective_from: date | None = None,
+        with_localities: bool = False,
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.batch_rows = 0
+        self.effective_from = effective_from
+        self.import_run_id: int | None = None
+        self.on_flush: Callable[[], None] | None = None
+        self._statements: dict[bool, object] = {}
+        self.versions = 0
+
+        self.locality_prices: LocalityPriceBuffer | None = None
+        if with_localities:
+            self.locality_prices = LocalityPriceBuffer()
+        self.pending: dict[str, list] = {}  # code -> [description, code_system, reference_cost]
+
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.batches = 0
+        self.started_at = time.perf_counter()
+
+    # ------------------------------------------------------------------
+    # Buffering
+    # ------------------------------------------------------------------
+
+    def add(
+        self,
+        code: str,
+        description: str | None,
+        code_system: str,
+        reference_cost: float | None,
+        locality: tuple[str, str] | None = None,
+    ) -> None:
+        """
+        Buffer one input row. `locality` is its (carrier, locality) pair when
+        the upserter keeps locality prices.
+        """
+        self.rows += 1
+        self.batch_rows += 1
+
+        if locality is not None and self.locality_prices is not None:
+            self.locality_prices.add(code, locality[0], locality[1], reference_cost)
+
+        pending = self.pending.get(code)
+        if pending is None:
+            self.pending[code] = [description or None, code_system, reference_cost]
+        else:
+            if description:
+                pending[0] = description
+            pending[1] = code_system or pending[1]
+            if reference_cost is not None:
+                pending[2] = reference_cost
+
+        if len(self.pending) >= self.batch_size or self.batch_rows >= self.max_rows:
+            self.flush()
+
+    def add_locality_price(
+        self,
+        code: str,
+        carrier: str,
+        locality: str,
+        reference_cost: float | None,
+    ) -> None:
+        """
+        Buffer a row that only contributes a locality price (e.g. a repeat of
+        a code whose procedure row was already taken).
+        """
+        self.rows += 1
+        self.batch_rows += 1
+        self.locality_prices.add(code, carrier, locality, reference_cost)
+
+        if self.batch_rows >= self.max_rows:
+            self.flush()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def flush(self) -> None:
+        """
+        Write and commit everything buffered so far.
+        """
+        self.batch_rows = 0
+        if not self.pending and not self.locality_prices:
+            return
+
+        if self.pending:
+            self._write_procedures()
+        if self.locality_prices:
+            self.locality_prices.flush(
+                self.db, _dialect_insert(self.db), self.import_run_id, self.effective_from
+            )
+        self.batches += 1
+
+        if self.on_flush is not None:
+            self.on_flush()
+        self.db.commit()
+
+        print(
+            f"[INFO] Batch commit: batches={self.batches}, rows={self.rows}, "
+            f"created={self.created}, updated={self.updated}, "
+            f"rows/s={self.rows_per_second:,.0f}"
+        )
+
+    def _write_procedures(self) -> None:
+        table = models.Procedure.__table__
+        codes = list(self.pending)
+
+        existing = set(
+            self.db.scalars(select(table.c.code).where(table.c.code.in_(codes)))
+        )
+
+        with_description = []
+        without_description = []
+        for code, (description, code_system, reference_cost) in self.pending.items():
+            values = {
+                "code": code,
+                "description": description or f"Procedure {code}",
+                "code_system": code_system,
+                "reference_cost": reference_cost,
+            }
+            if description:
+                with_description.append(values)
+            else:
+                without_description.append(values)
+
+        self._execute(with_description, update_description=True)
+        self._execute(without_description, update_description=False)
+
+        if self.effective_from is not None:
+            costs = {
+                code: reference_cost
+                for code, (_, _, reference_cost) in self.pending.items()
+                if reference_cost is not None
+            }
+            self.versions += write_versions(
+                self.db,
+                _dialect_insert(self.db),
+                costs,
+                self.effective_from,
+                self.import_run_id,
+            )
+            refresh_current_costs(self.db, list(costs))
+
+        self.created += len(codes) - len(existing)
+        self.updated += len(existing)
+        self.pending.clear()
+
+    def _execute(self, rows: list[dict], update_description: bool) -> None:
+        if not rows:
+            return
+
+        stmt = self._statements.get(update_description)
+        if stmt is None:
+            stmt = self._statements[update_description] = self._upsert_statement(
+                update_description
+            )
+
+        # One compiled statement executed over the whole batch (executemany).
+        # Rendering thousands of VALUES tuples per batch costs far more in
+        # SQL compilation than the driver-level executemany does.
+        self.db.execute(stmt, rows)
+
+    def _upsert_statement(self, update_description: bool):
+        insert = _dialect_insert(self.db)
+        table = models.Procedure.__table__
+
+        stmt = insert(table)
+        set_ = {"code_system": stmt.excluded.code_system}
+        if self.effective_from is None:
+            # Unversioned loads overwrite the current cost directly;
+            # versioned ones go through refresh_current_costs() instead.
+            set_["reference_cost"] = func.coalesce(
+                stmt.excluded.reference_cost, table.c.reference_cost
+            )
+        if update_description:
+            set_["description"] = stmt.excluded.description
+
+        return stmt.on_conflict_do_update(index_elements=[table.c.code], set_=set_)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def report(self) -> None:
+        print(
+            f"[INFO] Bulk upsert: {self.rows} rows in {self.elapsed:.1f}s "
+            f"({self.rows_per_second:,.0f} rows/s), "
+            f"created={self.created}, updated={self.updated}"
+        )
+        if self.effective_from is not None:
+            print(
+                f"[INFO] Fee schedule effective {self.effective_from}: "
+                f"{self.versions} changed versions written"
+            )
+        if self.locality_prices is not None:
+            print(f"[INFO] Locality prices written: {self.locality_prices.written}")
+            if self.locality_prices.skipped:
+                print(
+                    f"[WARN] {self.locality_prices.skipped} locality prices not stored: "
+                    f"schedule takes effect {self.effective_from}; re-import it from then"
+                )
@@ -0,0 +1,222 @@
+# src/procedures/catalog.py
+
+import bisect
+import heapq
+import re
+import threading
+from array import array
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from . import models
+from .checkpoints import latest_import_version
+
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(value: str) -> list[str]:
+    return TOKEN_RE.findall(value.lower())
+
+
+class CatalogEntry:
+    """
+    Read-only copy of a Procedure row. Shaped like the ORM object so the
+    usual response models can serialize it.
+    """
+
+    __slots__ = ("id", "code", "description", "code_system", "reference_cost")
+
+    def __init__(self, id, code, description, code_system, reference_cost):
+        self.id = id
+        self.code = code
+        self.description = description
+        self.code_system = code_system
+        self.reference_cost = reference_cost
+
+
+class ProcedureCatalog:
+    """
+    Immutable snapshot of the procedures table with prefix indexes.
+
+    `entries` is sorted by upper-cased code, so the code index is just the
+    parallel `codes` list. Description tokens are kept as a sorted `tokens` list with
+    a parallel array of entry positions; a prefix lookup on either is two
+    bisects and a slice.
+    """
+
+    __slots__ = ("version", "entries", "codes", "by_code", "tokens", "token_rows", "rank")
+
+    def __init__(self, entries: list[CatalogEntry], version: int = 0):
+        # Sorted the way prefix lookups bisect `codes`: upper-cased
+        entries.sort(key=lambda e: e.code.upper())
+
+        self.version = version
+        self.entries = entries
+        self.codes = [e.code.upper() for e in entries]
+        self.by_code = {e.code: e for e in entries}
+
+        pairs = sorted(
+            (token, pos)
+            for pos, entry in enumerate(entries)
+            for token in set(tokenize(entry.description))
+        )
+        self.tokens = [token for token, _ in pairs]
+        self.token_rows = array("I", (pos for _, pos in pairs))
+
+        # Description matches are ordered shortest description first
+        order = sorted(range(len(entries)), key=lambda pos: len(entries[pos].description))
+        self.rank = array("I", bytes(4 * len(entries)))
+        for r, pos in enumerate(order):
+            self.rank[pos] = r
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, code: str) -> CatalogEntry | None:
+        return self.by_code.get(code)
+
+    def _code_range(self, prefix: str) -> range:
+        lo = bisect.bisect_left(self.codes, prefix)
+        hi = bisect.bisect_left(self.codes, prefix + "\uffff", lo)
+        return range(lo, hi)
+
+    def _token_range(self, prefix: str) -> tuple[int, int]:
+        lo = bisect.bisect_left(self.tokens, prefix)
+        hi = bisect.bisect_left(self.tokens, prefix + "\uffff", lo)
+        return lo, hi
+
+    def autocomplete(self, q: str, limit: int = 10) -> list[CatalogEntry]:
+        """
+        Code prefix matches (exact code first, then in code order), followed
+        by entries whose description has a token starting with every word
+        of `q`, shortest description first.
+        """
+        q = q.strip()
+        if not q:
+            return []
+
+        out: list[int] = []
+
+        code = q.upper()
+        if " " not in code:
+            matches = self._code_range(code)
+            if matches and self.codes[matches.start] == code:
+                out.append(matches.start)
+                matches = matches[1:]
+            out.extend(matches[: limit - len(out)])
+
+        words = tokenize(q)
+        if len(out) < limit and words:
+            # Start from the narrowest word and intersect the others into it
+            ranges = sorted((self._token_range(w) for w in words), key=lambda r: r[1] - r[0])
+            lo, hi = ranges[0]
+            found = set(self.token_rows[lo:hi])
+            for lo, hi in ranges[1:]:
+                if not found:
+                    break
+                found.intersection_update(self.token_rows[lo:hi])
+
+            found.difference_update(out)
+            out.extend(heapq.nsmallest(limit - len(out), found, key=self.rank.__getitem__))
+
+        return [self.entries[pos] for pos in out]
+
+
+_catalog = ProcedureCatalog([])
+_reload_lock = threading.Lock()
+_refresher: threading.Thread | None = None
+_stop = threading.Event()
+
+
+def get_catalog() -> ProcedureCatalog:
+    """
+    The current snapshot. Callers should hold on to the returned object for
+    the duration of a request rather than calling this repeatedly.
+    """
+    return _catalog
+
+
+def build_catalog(db: Session) -> ProcedureCatalog:
+    version = latest_import_version(db)
+    table = models.Procedure.__table__
+    rows = db.execute(
+        select(
+            table.c.id,
+            table.c.code,
+            table.c.description,
+            table.c.code_system,
+            table.c.reference_cost,
+        )
+    )
+    return ProcedureCatalog([CatalogEntry(*row) for row in rows], version=version)
+
+
+def reload_catalog(force: bool = False) -> bool:
+    """
+    Rebuild the catalog if a newer import has completed (or `force`).
+
+    The new snapshot is built off to the side and then swapped in with a
+    single assignment, so readers see either the old or the new catalog,
+    never a half-built one. Returns True if the catalog was replaced.
+    """
+    global _catalog
+
+    with _reload_lock:
+        db: Session = SessionLocal()
+        try:
+            if not force and latest_import_version(db) == _catalog.version:
+                return False
+            catalog = build_catalog(db)
+        finally:
+            db.close()
+
+        _catalog = catalog
+
+    print(f"[INFO] Procedure catalog loaded: {len(catalog)} codes (import version {catalog.version})")
+    return True
+
+
+def _refresh_loop(interval: float) -> None:
+    while not _stop.wait(interval):
+        try:
+            reload_catalog()
+        except Exception as e:
+            print(f"[WARN] Procedure catalog refresh failed: {e}")
+
+
+def start_catalog(interval: float | None = None) -> None:
+    """
+    Load the catalog and start a daemon thread that polls the import
+    version stamp every `interval` seconds (PROCEDURE_CATALOG_REFRESH_SECONDS).
+    """
+    global _refresher
+
+    try:
+        reload_catalog(force=True)
+    except Exception as e:
+        print(f"[WARN] Procedure catalog not loaded: {e}")
+
+    if _refresher is not None:
+        return
+
+    interval = interval or settings.PROCEDURE_CATALOG_REFRESH_SECONDS
+    _stop.clear()
+    _refresher = threading.Thread(
+        target=_refresh_loop,
+        args=(interval,),
+        name="procedure-catalog-refresh",
+        daemon=True,
+    )
+    _refresher.start()
+
+
+def stop_catalog() -> None:
+    global _refresher
+    _stop.set()
+    if _refresher is not None:
+        _refresher.join(timeout=5)
+        _refresher = None
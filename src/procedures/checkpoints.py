@@ -0,0 +1,169 @@
+# src/procedures/checkpoints.py
+
+import zlib
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from . import models
+from .bulk import BulkProcedureUpserter
+from .sources import Source
+
+
+def find_resumable_run(
+    db: Session,
+    importer: str,
+    file_hash: str,
+) -> models.ProcedureImportRun | None:
+    """
+    Latest run of `importer` over the same file that did not complete.
+    """
+    return db.scalars(
+        select(models.ProcedureImportRun)
+        .where(
+            models.ProcedureImportRun.importer == importer,
+            models.ProcedureImportRun.file_hash == file_hash,
+            models.ProcedureImportRun.status != "completed",
+        )
+        .order_by(models.ProcedureImportRun.id.desc())
+        .limit(1)
+    ).first()
+
+
+def _encode_codes(codes: set[str]) -> bytes:
+    return zlib.compress("\n".join(sorted(codes)).encode("utf-8"))
+
+
+def _decode_codes(blob: bytes) -> set[str]:
+    text = zlib.decompress(blob).decode("utf-8")
+    return set(text.split("\n")) if text else set()
+
+
+class ImportCheckpointer:
+    """
+    Tracks one importer run in procedure_import_runs.
+
+    On creation it either starts a new run or, with resume=True, picks up the
+    latest unfinished run for the same file (matched by Source.fingerprint()).
+    `resume_offset` is then the byte offset the caller should seek the source
+    to before reading rows.
+
+    Once attached to a BulkProcedureUpserter, every batch commit also stores
+    the source offset, the counters and (optionally) the importer's
+    `seen_codes`, in the same transaction as the batch itself.
+    """
+
+    def __init__(
+        self,
+        importer: str,
+        source: Source,
+        resume: bool = False,
+        seen_codes: set[str] | None = None,
+        resumable: bool = True,
+    ):
+        self.source = source
+        self.seen_codes = seen_codes
+        self.resumable = resumable
+        self.resume_offset: int | None = None
+        self.db: Session | None = None
+        self.run: models.ProcedureImportRun | None = None
+        self.upserter: BulkProcedureUpserter | None = None
+        self.base_rows = 0
+
+        if resume and not (resumable and source.seekable):
+            raise ValueError(f"Cannot resume an import from {source.name}")
+
+        file_hash = source.fingerprint()
+
+        db: Session = SessionLocal()
+        try:
+            run = find_resumable_run(db, importer, file_hash) if resume else None
+
+            if resume and run is None:
+                print("[WARN] No interrupted run found for this file; starting from the beginning.")
+
+            if run is None:
+                run = models.ProcedureImportRun(
+                    importer=importer,
+                    source=source.name,
+                    file_hash=file_hash,
+                    status="running",
+                )
+                db.add(run)
+            else:
+                run.status = "running"
+                # Offset 0 means no batch was ever committed: just start over
+                self.resume_offset = run.byte_offset or None
+                if seen_codes is not None and run.state:
+                    seen_codes.update(_decode_codes(run.state))
+
+                print(
+                    f"[INFO] Resuming import run {run.id} at byte offset {run.byte_offset} "
+                    f"(rows={run.rows_read}, created={run.created}, updated={run.updated})"
+                )
+
+            db.commit()
+            self.run_id = run.id
+        finally:
+            db.close()
+
+    def attach(self, db: Session, upserter: BulkProcedureUpserter) -> None:
+        """
+        Restore counters into `upserter` and checkpoint at each of its commits.
+        """
+        self.db = db
+        self.upserter = upserter
+        self.run = db.get(models.ProcedureImportRun, self.run_id)
+
+        self.base_rows = self.run.rows_read
+        upserter.created = self.run.created
+        upserter.updated = self.run.updated
+        upserter.import_run_id = self.run_id
+        upserter.on_flush = self.checkpoint
+
+    def checkpoint(self) -> None:
+        run = self.run
+        if self.resumable:
+            run.byte_offset = self.source.offset
+        run.rows_read = self.base_rows + self.upserter.rows
+        run.created = self.upserter.created
+        run.updated = self.upserter.updated
+        if self.seen_codes is not None:
+            run.state = _encode_codes(self.seen_codes)
+
+    def complete(self) -> None:
+        self.run.status = "completed"
+        self.run.finished_at = datetime.now(timezone.utc)
+        self.run.state = None
+        self.db.commit()
+
+    def fail(self) -> None:
+        """
+        Mark the run failed after the caller rolled back. Never raises, so the
+        original error is what surfaces.
+        """
+        if self.run is None:
+            return
+        try:
+            self.run.status = "failed"
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            print(f"[WARN] Could not mark import run {self.run_id} as failed: {e}")
+
+
+def latest_import_version(db: Session) -> int:
+    """
+    Id of the most recent completed import run, or 0 if there is none.
+
+    Used as a cheap version stamp by anything that caches the procedure
+    catalog: it only moves when an importer finishes.
+    """
+    version = db.scalar(
+        select(func.max(models.ProcedureImportRun.id)).where(
+            models.ProcedureImportRun.status == "completed"
+        )
+    )
+    return version or 0
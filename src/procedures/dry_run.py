@@ -0,0 +1,172 @@
+# src/procedures/dry_run.py
+
+import csv
+import statistics
+import time
+from array import array
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+
+
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+
+class ImportDiff:
+    """
+    Stand-in for BulkProcedureUpserter that writes nothing.
+
+    The procedures table is read once into a dict up front. Rows are then
+    merged per code with the same rules the upserter applies, so memory is
+    bounded by the number of distinct codes, not by the size of the file.
+    report() compares the two maps and writes the diff file.
+    """
+
+    def __init__(self, db: Session, diff_path: Path):
+        self.diff_path = diff_path
+        self.started_at = time.perf_counter()
+
+        table = models.Procedure.__table__
+        self.existing: dict[str, tuple[str, float | None]] = {
+            code: (description, cost)
+            for code, description, cost in db.execute(
+                select(table.c.code, table.c.description, table.c.reference_cost)
+            )
+        }
+        print(f"[INFO] Dry run: loaded {len(self.existing)} existing procedures")
+
+        self.incoming: dict[str, list] = {}  # code -> [description, reference_cost]
+        self.rows = 0
+        self.locality_rows = 0
+
+        self.new_codes: list[str] = []
+        self.removed_codes: list[str] = []
+        self.changed_codes: list[str] = []
+        self.old_costs = array("d")
+        self.new_costs = array("d")
+        self.description_changes = 0
+
+    # Same interface as BulkProcedureUpserter -----------------------------
+
+    def add(self, code, description, code_system, reference_cost, locality=None) -> None:
+        self.rows += 1
+        if locality is not None:
+            self.locality_rows += 1
+
+        pending = self.incoming.get(code)
+        if pending is None:
+            self.incoming[code] = [description or None, reference_cost]
+        else:
+            if description:
+                pending[0] = description
+            if reference_cost is not None:
+                pending[1] = reference_cost
+
+    def add_locality_price(self, code, carrier, locality, reference_cost) -> None:
+        self.rows += 1
+        self.locality_rows += 1
+
+    def flush(self) -> None:
+        pass
+
+    @property
+    def created(self) -> int:
+        return len(self.new_codes)
+
+    @property
+    def updated(self) -> int:
+        return len(self.incoming) - len(self.new_codes)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    # Diff ----------------------------------------------------------------
+
+    def report(self) -> None:
+        """
+        Compute the diff, write it to diff_path and print the summary.
+        """
+        existing = self.existing
+
+        for code, (description, cost) in self.incoming.items():
+            old = existing.get(code)
+            if old is None:
+                self.new_codes.append(code)
+                continue
+            old_description, old_cost = old
+            if description and description != old_description:
+                self.description_changes += 1
+            if cost is not None and cost != old_cost:
+                self.changed_codes.append(code)
+                self.old_costs.append(old_cost if old_cost is not None else float("nan"))
+                self.new_costs.append(cost)
+
+        self.removed_codes = [code for code in existing if code not in self.incoming]
+
+        self.write_diff()
+        self.print_summary()
+
+    def write_diff(self) -> None:
+        with self.diff_path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["change", "code", "old_cost", "new_cost", "delta", "delta_pct"])
+
+            for code in sorted(self.new_codes):
+                cost = self.incoming[code][1]
+                writer.writerow(["new", code, "", _fmt(cost), "", ""])
+
+            for code in sorted(self.removed_codes):
+                writer.writerow(["removed", code, _fmt(self.existing[code][1]), "", "", ""])
+
+            for code, old, new in sorted(zip(self.changed_codes, self.old_costs, self.new_costs)):
+                if old != old:  # NaN: the code had no cost before
+                    writer.writerow(["cost", code, "", _fmt(new), "", ""])
+                    continue
+                delta = new - old
+                pct = delta / old * 100 if old else None
+                writer.writerow(["cost", code, _fmt(old), _fmt(new), _fmt(delta), _fmt(pct)])
+
+    def print_summary(self) -> None:
+        print(f"[OK] Dry run complete in {self.elapsed:.1f}s; nothing was written.")
+        print(f"  Rows read:            {self.rows}")
+        if self.locality_rows:
+            print(f"  Locality rows:        {self.locality_rows}")
+        print(f"  Codes in file:        {len(self.incoming)}")
+        print(f"  New codes:            {len(self.new_codes)}")
+        print(f"  Removed codes:        {len(self.removed_codes)}  (kept by a real import)")
+        print(f"  Cost changes:         {len(self.changed_codes)}")
+        print(f"  Description changes:  {self.description_changes}")
+
+        deltas = array("d")
+        pcts = array("d")
+        for old, new in zip(self.old_costs, self.new_costs):
+            if old == old:
+                deltas.append(new - old)
+                if old:
+                    pcts.append((new - old) / old * 100)
+
+        _print_distribution("Cost delta ($)", deltas)
+        _print_distribution("Cost delta (%)", pcts)
+        print(f"  Diff written to:      {self.diff_path}")
+
+
+def _fmt(value: float | None) -> str:
+    return "" if value is None else f"{value:.2f}"
+
+
+def _print_distribution(label: str, values: array) -> None:
+    if len(values) < 2:
+        return
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    parts = ", ".join(f"p{p}={cuts[p - 1]:.2f}" for p in PERCENTILES)
+    print(f"  {label}: min={min(values):.2f}, {parts}, max={max(values):.2f}, mean={statistics.fmean(values):.2f}")
+
+
+def default_diff_path(path_str: str) -> Path:
+    if path_str == "-":
+        return Path("import-diff.csv")
+    return Path(f"{path_str}.diff.csv")
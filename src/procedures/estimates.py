@@ -0,0 +1,243 @@
+# src/procedures/estimates.py
+
+import threading
+from datetime import date
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from . import models, schemas
+from .catalog import get_catalog
+from .fee_schedules import cost_as_of_column
+from .localities import PricingLocalities, locality_cost_column
+
+
+MAX_CACHED_BUNDLES = 10000
+
+
+class BundleEstimateCache:
+    """
+    Computed estimates per bundle id.
+
+    Each entry remembers the procedure ids it was built from and the catalog
+    import version at the time, so it can be dropped when one of those
+    procedures changes through the ORM, or when an importer (which writes
+    with Core upserts and fires no ORM events) completes a run.
+    """
+
+    def __init__(self, max_size: int = MAX_CACHED_BUNDLES):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: dict[int, tuple[int, frozenset[int], schemas.BundleEstimateOut]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, bundle_ids: list[int], version: int) -> dict[int, schemas.BundleEstimateOut]:
+        found = {}
+        with self._lock:
+            for bundle_id in bundle_ids:
+                entry = self._entries.get(bundle_id)
+                if entry is not None and entry[0] == version:
+                    found[bundle_id] = entry[2]
+            self.hits += len(found)
+            self.misses += len(bundle_ids) - len(found)
+        return found
+
+    def put(
+        self,
+        bundle_id: int,
+        version: int,
+        procedure_ids: frozenset[int],
+        estimate: schemas.BundleEstimateOut,
+    ) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._entries.clear()
+            self._entries[bundle_id] = (version, procedure_ids, estimate)
+
+    def invalidate(self, bundle_ids=(), procedure_ids=()) -> None:
+        bundle_ids = set(bundle_ids)
+        procedure_ids = set(procedure_ids)
+        if not bundle_ids and not procedure_ids:
+            return
+        with self._lock:
+            for bundle_id, (_, procs, _) in list(self._entries.items()):
+                if bundle_id in bundle_ids or not procedure_ids.isdisjoint(procs):
+                    del self._entries[bundle_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+estimate_cache = BundleEstimateCache()
+
+
+def load_bundle_estimates(
+    db: Session,
+    bundle_ids: list[int],
+    as_of: date | None = None,
+    localities: PricingLocalities | None = None,
+) -> tuple[dict[int, schemas.BundleEstimateOut], dict[int, frozenset[int]]]:
+    """
+    Compute estimates for `bundle_ids` from one joined query.
+
+    With `as_of`, costs come from the fee schedule version in effect on that
+    date instead of the current reference_cost. With `localities`, they are
+    the procedure's price in that locality (averaged over several).
+
+    Returns the estimates and, per bundle, the procedure ids they depend on.
+    Bundles that do not exist are simply absent from both.
+    """
+    bundle = models.ProcedureBundle.__table__
+    item = models.ProcedureBundleItem.__table__
+    proc = models.Procedure.__table__
+
+    if localities is not None:
+        cost_col = locality_cost_column(proc.c.code, localities.ids)
+    elif as_of is not None:
+        cost_col = cost_as_of_column(proc.c.code, as_of)
+    else:
+        cost_col = proc.c.reference_cost
+
+    rows = db.execute(
+        select(
+            bundle.c.id,
+            bundle.c.name,
+            bundle.c.category,
+            item.c.quantity,
+            proc.c.id,
+            proc.c.code,
+            proc.c.description,
+            cost_col,
+        )
+        .select_from(
+            bundle.outerjoin(item, item.c.bundle_id == bundle.c.id).outerjoin(
+                proc, proc.c.id == item.c.procedure_id
+            )
+        )
+        .where(bundle.c.id.in_(bundle_ids))
+        .order_by(bundle.c.id, item.c.id)
+    ).all()
+
+    # Group the flat result into columns per bundle
+    grouped: dict[int, dict] = {}
+    for bundle_id, name, category, quantity, proc_id, code, description, cost in rows:
+        g = grouped.get(bundle_id)
+        if g is None:
+            g = grouped[bundle_id] = {
+                "name": name,
+                "category": category,
+                "quantities": [],
+                "procedure_ids": [],
+                "codes": [],
+                "descriptions": [],
+                "costs": [],
+            }
+        if proc_id is None:
+            continue  # bundle without items
+        g["quantities"].append(quantity)
+        g["procedure_ids"].append(proc_id)
+        g["codes"].append(code)
+        g["descriptions"].append(description)
+        g["costs"].append(cost)
+
+    estimates = {}
+    for bundle_id, g in grouped.items():
+        quantities = [q or 1 for q in g["quantities"]]
+        line_totals = [
+            cost * qty if cost is not None else None
+            for cost, qty in zip(g["costs"], quantities)
+        ]
+
+        estimates[bundle_id] = schemas.BundleEstimateOut(
+            bundle_id=bundle_id,
+            bundle_name=g["name"],
+            category=g["category"],
+            as_of=as_of,
+            locality=localities.locality if localities else None,
+            state=localities.state if localities else None,
+            total_reference_cost=sum(t for t in line_totals if t is not None),
+            items=[
+                schemas.BundleItemEstimate(
+                    code=code,
+                    description=description,
+                    quantity=quantity,
+                    reference_cost=cost,
+                    line_total_reference_cost=line_total,
+                )
+                for code, description, quantity, cost, line_total in zip(
+                    g["codes"], g["descriptions"], g["quantities"], g["costs"], line_totals
+                )
+            ],
+        )
+
+    return estimates, {bid: frozenset(g["procedure_ids"]) for bid, g in grouped.items()}
+
+
+def estimate_bundles(
+    db: Session,
+    bundle_ids: list[int],
+    as_of: date | None = None,
+    localities: PricingLocalities | None = None,
+) -> dict[int, schemas.BundleEstimateOut]:
+    """
+    Cached estimates for `bundle_ids`; misses are computed together in one query.
+    Point-in-time (`as_of`) and locality estimates are not cached.
+    """
+    if as_of is not None or localities is not None:
+        return load_bundle_estimates(db, bundle_ids, as_of, localities)[0]
+
+    version = get_catalog().version
+    found = estimate_cache.get_many(bundle_ids, version)
+
+    missing = [bid for bid in bundle_ids if bid not in found]
+    if missing:
+        computed, procedure_ids = load_bundle_estimates(db, missing)
+        for bundle_id, estimate in computed.items():
+            estimate_cache.put(bundle_id, version, procedure_ids[bundle_id], estimate)
+        found.update(computed)
+
+    return found
+
+
+# ----------------------------------------------------------------------
+# Invalidation on ORM changes
+# ----------------------------------------------------------------------
+
+def _collect_changes(session: Session, flush_context) -> None:
+    bundle_ids = session.info.setdefault("estimate_bundle_ids", set())
+    procedure_ids = session.info.setdefault("estimate_procedure_ids", set())
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, models.ProcedureBundle):
+            bundle_ids.add(obj.id)
+        elif isinstance(obj, models.ProcedureBundleItem):
+            bundle_ids.add(obj.bundle_id)
+            history = inspect(obj).attrs.bundle_id.history
+            bundle_ids.update(b for b in history.deleted if b is not None)
+        elif isinstance(obj, models.Procedure):
+            if obj in session.deleted or inspect(obj).attrs.reference_cost.history.has_changes():
+                procedure_ids.add(obj.id)
+
+    # Drop now as well as on commit, so a request racing this transaction
+    # cannot keep serving the old entry.
+    estimate_cache.invalidate(bundle_ids, procedure_ids)
+
+
+def _apply_changes(session: Session) -> None:
+    estimate_cache.invalidate(
+        session.info.pop("estimate_bundle_ids", ()),
+        session.info.pop("estimate_procedure_ids", ()),
+    )
+
+
+def _discard_changes(session: Session, previous_transaction) -> None:
+    session.info.pop("estimate_bundle_ids", None)
+    session.info.pop("estimate_procedure_ids", None)
+
+
+event.listen(SessionLocal, "after_flush", _collect_changes)
+event.listen(SessionLocal, "after_commit", _apply_changes)
+event.listen(SessionLocal, "after_soft_rollback", _discard_changes)
@@ -0,0 +1,195 @@
+# src/procedures/fee_schedules.py
+
+from datetime import date
+
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.orm import Session, aliased
+
+from . import models
+
+
+def parse_effective_from(value: str) -> date:
+    """
+    argparse type for --effective-from: YYYY-MM-DD or just a YYYY release year.
+    """
+    value = value.strip()
+    if len(value) == 4 and value.isdigit():
+        return date(int(value), 1, 1)
+    return date.fromisoformat(value)
+
+
+def infer_effective_from(first_row: list[str] | None) -> date:
+    """
+    Effective date for a release when none was given on the command line.
+
+    Headerless CMS PFS files start every row with the schedule year
+    ('2025', ...), which we read as January 1st of that year. Anything else
+    is treated as taking effect today.
+    """
+    if first_row:
+        year = first_row[0].strip().strip('"')
+        if len(year) == 4 and year.isdigit() and 1900 < int(year) < 2200:
+            return date(int(year), 1, 1)
+    return date.today()
+
+
+def _latest_effective_from(code_col, bound: date, inclusive: bool = True):
+    """
+    Correlated subquery: the latest effective_from for code_col that is
+    on or before `bound` (strictly before it with inclusive=False).
+    """
+    fs = aliased(models.ProcedureFeeSchedule)
+    condition = fs.effective_from <= bound if inclusive else fs.effective_from < bound
+    return (
+        select(func.max(fs.effective_from))
+        .where(fs.code == code_col, condition)
+        .scalar_subquery()
+    )
+
+
+def _next_effective_from(code_col, after: date):
+    fs = aliased(models.ProcedureFeeSchedule)
+    return (
+        select(func.min(fs.effective_from))
+        .where(fs.code == code_col, fs.effective_from > after)
+        .scalar_subquery()
+    )
+
+
+def cost_as_of_column(code_col, as_of: date):
+    """
+    Correlated scalar subquery for the reference cost of code_col on as_of.
+
+    Each lookup is a seek on (code, effective_from), so it stays cheap no
+    matter how many years of history are stored.
+    """
+    fs = aliased(models.ProcedureFeeSchedule)
+    return (
+        select(fs.reference_cost)
+        .where(fs.code == code_col, fs.effective_from <= as_of)
+        .order_by(fs.effective_from.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def versions_as_of(
+    db: Session,
+    codes: list[str],
+    as_of: date,
+) -> dict[str, models.ProcedureFeeSchedule]:
+    """
+    The fee schedule version in effect on `as_of` for each of `codes`.
+    Codes with no version on or before that date are absent.
+    """
+    fs = models.ProcedureFeeSchedule
+    rows = db.scalars(
+        select(fs).where(
+            fs.code.in_(codes),
+            fs.effective_from == _latest_effective_from(fs.code, as_of),
+        )
+    )
+    return {row.code: row for row in rows}
+
+
+def version_history(db: Session, code: str) -> list[models.ProcedureFeeSchedule]:
+    fs = models.ProcedureFeeSchedule
+    return list(
+        db.scalars(select(fs).where(fs.code == code).order_by(fs.effective_from.desc()))
+    )
+
+
+def write_versions(
+    db: Session,
+    insert,
+    costs: dict[str, float],
+    effective_from: date,
+    import_run_id: int | None,
+) -> int:
+    """
+    Store `costs` as the version of each code effective from `effective_from`.
+
+    Versions are compact: a code whose cost equals the version already in
+    effect just before `effective_from` gets no new row (and any row an
+    earlier batch of the same import wrote at that date is removed). When
+    back-filling an older release, a later version that merely repeats the
+    new cost is dropped too. Returns the number of version rows written.
+    """
+    if not costs:
+        return 0
+
+    fs = models.ProcedureFeeSchedule
+    table = fs.__table__
+    codes = list(costs)
+
+    prior = dict(
+        db.execute(
+            select(fs.code, fs.reference_cost).where(
+                fs.code.in_(codes),
+                fs.effective_from == _latest_effective_from(
+                    fs.code, effective_from, inclusive=False
+                ),
+            )
+        ).all()
+    )
+
+    unchanged = [c for c in codes if c in prior and prior[c] == costs[c]]
+    changed = [
+        {
+            "code": c,
+            "effective_from": effective_from,
+            "reference_cost": costs[c],
+            "import_run_id": import_run_id,
+        }
+        for c in codes
+        if not (c in prior and prior[c] == costs[c])
+    ]
+
+    if unchanged:
+        db.execute(
+            table.delete().where(
+                table.c.code.in_(unchanged), table.c.effective_from == effective_from
+            )
+        )
+
+    if changed:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.code, table.c.effective_from],
+            set_={
+                "reference_cost": stmt.excluded.reference_cost,
+                "import_run_id": stmt.excluded.import_run_id,
+            },
+        )
+        db.execute(stmt, changed)
+
+    following = db.execute(
+        select(fs.id, fs.code, fs.reference_cost).where(
+            fs.code.in_(codes),
+            fs.effective_from == _next_effective_from(fs.code, effective_from),
+        )
+    ).all()
+    redundant = [id_ for id_, code, cost in following if costs[code] == cost]
+    if redundant:
+        db.execute(table.delete().where(table.c.id.in_(redundant)))
+
+    return len(changed)
+
+
+def refresh_current_costs(db: Session, codes: list[str], today: date | None = None) -> None:
+    """
+    Point procedures.reference_cost at the version in effect today.
+
+    Importing an older (or future) schedule therefore never changes the
+    current price; codes without any version in effect keep their value.
+    """
+    if not codes:
+        return
+    proc = models.Procedure.__table__
+    current = cost_as_of_column(proc.c.code, today or date.today())
+    db.execute(
+        update(proc)
+        .where(and_(proc.c.code.in_(codes), current.is_not(None)))
+        .values(reference_cost=current)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,134 @@
+# src/procedures/import_localities.py
+
+import argparse
+import csv
+import sys
+
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from . import models
+from .bulk import _dialect_insert
+from .localities import normalize_state
+from .sources import open_source, sniff_dialect, source_exists
+
+
+CARRIER_CANDIDATES = [
+    "medicare administrative contractor",
+    "medicare adminstrative contractor",  # sic, as spelled in several CMS releases
+    "mac",
+    "carrier",
+    "contractor",
+]
+LOCALITY_CANDIDATES = ["locality number", "locality", "locality code"]
+STATE_CANDIDATES = ["state"]
+NAME_CANDIDATES = ["fee schedule area", "locality name", "name"]
+
+
+def detect_locality_fields(row: list[str]) -> tuple[int, int, int, int | None] | None:
+    """
+    Column indices (carrier, locality, state, name) if `row` is the header
+    row of a CMS locality key file, else None.
+    """
+    lower = {col.strip().lower(): i for i, col in enumerate(row)}
+
+    def pick(candidates):
+        for c in candidates:
+            if c in lower:
+                return lower[c]
+        return None
+
+    carrier = pick(CARRIER_CANDIDATES)
+    locality = pick(LOCALITY_CANDIDATES)
+    state = pick(STATE_CANDIDATES)
+    if carrier is None or locality is None or state is None:
+        return None
+    return carrier, locality, state, pick(NAME_CANDIDATES)
+
+
+def _pad(value: str, width: int) -> str:
+    # PFS payment files zero-pad carriers to 5 and localities to 2 digits
+    value = value.strip()
+    return value.zfill(width) if value.isdigit() else value
+
+
+def import_localities(path_str: str, member: str | None = None) -> None:
+    """
+    Load a CMS locality key file (MAC, locality number, state, fee schedule
+    area) into pfs_localities, so localities can be looked up by state.
+
+    Title lines above the header are skipped, and a blank state cell
+    repeats the state of the row above, as in the CMS spreadsheets.
+    """
+    if not source_exists(path_str):
+        print(f"[ERROR] File not found: {path_str}")
+        sys.exit(1)
+
+    with open_source(path_str, member=member) as source:
+        reader = csv.reader(source.lines(), dialect=sniff_dialect(source.sample))
+
+        layout = None
+        for row in reader:
+            layout = detect_locality_fields(row)
+            if layout is not None:
+                break
+        if layout is None:
+            print("[ERROR] Could not find a header with MAC/carrier, locality and state columns.")
+            sys.exit(1)
+
+        carrier_idx, locality_idx, state_idx, name_idx = layout
+        width = max(layout[:3]) + 1
+
+        values = {}
+        state = None
+        for row in reader:
+            if len(row) < width or not row[carrier_idx].strip() or not row[locality_idx].strip():
+                continue
+            state = normalize_state(row[state_idx]) or state
+            carrier = _pad(row[carrier_idx], 5)
+            locality = _pad(row[locality_idx], 2)
+            values[(carrier, locality)] = {
+                "carrier": carrier,
+                "locality": locality,
+                "state": state,
+                "name": row[name_idx].strip() if name_idx is not None and name_idx < len(row) else None,
+            }
+
+    db: Session = SessionLocal()
+    try:
+        table = models.PfsLocality.__table__
+        stmt = _dialect_insert(db)(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.carrier, table.c.locality],
+            set_={"state": stmt.excluded.state, "name": stmt.excluded.name},
+        )
+        if values:
+            db.execute(stmt, list(values.values()))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    states = {v["state"] for v in values.values() if v["state"]}
+    print(f"[OK] Localities imported: {len(values)} across {len(states)} states.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m src.procedures.import_localities",
+        description="Import the CMS PFS locality key (MAC, locality, state, area).",
+    )
+    parser.add_argument(
+        "path",
+        help="locality csv/txt file, optionally .gz/.bz2/.zip compressed, or '-' for stdin",
+    )
+    parser.add_argument(
+        "--member",
+        default=None,
+        help="file inside a .zip archive (default: the largest .txt/.csv member)",
+    )
+    args = parser.parse_args()
+
+    import_localities(args.path, member=args.member)
@@ -1,16 +1,23 @@
 # src/procedures/import_pfs_headerless_simple.py
 
+import argparse
 import csv
 import sys
+from datetime import date
 from pathlib import Path
 
 from sqlalchemy.orm import Session
 
 from ..database import SessionLocal
-from . import models
+from .bulk import BulkProcedureUpserter
+from .checkpoints import ImportCheckpointer
+from .dry_run import ImportDiff, default_diff_path
+from .fee_schedules import infer_effective_from, parse_effective_from
+from .search import search_backend
+from .sources import open_source, sniff_dialect, source_exists
 
 
-BATCH_SIZE = 2000  # commit every 2000 codes to keep memory low
+BATCH_SIZE = 5000  # upsert + commit every 5000 new codes to keep memory low
 
 
 def parse_reference_cost(value: str | None) -> float | None:
@@ -33,32 +40,83 @@ def derive_code_system(code: str) -> str:
     return "hcpcs"
 
 
-def import_pfs_headerless(path_str: str) -> None:
-    path = Path(path_str)
-    if not path.exists():
+def import_pfs_headerless(
+    path_str: str,
+    member: str | None = None,
+    resume: bool = False,
+    effective_from: date | None = None,
+    dry_run: bool = False,
+    diff_path: Path | None = None,
+) -> None:
+    """
+    Import a headerless PFS file, keeping the first row seen for each code.
+    Locality prices (carrier, locality) are still taken from every row.
+
+    path_str may be a plain file, .gz/.bz2, a .zip archive (optionally naming
+    the `member` to read) or '-' for stdin; it is streamed exactly once.
+
+    The run is checkpointed (byte offset, counters, seen codes) at every batch
+    commit; resume=True continues the last unfinished run of the same file.
+
+    Costs are stored as a fee schedule version effective from
+    `effective_from` (default: January 1st of the year in the first column).
+
+    dry_run=True writes nothing and instead diffs the file against the
+    procedures table into `diff_path` (default: '<path>.diff.csv').
+    """
+    if not source_exists(path_str):
         print(f"[ERROR] File not found: {path_str}")
         sys.exit(1)
+    if dry_run and resume:
+        print("[ERROR] --resume cannot be combined with --dry-run")
+        sys.exit(1)
 
     db: Session = SessionLocal()
-    created = 0
-    updated = 0
+    checkpointer: ImportCheckpointer | None = None
     total_rows = 0
-    used_rows = 0
 
     # Track codes we've already processed in THIS run to avoid duplicate INSERTs
+    # (persisted with each checkpoint so a resumed run keeps first-row-wins)
     seen_codes: set[str] = set()
 
     try:
-        with path.open("r", encoding="utf-8-sig") as f:
-            sample = f.read(4096)
-            f.seek(0)
-            # Try to sniff delimiter; fall back to comma
-            try:
-                dialect = csv.Sniffer().sniff(sample)
-            except csv.Error:
-                dialect = csv.get_dialect("excel")
+        with open_source(path_str, member=member) as source:
+            # Sniff delimiter from the buffered prefix; falls back to comma
+            dialect = sniff_dialect(source.sample)
+
+            if effective_from is None:
+                first_row = next(csv.reader(source.sample.splitlines()[:1], dialect=dialect), None)
+                effective_from = infer_effective_from(first_row)
+            print(f"[INFO] Fee schedule effective from {effective_from}")
+
+            if dry_run:
+                upserter = ImportDiff(db, diff_path or default_diff_path(path_str))
+            else:
+                upserter = BulkProcedureUpserter(
+                    db,
+                    batch_size=BATCH_SIZE,
+                    effective_from=effective_from,
+                    with_localities=True,
+                )
 
-            reader = csv.reader(f, dialect=dialect)
+                # Search stays current as rows are upserted once its index exists
+                if search_backend() == "memory":
+                    print("[WARN] No search index; run python -m src.migrate upgrade to create it")
+
+                checkpointer = ImportCheckpointer(
+                    "pfs_headerless_simple",
+                    source,
+                    resume=resume,
+                    seen_codes=seen_codes,
+                )
+                checkpointer.attach(db, upserter)
+                if checkpointer.resume_offset:
+                    source.seek(checkpointer.resume_offset)
+            # Every row with a code counts, repeats included (they still add a
+            # locality price); a resumed run continues from its checkpoint
+            code_rows = checkpointer.base_rows if checkpointer else 0
+
+            reader = csv.reader(source.lines(), dialect=dialect)
 
             for row in reader:
                 total_rows += 1
@@ -67,7 +125,8 @@ def import_pfs_headerless(path_str: str) -> None:
                 if total_rows % 10000 == 0:
                     print(
                         f"[INFO] Processed {total_rows} rows, "
-                        f"used_rows={used_rows}, created={created}, updated={updated}"
+                        f"code_rows={code_rows}, codes={len(seen_codes)}, created={upserter.created}, "
+                        f"updated={upserter.updated}"
                     )
 
                 # Skip empty rows
@@ -87,61 +146,48 @@ def import_pfs_headerless(path_str: str) -> None:
                 if len(code) < 3 or len(code) > 7:
                     continue
 
-                # Skip if we've already processed this code in this run
+                ref_raw = row[5]  # 6th column: non-facility total payment
+                reference_cost = parse_reference_cost(ref_raw)
+                carrier, locality = row[1].strip(), row[2].strip()
+                code_rows += 1
+
+                # Codes already processed in this run only add their locality price
                 if code in seen_codes:
+                    upserter.add_locality_price(code, carrier, locality, reference_cost)
                     continue
                 seen_codes.add(code)
 
-                used_rows += 1
-
                 description = f"Procedure {code}"
-                ref_raw = row[5]  # 6th column: non-facility total payment
-                reference_cost = parse_reference_cost(ref_raw)
                 code_system = derive_code_system(code)
 
-                # Check if this code already exists in the DB from previous runs
-                existing = (
-                    db.query(models.Procedure)
-                    .filter(models.Procedure.code == code)
-                    .first()
+                upserter.add(
+                    code, description, code_system, reference_cost, (carrier, locality)
                 )
 
-                if existing:
-                    existing.description = description or existing.description
-                    existing.code_system = code_system or existing.code_system
-                    if reference_cost is not None:
-                        existing.reference_cost = reference_cost
-                    updated += 1
-                else:
-                    proc = models.Procedure(
-                        code=code,
-                        description=description,
-                        code_system=code_system,
-                        reference_cost=reference_cost,
-                    )
-                    db.add(proc)
-                    created += 1
-
-                # Batch commit to keep memory low
-                if used_rows % BATCH_SIZE == 0:
-                    db.commit()
-                    db.expunge_all()
-                    print(
-                        f"[INFO] Batch commit: used_rows={used_rows}, "
-                        f"created={created}, updated={updated}"
-                    )
+            if dry_run:
+                upserter.report()
+                return
 
-            # Final commit
-            db.commit()
+            # Final batch
+            upserter.flush()
+            checkpointer.complete()
 
         print(f"[OK] Headerless import finished.")
         print(f"  Total rows read:   {total_rows}")
-        print(f"  Rows with a code:  {used_rows}")
-        print(f"  Created:           {created}")
-        print(f"  Updated:           {updated}")
+        print(f"  Rows with a code:  {code_rows}")
+        print(f"  Distinct codes:    {len(seen_codes)}")
+        print(f"  Created:           {upserter.created}")
+        print(f"  Updated:           {upserter.updated}")
+        print(f"  Locality prices:   {upserter.locality_prices.written} written")
+        if upserter.locality_prices.skipped:
+            print(f"  Not yet in effect: {upserter.locality_prices.skipped} locality prices skipped")
+        print(f"  Elapsed:           {upserter.elapsed:.1f}s")
+        print(f"  Rows/second:       {total_rows / upserter.elapsed:,.0f}")
 
     except Exception as e:
         db.rollback()
+        if checkpointer:
+            checkpointer.fail()
         print(f"[ERROR] Import failed: {e}")
         raise
     finally:
@@ -149,9 +195,49 @@ def import_pfs_headerless(path_str: str) -> None:
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python -m src.procedures.import_pfs_headerless_simple <path_to_pfs_txt_or_csv>")
-        sys.exit(1)
-
-    file_path = sys.argv[1]
-    import_pfs_headerless(file_path)
+    parser = argparse.ArgumentParser(
+        prog="python -m src.procedures.import_pfs_headerless_simple",
+        description="Import a headerless PFS txt/csv file (first row per code wins).",
+    )
+    parser.add_argument(
+        "path",
+        help="PFS txt/csv file, optionally .gz/.bz2/.zip compressed, or '-' for stdin",
+    )
+    parser.add_argument(
+        "--member",
+        default=None,
+        help="file inside a .zip archive (default: the largest .txt/.csv member)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the last unfinished import of this file from its last checkpoint",
+    )
+    parser.add_argument(
+        "--effective-from",
+        type=parse_effective_from,
+        default=None,
+        help="date (YYYY-MM-DD or YYYY) this fee schedule takes effect "
+        "(default: the year in the first column)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="write nothing; report what the import would change",
+    )
+    parser.add_argument(
+        "--diff-out",
+        type=Path,
+        default=None,
+        help="csv file for the --dry-run diff (default: <path>.diff.csv)",
+    )
+    args = parser.parse_args()
+
+    import_pfs_headerless(
+        args.path,
+        member=args.member,
+        resume=args.resume,
+        effective_from=args.effective_from,
+        dry_run=args.dry_run,
+        diff_path=args.diff_out,
+    )
@@ -1,13 +1,22 @@
 # src/procedures/import_procedures.py
 
+import argparse
 import csv
+import itertools
 import sys
+from datetime import date
 from pathlib import Path
+from typing import Iterable
 
 from sqlalchemy.orm import Session
 
 from ..database import SessionLocal
-from . import models
+from .bulk import BulkProcedureUpserter
+from .checkpoints import ImportCheckpointer
+from .dry_run import ImportDiff, default_diff_path
+from .fee_schedules import infer_effective_from, parse_effective_from
+from .search import search_backend
+from .sources import open_source, sniff_dialect, source_exists
 
 
 def detect_fields(fieldnames: list[str]) -> tuple[str, str, str | None]:
@@ -64,6 +73,20 @@ def detect_fields(fieldnames: list[str]) -> tuple[str, str, str | None]:
     return code_field, desc_field, ref_field
 
 
+def header_layout(fieldnames: list[str]) -> tuple[int, int, int | None]:
+    """
+    Column indices (code, description, reference_cost) for a header row.
+
+    Mirrors csv.DictReader: when a header name repeats, the last column wins.
+    """
+    code_field, desc_field, ref_field = detect_fields(fieldnames)
+
+    def index(name: str) -> int:
+        return max(i for i, n in enumerate(fieldnames) if n == name)
+
+    return index(code_field), index(desc_field), index(ref_field) if ref_field else None
+
+
 def parse_reference_cost(value: str | None) -> float | None:
     if value is None:
         return None
@@ -85,14 +108,21 @@ def derive_code_system(code: str) -> str:
     return "hcpcs"
 
 
-def import_with_header(path: Path, dialect: csv.Dialect, fieldnames: list[str]) -> tuple[int, int]:
+def import_with_header(
+    rows: Iterable[list[str]],
+    fieldnames: list[str],
+    checkpointer: ImportCheckpointer | None = None,
+    effective_from: date | None = None,
+    diff_path: Path | None = None,
+) -> tuple[int, int]:
     """
     Import assuming the file DOES have a header row.
+    `rows` are the csv rows that follow the header.
+    Costs are versioned as of `effective_from` when given.
+    With `diff_path`, nothing is written; the changes are diffed there instead.
     Returns (created, updated)
     """
     db: Session = SessionLocal()
-    created = 0
-    updated = 0
 
     try:
         code_field, desc_field, ref_field = detect_fields(fieldnames)
@@ -102,185 +132,347 @@ def import_with_header(path: Path, dialect: csv.Dialect, fieldnames: list[str])
             f"description={desc_field}, reference_cost={ref_field}"
         )
 
-        with path.open("r", encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f, dialect=dialect)
-            for row in reader:
-                raw_code = row.get(code_field) or ""
-                code = raw_code.strip()
-                if not code:
-                    continue
-
-                description = (row.get(desc_field) or "").strip()
-                reference_cost = parse_reference_cost(row.get(ref_field)) if ref_field else None
-                code_system = derive_code_system(code)
-
-                existing = (
-                    db.query(models.Procedure)
-                    .filter(models.Procedure.code == code)
-                    .first()
-                )
+        if diff_path is not None:
+            upserter = ImportDiff(db, diff_path)
+        else:
+            upserter = BulkProcedureUpserter(db, effective_from=effective_from)
+        if checkpointer:
+            checkpointer.attach(db, upserter)
+
+        for values in rows:
+            # Same mapping csv.DictReader would build
+            row = dict(zip(fieldnames, values))
+
+            raw_code = row.get(code_field) or ""
+            code = raw_code.strip()
+            if not code:
+                continue
+
+            description = (row.get(desc_field) or "").strip()
+            reference_cost = parse_reference_cost(row.get(ref_field)) if ref_field else None
+            code_system = derive_code_system(code)
 
-                if existing:
-                    existing.description = description or existing.description
-                    existing.code_system = code_system or existing.code_system
-                    if reference_cost is not None:
-                        existing.reference_cost = reference_cost
-                    updated += 1
-                else:
-                    proc = models.Procedure(
-                        code=code,
-                        description=description or f"Procedure {code}",
-                        code_system=code_system,
-                        reference_cost=reference_cost,
-                    )
-                    db.add(proc)
-                    created += 1
-
-            db.commit()
+            upserter.add(code, description, code_system, reference_cost)
+
+        upserter.flush()
+        upserter.report()
+        if checkpointer:
+            checkpointer.complete()
     except Exception:
         db.rollback()
+        if checkpointer:
+            checkpointer.fail()
         raise
     finally:
         db.close()
 
-    return created, updated
+    return upserter.created, upserter.updated
 
 
-def import_headerless_pfs(path: Path, dialect: csv.Dialect) -> tuple[int, int]:
+def import_headerless_pfs(
+    rows: Iterable[list[str]],
+    checkpointer: ImportCheckpointer | None = None,
+    effective_from: date | None = None,
+    diff_path: Path | None = None,
+) -> tuple[int, int]:
     """
     Fallback importer for headerless PFS-like files where columns are positional.
 
     Based on the example row:
     ['2025', '01112', '05', 'G0011', '  ', '0000031.56', '0000027.89', ...]
     we assume:
+        index 1 -> carrier
+        index 2 -> locality
         index 3 -> code
         index 5 -> non-facility total payment (reference_cost)
     Description is not present; we use 'Procedure <code>'.
+    Every row's cost is also kept per (code, locality).
+    Costs are versioned as of `effective_from` when given.
+    With `diff_path`, nothing is written; the changes are diffed there instead.
+    Returns (created, updated)
     """
 
     db: Session = SessionLocal()
-    created = 0
-    updated = 0
+    if diff_path is not None:
+        upserter = ImportDiff(db, diff_path)
+    else:
+        upserter = BulkProcedureUpserter(
+            db, effective_from=effective_from, with_localities=True
+        )
+    if checkpointer:
+        checkpointer.attach(db, upserter)
 
     try:
-        with path.open("r", encoding="utf-8-sig") as f:
-            reader = csv.reader(f, dialect=dialect)
-
-            for row in reader:
-                # Skip empty lines
-                if not row or all(not col.strip() for col in row):
-                    continue
-
-                # Defensive: ensure row is long enough
-                if len(row) < 6:
-                    continue
-
-                raw_code = row[3]  # 4th column
-                code = (raw_code or "").strip()
-                if not code:
-                    continue
-
-                # We don't have a description column in this layout
-                description = f"Procedure {code}"
-
-                ref_raw = row[5]  # 6th column assumed = non-facility total payment
-                reference_cost = parse_reference_cost(ref_raw)
-                code_system = derive_code_system(code)
-
-                existing = (
-                    db.query(models.Procedure)
-                    .filter(models.Procedure.code == code)
-                    .first()
-                )
-
-                if existing:
-                    existing.description = description or existing.description
-                    existing.code_system = code_system or existing.code_system
-                    if reference_cost is not None:
-                        existing.reference_cost = reference_cost
-                    updated += 1
-                else:
-                    proc = models.Procedure(
-                        code=code,
-                        description=description,
-                        code_system=code_system,
-                        reference_cost=reference_cost,
-                    )
-                    db.add(proc)
-                    created += 1
-
-            db.commit()
+        for row in rows:
+            # Skip empty lines
+            if not row or all(not col.strip() for col in row):
+                continue
+
+            # Defensive: ensure row is long enough
+            if len(row) < 6:
+                continue
+
+            raw_code = row[3]  # 4th column
+            code = (raw_code or "").strip()
+            if not code:
+                continue
+
+            # We don't have a description column in this layout
+            description = f"Procedure {code}"
+
+            ref_raw = row[5]  # 6th column assumed = non-facility total payment
+            reference_cost = parse_reference_cost(ref_raw)
+            code_system = derive_code_system(code)
+            locality = (row[1].strip(), row[2].strip())  # (carrier, locality)
+
+            upserter.add(code, description, code_system, reference_cost, locality)
+
+        upserter.flush()
+        upserter.report()
+        if checkpointer:
+            checkpointer.complete()
     except Exception:
         db.rollback()
+        if checkpointer:
+            checkpointer.fail()
         raise
     finally:
         db.close()
 
-    return created, updated
+    return upserter.created, upserter.updated
+
+
+def import_with_header_parallel(
+    path: Path,
+    dialect: csv.Dialect,
+    fieldnames: list[str],
+    start: int,
+    workers: int,
+    checkpointer: ImportCheckpointer | None = None,
+    effective_from: date | None = None,
+) -> tuple[int, int]:
+    """
+    Parallel variant of import_with_header(): same columns, same results.
+    `start` is the byte offset just past the header line.
+    Returns (created, updated)
+    """
+    from .parallel import import_parallel
 
+    layout = header_layout(fieldnames)
+    print(f"[INFO] Using column indices (code, description, reference_cost): {layout}")
 
-def import_procedures_from_pfs_file(path_str: str) -> None:
-    path = Path(path_str)
-    if not path.exists():
+    return import_parallel(
+        path, dialect, layout, start, workers, checkpointer, effective_from
+    )
+
+
+def import_headerless_pfs_parallel(
+    path: Path,
+    dialect: csv.Dialect,
+    workers: int,
+    checkpointer: ImportCheckpointer | None = None,
+    effective_from: date | None = None,
+) -> tuple[int, int]:
+    """
+    Parallel variant of import_headerless_pfs(): same positional layout, same results.
+    Returns (created, updated)
+    """
+    from .parallel import HEADERLESS_LAYOUT, import_parallel
+
+    return import_parallel(
+        path, dialect, HEADERLESS_LAYOUT, 0, workers, checkpointer, effective_from
+    )
+
+
+def import_procedures_from_pfs_file(
+    path_str: str,
+    workers: int = 1,
+    member: str | None = None,
+    resume: bool = False,
+    effective_from: date | None = None,
+    dry_run: bool = False,
+    diff_path: Path | None = None,
+) -> None:
+    """
+    Import a PFS-style file, with or without a header row.
+
+    path_str may be a plain txt/csv file, a .gz/.bz2 file, a .zip archive
+    (optionally naming the `member` to read) or '-' for stdin. The source is
+    streamed once: the dialect is sniffed from a buffered prefix and the same
+    stream then feeds the import.
+
+    Every run is recorded in procedure_import_runs and checkpointed at each
+    batch commit. resume=True continues the latest unfinished run for the
+    same file from its last committed byte offset.
+
+    workers > 1 parses newline-aligned byte ranges of the file in a process
+    pool; the database writes still go through a single bulk writer. This
+    needs random access, so it only applies to plain files on disk, and such
+    runs cannot be resumed.
+
+    Costs are stored as a fee schedule version effective from
+    `effective_from`; by default that is January 1st of the year in the
+    first column of headerless CMS files, otherwise today.
+
+    dry_run=True writes nothing: the file is streamed once against the
+    current procedures table and the new/removed codes and cost changes are
+    written as csv to `diff_path` (default: '<path>.diff.csv').
+    """
+    if not source_exists(path_str):
         print(f"[ERROR] File not found: {path_str}")
         sys.exit(1)
 
-    try:
-        # First, open a sample to detect dialect & header behavior
-        with path.open("r", encoding="utf-8-sig") as f:
-            sample = f.read(4096)
-            f.seek(0)
-            sniffer = csv.Sniffer()
-            try:
-                dialect = sniffer.sniff(sample)
-            except csv.Error:
-                dialect = csv.get_dialect("excel")
-
-            # Peek at first row as "header"
-            reader = csv.reader(f, dialect=dialect)
-            first_row = next(reader, None)
-
-            if first_row is None:
-                print("[ERROR] File appears to be empty.")
-                sys.exit(1)
-
-            print(f"[INFO] First row fields: {first_row}")
-
-            # Heuristic: if the "header" row is all numeric-like things and the error
-            # about missing columns happens, we'll treat this as headerless.
-            # Try header-based import first using DictReader with that first row as header.
-            fieldnames = first_row
-            try:
-                created, updated = import_with_header(path, dialect, fieldnames)
-                print(f"[OK] Import (with header) complete. Created: {created}, Updated: {updated}")
-                return
-            except ValueError as ve:
-                print(f"[WARN] {ve}")
-                print("[INFO] Falling back to headerless positional import...")
-
-    except Exception as e:
-        # If anything blows up above, we still attempt headerless before giving up
-        print(f"[WARN] Header-based attempt failed with: {e}")
-        print("[INFO] Falling back to headerless positional import...")
-
-        with path.open("r", encoding="utf-8-sig") as f:
-            sniffer = csv.Sniffer()
-            sample = f.read(4096)
-            f.seek(0)
-            try:
-                dialect = sniffer.sniff(sample)
-            except csv.Error:
-                dialect = csv.get_dialect("excel")
-
-    # Now do the headerless import
-    created, updated = import_headerless_pfs(path, dialect)
-    print(f"[OK] Headerless import complete. Created: {created}, Updated: {updated}")
+    if dry_run:
+        if resume:
+            print("[ERROR] --resume cannot be combined with --dry-run")
+            sys.exit(1)
+        if workers > 1:
+            print("[INFO] Dry run parses serially; ignoring --workers.")
+            workers = 1
+        diff_path = diff_path or default_diff_path(path_str)
+    else:
+        diff_path = None
+
+    with open_source(path_str, member=member) as source:
+        dialect = sniff_dialect(source.sample)
+
+        if workers > 1 and source.path is None:
+            print(f"[WARN] {source.name} is not a plain file; parsing serially.")
+            workers = 1
+        if workers > 1 and resume:
+            print("[WARN] --resume needs a serial import; ignoring --workers.")
+            workers = 1
+
+        if resume and not source.seekable:
+            print(f"[ERROR] Cannot resume an import from {source.name}")
+            sys.exit(1)
+
+        # Peek at first row as "header"
+        reader = csv.reader(source.lines(), dialect=dialect)
+        first_row = next(reader, None)
+
+        if first_row is None:
+            print("[ERROR] File appears to be empty.")
+            sys.exit(1)
+
+        print(f"[INFO] First row fields: {first_row}")
+
+        # Heuristic: if the first row doesn't name the columns we need, treat
+        # the file as headerless and the first row as data.
+        fieldnames = first_row
+        try:
+            detect_fields(fieldnames)
+            has_header = True
+        except ValueError as ve:
+            print(f"[WARN] {ve}")
+            print("[INFO] Falling back to headerless positional import...")
+            has_header = False
+
+        if effective_from is None:
+            effective_from = infer_effective_from(None if has_header else first_row)
+        print(f"[INFO] Fee schedule effective from {effective_from}")
+
+        checkpointer = None
+        if not dry_run:
+            # Search stays current as rows are upserted once its index exists
+            if search_backend() == "memory":
+                print("[WARN] No search index; run python -m src.migrate upgrade to create it")
+
+            checkpointer = ImportCheckpointer(
+                "pfs",
+                source,
+                resume=resume,
+                resumable=workers == 1,
+            )
+
+        if workers > 1:
+            if has_header:
+                created, updated = import_with_header_parallel(
+                    source.path,
+                    dialect,
+                    fieldnames,
+                    source.offset,
+                    workers,
+                    checkpointer,
+                    effective_from,
+                )
+            else:
+                created, updated = import_headerless_pfs_parallel(
+                    source.path, dialect, workers, checkpointer, effective_from
+                )
+        else:
+            rows = reader
+            if checkpointer and checkpointer.resume_offset:
+                source.seek(checkpointer.resume_offset)
+            elif not has_header:
+                rows = itertools.chain([first_row], reader)
+
+            if has_header:
+                created, updated = import_with_header(
+                    rows, fieldnames, checkpointer, effective_from, diff_path
+                )
+            else:
+                created, updated = import_headerless_pfs(
+                    rows, checkpointer, effective_from, diff_path
+                )
 
+        if dry_run:
+            return
+        kind = "Import (with header)" if has_header else "Headerless import"
+        print(f"[OK] {kind} complete. Created: {created}, Updated: {updated}")
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python -m src.procedures.import_procedures <path_to_pfs_txt_or_csv>")
-        sys.exit(1)
 
-    file_path = sys.argv[1]
-    import_procedures_from_pfs_file(file_path)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m src.procedures.import_procedures",
+        description="Import CPT/HCPCS procedures from a PFS txt/csv file.",
+    )
+    parser.add_argument(
+        "path",
+        help="PFS txt/csv file, optionally .gz/.bz2/.zip compressed, or '-' for stdin",
+    )
+    parser.add_argument(
+        "--member",
+        default=None,
+        help="file inside a .zip archive (default: the largest .txt/.csv member)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="parse the file in N worker processes (default: 1, serial)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the last unfinished import of this file from its last checkpoint",
+    )
+    parser.add_argument(
+        "--effective-from",
+        type=parse_effective_from,
+        default=None,
+        help="date (YYYY-MM-DD or YYYY) this fee schedule takes effect "
+        "(default: the year in a headerless CMS file, otherwise today)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="write nothing; report what the import would change",
+    )
+    parser.add_argument(
+        "--diff-out",
+        type=Path,
+        default=None,
+        help="csv file for the --dry-run diff (default: <path>.diff.csv)",
+    )
+    args = parser.parse_args()
+
+    import_procedures_from_pfs_file(
+        args.path,
+        workers=args.workers,
+        member=args.member,
+        resume=args.resume,
+        effective_from=args.effective_from,
+        dry_run=args.dry_run,
+        diff_path=args.diff_out,
+    )
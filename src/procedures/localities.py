@@ -0,0 +1,225 @@
+# src/procedures/localities.py
+
+from datetime import date
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from . import models
+
+
+US_STATES = {
+    "ALABAMA": "AL", "ALASKA": "AK", "ARIZONA": "AZ", "ARKANSAS": "AR",
+    "CALIFORNIA": "CA", "COLORADO": "CO", "CONNECTICUT": "CT", "DELAWARE": "DE",
+    "DISTRICT OF COLUMBIA": "DC", "FLORIDA": "FL", "GEORGIA": "GA", "HAWAII": "HI",
+    "IDAHO": "ID", "ILLINOIS": "IL", "INDIANA": "IN", "IOWA": "IA", "KANSAS": "KS",
+    "KENTUCKY": "KY", "LOUISIANA": "LA", "MAINE": "ME", "MARYLAND": "MD",
+    "MASSACHUSETTS": "MA", "MICHIGAN": "MI", "MINNESOTA": "MN", "MISSISSIPPI": "MS",
+    "MISSOURI": "MO", "MONTANA": "MT", "NEBRASKA": "NE", "NEVADA": "NV",
+    "NEW HAMPSHIRE": "NH", "NEW JERSEY": "NJ", "NEW MEXICO": "NM", "NEW YORK": "NY",
+    "NORTH CAROLINA": "NC", "NORTH DAKOTA": "ND", "OHIO": "OH", "OKLAHOMA": "OK",
+    "OREGON": "OR", "PENNSYLVANIA": "PA", "RHODE ISLAND": "RI",
+    "SOUTH CAROLINA": "SC", "SOUTH DAKOTA": "SD", "TENNESSEE": "TN", "TEXAS": "TX",
+    "UTAH": "UT", "VERMONT": "VT", "VIRGINIA": "VA", "WASHINGTON": "WA",
+    "WEST VIRGINIA": "WV", "WISCONSIN": "WI", "WYOMING": "WY",
+    "PUERTO RICO": "PR", "VIRGIN ISLANDS": "VI", "GUAM": "GU",
+    "AMERICAN SAMOA": "AS", "NORTHERN MARIANA ISLANDS": "MP",
+}
+
+
+def normalize_state(value: str | None) -> str | None:
+    """
+    Two-letter postal code for 'CA', 'ca', 'California' or 'CALIFORNIA'.
+    """
+    if not value:
+        return None
+    value = value.strip().upper()
+    if len(value) == 2:
+        return value
+    return US_STATES.get(value)
+
+
+def parse_locality_key(key: str) -> tuple[str, str]:
+    """
+    Split a locality key '<carrier>-<locality>' (e.g. '01112-05', see PfsLocality.key).
+    """
+    carrier, sep, locality = key.strip().partition("-")
+    if not sep or not carrier or not locality:
+        raise ValueError(f"Locality must look like '<carrier>-<locality>', got '{key}'")
+    return carrier, locality
+
+
+class LocalityPriceBuffer:
+    """
+    Buffers (code, carrier, locality) -> cost for BulkProcedureUpserter.
+
+    Localities are resolved to small integer ids through pfs_localities
+    (created on first sight), so each stored price is (code, locality_id,
+    cost). The last non-empty cost seen for a key wins, matching the
+    procedure merge rules.
+
+    Only current prices are kept, so a dated load (`effective_from` passed
+    to flush) replaces a stored price only when it is in effect today and
+    no older than the load that stored it. Prices of a schedule that takes
+    effect in the future are skipped; load it again once it is in effect.
+    """
+
+    def __init__(self):
+        self.pending: dict[tuple[str, str, str], float] = {}
+        self.locality_ids: dict[tuple[str, str], int] = {}
+        self.written = 0
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def add(self, code: str, carrier: str, locality: str, cost: float | None) -> None:
+        if cost is not None and carrier and locality:
+            self.pending[(code, carrier, locality)] = cost
+
+    def _resolve_localities(self, db: Session, insert, keys: set[tuple[str, str]]) -> None:
+        missing = keys - self.locality_ids.keys()
+        if not missing:
+            return
+
+        table = models.PfsLocality.__table__
+        db.execute(
+            insert(table).on_conflict_do_nothing(
+                index_elements=[table.c.carrier, table.c.locality]
+            ),
+            [{"carrier": c, "locality": l} for c, l in missing],
+        )
+        for id_, carrier, locality in db.execute(
+            select(table.c.id, table.c.carrier, table.c.locality)
+        ):
+            self.locality_ids[(carrier, locality)] = id_
+
+    def flush(
+        self,
+        db: Session,
+        insert,
+        import_run_id: int | None,
+        effective_from: date | None = None,
+    ) -> None:
+        if not self.pending:
+            return
+
+        if effective_from is not None and effective_from > date.today():
+            self.skipped += len(self.pending)
+            self.pending.clear()
+            return
+
+        self._resolve_localities(db, insert, {(c, l) for _, c, l in self.pending})
+
+        table = models.ProcedureLocalityPrice.__table__
+        stmt = insert(table)
+        newer = None
+        if effective_from is not None:
+            newer = or_(
+                table.c.effective_from.is_(None),
+                table.c.effective_from <= stmt.excluded.effective_from,
+            )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.code, table.c.locality_id],
+            set_={
+                "reference_cost": stmt.excluded.reference_cost,
+                "effective_from": stmt.excluded.effective_from,
+                "import_run_id": stmt.excluded.import_run_id,
+            },
+            where=newer,
+        ).returning(table.c.code)
+        ids = self.locality_ids
+        result = db.execute(
+            stmt,
+            [
+                {
+                    "code": code,
+                    "locality_id": ids[(carrier, locality)],
+                    "reference_cost": cost,
+                    "effective_from": effective_from,
+                    "import_run_id": import_run_id,
+                }
+                for (code, carrier, locality), cost in self.pending.items()
+            ],
+        )
+        # RETURNING yields the rows inserted or updated, not those the WHERE
+        # above left alone (executemany rowcount is -1 on psycopg)
+        self.written += len(result.all())
+        self.pending.clear()
+
+
+# ----------------------------------------------------------------------
+# Lookups
+# ----------------------------------------------------------------------
+
+class PricingLocalities:
+    """
+    Localities a price should be taken from: one (`locality` set) or all of
+    a state's (`state` set, prices averaged).
+    """
+
+    def __init__(self, ids: list[int], locality: str | None = None, state: str | None = None):
+        self.ids = ids
+        self.locality = locality
+        self.state = state
+
+
+def find_locality(db: Session, key: str) -> models.PfsLocality | None:
+    carrier, locality = parse_locality_key(key)
+    return db.scalars(
+        select(models.PfsLocality).where(
+            models.PfsLocality.carrier == carrier,
+            models.PfsLocality.locality == locality,
+        )
+    ).first()
+
+
+def localities_for_state(db: Session, state: str | None) -> list[models.PfsLocality]:
+    """
+    Localities in `state` (postal code or full name); all of them for None.
+    """
+    query = select(models.PfsLocality).order_by(
+        models.PfsLocality.carrier, models.PfsLocality.locality
+    )
+    if state is not None:
+        code = normalize_state(state)
+        if code is None:
+            return []
+        query = query.where(models.PfsLocality.state == code)
+    return list(db.scalars(query))
+
+
+def locality_cost_column(code_col, locality_ids: list[int]):
+    """
+    Correlated scalar subquery: cost of code_col averaged over locality_ids.
+
+    For a single locality this is just its price; for a state it is the
+    plain mean across that state's localities. One seek per locality on the
+    (code, locality_id) key.
+    """
+    price = models.ProcedureLocalityPrice
+    return (
+        select(func.avg(price.reference_cost))
+        .where(price.code == code_col, price.locality_id.in_(locality_ids))
+        .scalar_subquery()
+    )
+
+
+def locality_prices(
+    db: Session,
+    code: str,
+    locality_ids: list[int] | None = None,
+) -> list[tuple[models.PfsLocality, float]]:
+    """
+    (locality, cost) pairs for `code`, optionally limited to `locality_ids`.
+    """
+    price = models.ProcedureLocalityPrice
+    query = (
+        select(models.PfsLocality, price.reference_cost)
+        .join(price, price.locality_id == models.PfsLocality.id)
+        .where(price.code == code)
+        .order_by(models.PfsLocality.carrier, models.PfsLocality.locality)
+    )
+    if locality_ids is not None:
+        query = query.where(price.locality_id.in_(locality_ids))
+    return [(loc, cost) for loc, cost in db.execute(query)]
@@ -1,7 +1,21 @@
 # src/procedures/models.py
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, Text, ForeignKey
+from sqlalchemy import (
+    Column,
+    Integer,
+    BigInteger,
+    String,
+    Float,
+    Boolean,
+    Text,
+    ForeignKey,
+    Date,
+    DateTime,
+    LargeBinary,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from ..database import Base
 
@@ -50,3 +64,113 @@ class ProcedureBundleItem(Base):
 
     bundle = relationship("ProcedureBundle", back_populates="items")
     procedure = relationship("Procedure")
+
+
+class ProcedureImportRun(Base):
+    """
+    One execution of a procedure importer, checkpointed at every batch commit
+    so an interrupted run can be resumed from `byte_offset`.
+    """
+
+    __tablename__ = "procedure_import_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    importer = Column(String, nullable=False)  # e.g. "pfs", "pfs_headerless_simple"
+    source = Column(String, nullable=False)  # path / archive member as given
+    file_hash = Column(String, index=True, nullable=False)
+
+    status = Column(String, nullable=False, default="running")  # running | completed | failed
+
+    # Position (in the decompressed byte stream) just past the last committed row
+    byte_offset = Column(BigInteger, nullable=False, default=0)
+    rows_read = Column(BigInteger, nullable=False, default=0)
+    created = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+
+    # Importer-specific state needed to resume (zlib-compressed), e.g. seen codes
+    state = Column(LargeBinary, nullable=True)
+
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class ProcedureFeeSchedule(Base):
+    """
+    One effective-dated version of a procedure's reference cost.
+
+    Importers only add a row when the cost differs from the version already
+    in effect, so history stays compact. Procedure.reference_cost mirrors
+    the version in effect today.
+    """
+
+    __tablename__ = "procedure_fee_schedules"
+    __table_args__ = (
+        UniqueConstraint(
+            "code", "effective_from", name="ix_procedure_fee_schedules_code_effective_from"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    code = Column(String, nullable=False)
+    effective_from = Column(Date, nullable=False)
+    reference_cost = Column(Float, nullable=False)
+    import_run_id = Column(
+        Integer,
+        ForeignKey("procedure_import_runs.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+
+
+class PfsLocality(Base):
+    """
+    A Medicare PFS payment locality: a (carrier/MAC, locality number) pair,
+    e.g. ('01112', '05'). `state` is the two-letter postal code.
+    """
+
+    __tablename__ = "pfs_localities"
+    __table_args__ = (
+        UniqueConstraint("carrier", "locality", name="uq_pfs_localities_carrier_locality"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    carrier = Column(String, nullable=False)
+    locality = Column(String, nullable=False)
+    state = Column(String, nullable=True, index=True)
+    name = Column(String, nullable=True)
+
+    @property
+    def key(self) -> str:
+        return f"{self.carrier}-{self.locality}"
+
+
+class ProcedureLocalityPrice(Base):
+    """
+    Current reference cost of a procedure in one PFS locality.
+
+    Keyed directly on (code, locality_id), without a surrogate id, so the
+    table stays small even with one row per code per locality.
+    """
+
+    __tablename__ = "procedure_locality_prices"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    code = Column(String, primary_key=True)
+    locality_id = Column(
+        Integer,
+        ForeignKey("pfs_localities.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    reference_cost = Column(Float, nullable=False)
+    # Fee schedule date the price was loaded for; NULL for unversioned loads
+    effective_from = Column(Date, nullable=True)
+    import_run_id = Column(
+        Integer,
+        ForeignKey("procedure_import_runs.id", ondelete="SET NULL"),
+        nullable=True,
+    )
@@ -0,0 +1,202 @@
+# src/procedures/parallel.py
+
+import codecs
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from .bulk import BulkProcedureUpserter
+from .checkpoints import ImportCheckpointer
+from .import_procedures import derive_code_system, parse_reference_cost
+
+
+CHUNK_BYTES = 16 * 1024 * 1024  # upper bound on a single worker's byte range
+CHUNKS_PER_WORKER = 4  # more ranges than workers keeps the pool busy
+
+# Column layout of the headerless positional PFS files (see import_headerless_pfs):
+# (code, description, reference_cost, carrier, locality)
+HEADERLESS_LAYOUT = (3, None, 5, 1, 2)
+
+
+def dialect_params(dialect) -> dict:
+    """
+    Flatten a csv dialect into plain keyword arguments.
+
+    csv.Sniffer returns a class defined inside sniff(), which cannot be pickled
+    across to pool workers, so we ship its format parameters instead.
+    """
+    return {
+        "delimiter": dialect.delimiter,
+        "quotechar": dialect.quotechar,
+        "escapechar": dialect.escapechar,
+        "doublequote": dialect.doublequote,
+        "skipinitialspace": dialect.skipinitialspace,
+        "quoting": dialect.quoting,
+        "lineterminator": dialect.lineterminator,
+    }
+
+
+def split_byte_ranges(path: Path, start: int, workers: int) -> list[tuple[int, int]]:
+    """
+    Split path[start:] into byte ranges that each begin at the start of a line.
+
+    Assumes no quoted field contains a newline, which holds for the CMS
+    fee-schedule files we import.
+    """
+    size = path.stat().st_size
+    if size <= start:
+        return []
+
+    count = max(workers * CHUNKS_PER_WORKER, (size - start) // CHUNK_BYTES + 1)
+    step = max(1, (size - start) // count)
+
+    bounds = [start]
+    with path.open("rb") as f:
+        pos = start + step
+        while pos < size:
+            f.seek(pos)
+            f.readline()  # move to the beginning of the next line
+            pos = f.tell()
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+            pos += step
+    bounds.append(size)
+
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def parse_rows(
+    rows,
+    code_idx: int,
+    desc_idx: int | None,
+    ref_idx: int | None,
+    carrier_idx: int | None = None,
+    locality_idx: int | None = None,
+):
+    """
+    Parse csv rows into a columnar batch:
+    (codes, descriptions, costs, systems, localities).
+
+    desc_idx=None means the positional headerless layout, which has no
+    description column and needs at least 6 columns per row. `localities`
+    holds (carrier, locality) pairs, or is None when the layout has none.
+    """
+    codes: list[str] = []
+    descriptions: list[str] = []
+    costs: list[float | None] = []
+    systems: list[str] = []
+    localities: list[tuple[str, str]] | None = [] if carrier_idx is not None else None
+
+    headerless = desc_idx is None
+
+    for row in rows:
+        if headerless:
+            if not row or all(not col.strip() for col in row):
+                continue
+            if len(row) < 6:
+                continue
+
+        code = (row[code_idx] if code_idx < len(row) else "").strip()
+        if not code:
+            continue
+
+        if headerless:
+            description = f"Procedure {code}"
+        else:
+            description = (row[desc_idx] if desc_idx < len(row) else "").strip()
+
+        raw_cost = row[ref_idx] if ref_idx is not None and ref_idx < len(row) else None
+
+        codes.append(code)
+        descriptions.append(description)
+        costs.append(parse_reference_cost(raw_cost))
+        systems.append(derive_code_system(code))
+        if localities is not None:
+            localities.append((row[carrier_idx].strip(), row[locality_idx].strip()))
+
+    return codes, descriptions, costs, systems, localities
+
+
+def parse_byte_range(task):
+    """
+    Pool worker: parse one newline-aligned byte range of the file.
+    """
+    path_str, start, end, fmtparams, layout = task
+
+    with open(path_str, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    if start == 0 and data.startswith(codecs.BOM_UTF8):
+        data = data[len(codecs.BOM_UTF8):]
+
+    # Split on b"\n" exactly like the serial Source.lines() does
+    lines = (line.decode("utf-8") for line in io.BytesIO(data))
+    reader = csv.reader(lines, **fmtparams)
+    return parse_rows(reader, *layout)
+
+
+def import_parallel(
+    path: Path,
+    dialect,
+    layout: tuple,
+    start: int,
+    workers: int,
+    checkpointer: ImportCheckpointer | None = None,
+    effective_from: date | None = None,
+) -> tuple[int, int]:
+    """
+    Parse path[start:] in a process pool and feed a single bulk writer.
+
+    Ranges are handed back in file order, so the writer sees exactly the row
+    sequence the serial importers would. Returns (created, updated).
+    """
+    fmtparams = dialect_params(dialect)
+    ranges = split_byte_ranges(path, start, workers)
+    tasks = [(str(path), s, e, fmtparams, layout) for s, e in ranges]
+
+    print(
+        f"[INFO] Parallel parse: {len(tasks)} ranges over {workers} workers "
+        f"(cpu_count={os.cpu_count()})"
+    )
+
+    db: Session = SessionLocal()
+    upserter = BulkProcedureUpserter(
+        db, effective_from=effective_from, with_localities=len(layout) > 3
+    )
+    if checkpointer:
+        checkpointer.attach(db, upserter)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for codes, descriptions, costs, systems, localities in pool.map(
+                parse_byte_range, tasks
+            ):
+                if localities is None:
+                    localities = [None] * len(codes)
+                for code, description, cost, system, locality in zip(
+                    codes, descriptions, costs, systems, localities
+                ):
+                    upserter.add(code, description, system, cost, locality)
+
+        upserter.flush()
+        upserter.report()
+        if checkpointer:
+            checkpointer.complete()
+    except Exception:
+        db.rollback()
+        if checkpointer:
+            checkpointer.fail()
+        raise
+    finally:
+        db.close()
+
+    return upserter.created, upserter.updated
@@ -1,17 +1,66 @@
 # src/procedures/router.py
 
+from datetime import date
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 
-from ..database import get_db
+from ..collectives import models as collective_models
+from ..database import get_db, read_only
 from . import models, schemas
+from .catalog import get_catalog
+from .estimates import estimate_bundles
+from .fee_schedules import version_history, versions_as_of
+from .localities import (
+    PricingLocalities,
+    find_locality,
+    localities_for_state,
+    locality_prices,
+    normalize_state,
+)
+from .search import search_procedures
 
 router = APIRouter()
 
 
+def resolve_pricing_localities(
+    db: Session,
+    locality: Optional[str] = None,
+    state: Optional[str] = None,
+    collective_id: Optional[int] = None,
+) -> Optional[PricingLocalities]:
+    """
+    Turn a locality key, a state, or a collective's target_state into the
+    localities to price against (None = national reference cost).
+    """
+    if locality:
+        try:
+            loc = find_locality(db, locality)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if not loc:
+            raise HTTPException(status_code=404, detail=f"Unknown locality: {locality}")
+        return PricingLocalities([loc.id], locality=loc.key, state=loc.state)
+
+    if not state and collective_id is not None:
+        collective = db.get(collective_models.Collective, collective_id)
+        if not collective:
+            raise HTTPException(status_code=404, detail="Collective not found")
+        if not collective.target_state:
+            return None
+        state = collective.target_state
+
+    if state:
+        code = normalize_state(state)
+        localities = localities_for_state(db, code) if code else []
+        if not localities:
+            raise HTTPException(status_code=404, detail=f"No PFS localities known for state: {state}")
+        return PricingLocalities([loc.id for loc in localities], state=code)
+
+    return None
+
+
 # ---------- BASIC PROCEDURE SEARCH / LOOKUP ----------
 
 @router.get(
@@ -19,36 +68,65 @@ router = APIRouter()
     response_model=List[schemas.ProcedureOut],
     summary="Search or list procedures (CPT/HCPCS)"
 )
+@read_only
 def list_procedures(
     q: Optional[str] = Query(
         None,
-        description="Search term for code or description (partial match).",
+        description="Search term for code or description (partial match, ranked by relevance).",
     ),
     limit: int = Query(50, ge=1, le=200),
     db: Session = Depends(get_db),
 ):
-    query = db.query(models.Procedure)
-
-    if q:
-        like = f"%{q}%"
-        query = query.filter(
-            or_(
-                models.Procedure.code.ilike(like),
-                models.Procedure.description.ilike(like),
-            )
-        )
+    if q and q.strip():
+        return search_procedures(db, q, limit)
 
-    procedures = query.order_by(models.Procedure.code).limit(limit).all()
+    procedures = (
+        db.query(models.Procedure)
+        .order_by(models.Procedure.code)
+        .limit(limit)
+        .all()
+    )
     return procedures
 
 
+@router.get(
+    "/autocomplete",
+    response_model=List[schemas.ProcedureOut],
+    summary="Type-ahead suggestions by code or description prefix",
+)
+def autocomplete_procedures(
+    q: str = Query(..., min_length=1, description="What the user has typed so far."),
+    limit: int = Query(10, ge=1, le=50),
+):
+    # Served from the in-memory catalog; no database session needed
+    return get_catalog().autocomplete(q, limit)
+
+
+@router.get(
+    "/localities",
+    response_model=List[schemas.PfsLocalityOut],
+    summary="List PFS payment localities, optionally for one state",
+)
+@read_only
+def list_localities(
+    state: Optional[str] = Query(None, description="Two-letter code or state name"),
+    db: Session = Depends(get_db),
+):
+    return localities_for_state(db, state)
+
+
 @router.get(
     "/{code}",
     response_model=schemas.ProcedureOut,
     summary="Get a single procedure by code",
 )
+@read_only
 def get_procedure_by_code(
     code: str,
+    as_of: Optional[date] = Query(
+        None,
+        description="Return the reference cost in effect on this date instead of the current one.",
+    ),
     db: Session = Depends(get_db),
 ):
     proc = (
@@ -58,7 +136,54 @@ def get_procedure_by_code(
     )
     if not proc:
         raise HTTPException(status_code=404, detail="Procedure not found")
-    return proc
+
+    if as_of is None:
+        return proc
+
+    version = versions_as_of(db, [code], as_of).get(code)
+    return schemas.ProcedureOut.model_validate(proc).model_copy(
+        update={"reference_cost": version.reference_cost if version else None}
+    )
+
+
+@router.get(
+    "/{code}/prices",
+    response_model=List[schemas.LocalityPriceOut],
+    summary="Locality-level prices for a procedure",
+)
+@read_only
+def get_procedure_locality_prices(
+    code: str,
+    locality: Optional[str] = Query(None, description="PFS locality key, e.g. 01112-05"),
+    state: Optional[str] = Query(None, description="Only localities in this state"),
+    db: Session = Depends(get_db),
+):
+    pricing = resolve_pricing_localities(db, locality=locality, state=state)
+    prices = locality_prices(db, code, pricing.ids if pricing else None)
+    return [
+        schemas.LocalityPriceOut(
+            code=code,
+            locality=schemas.PfsLocalityOut.model_validate(loc),
+            reference_cost=cost,
+        )
+        for loc, cost in prices
+    ]
+
+
+@router.get(
+    "/{code}/fee-schedules",
+    response_model=List[schemas.FeeScheduleVersionOut],
+    summary="Fee schedule history for a procedure, newest first",
+)
+@read_only
+def get_procedure_fee_schedules(
+    code: str,
+    db: Session = Depends(get_db),
+):
+    versions = version_history(db, code)
+    if not versions and not db.query(models.Procedure.id).filter_by(code=code).first():
+        raise HTTPException(status_code=404, detail="Procedure not found")
+    return versions
 
 
 # ---------- BUNDLES / PACKS ----------
@@ -148,6 +273,36 @@ def get_procedure_bundle(
     return bundle
 
 
+@router.post(
+    "/bundles/estimate",
+    response_model=List[schemas.BundleEstimateOut],
+    summary="Estimate total reference cost for many bundles at once",
+)
+def estimate_bundles_reference_cost(
+    request: schemas.BundleEstimateRequest,
+    db: Session = Depends(get_db),
+):
+    bundle_ids = list(dict.fromkeys(request.bundle_ids))
+    localities = resolve_pricing_localities(
+        db, request.locality, request.state, request.collective_id
+    )
+    if localities and request.as_of:
+        raise HTTPException(
+            status_code=400,
+            detail="Locality prices are current only; as_of cannot be combined with a locality.",
+        )
+    estimates = estimate_bundles(db, bundle_ids, request.as_of, localities)
+
+    missing = [bid for bid in bundle_ids if bid not in estimates]
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown bundle ids: {missing}",
+        )
+
+    return [estimates[bid] for bid in bundle_ids]
+
+
 @router.get(
     "/bundles/{bundle_id}/estimate",
     response_model=schemas.BundleEstimateOut,
@@ -155,43 +310,22 @@ def get_procedure_bundle(
 )
 def estimate_bundle_reference_cost(
     bundle_id: int,
+    as_of: Optional[date] = Query(
+        None,
+        description="Price against the fee schedule in effect on this date.",
+    ),
+    locality: Optional[str] = Query(None, description="PFS locality key, e.g. 01112-05"),
+    state: Optional[str] = Query(None, description="Average over this state's localities"),
+    collective_id: Optional[int] = Query(None, description="Use this collective's target_state"),
     db: Session = Depends(get_db),
 ):
-    bundle = (
-        db.query(models.ProcedureBundle)
-        .filter(models.ProcedureBundle.id == bundle_id)
-        .first()
-    )
-    if not bundle:
-        raise HTTPException(status_code=404, detail="Bundle not found")
-
-    items_out: list[schemas.BundleItemEstimate] = []
-    total = 0.0
-
-    for item in bundle.items:
-        proc = item.procedure
-        ref = proc.reference_cost or 0.0
-        line_total = ref * (item.quantity or 1)
-
-        if proc.reference_cost is not None:
-            total += line_total
-
-        items_out.append(
-            schemas.BundleItemEstimate(
-                code=proc.code,
-                description=proc.description,
-                quantity=item.quantity,
-                reference_cost=proc.reference_cost,
-                line_total_reference_cost=(
-                    line_total if proc.reference_cost is not None else None
-                ),
-            )
+    localities = resolve_pricing_localities(db, locality, state, collective_id)
+    if localities and as_of:
+        raise HTTPException(
+            status_code=400,
+            detail="Locality prices are current only; as_of cannot be combined with a locality.",
         )
-
-    return schemas.BundleEstimateOut(
-        bundle_id=bundle.id,
-        bundle_name=bundle.name,
-        category=bundle.category,
-        total_reference_cost=total,
-        items=items_out,
-    )
+    estimate = estimate_bundles(db, [bundle_id], as_of, localities).get(bundle_id)
+    if not estimate:
+        raise HTTPException(status_code=404, detail="Bundle not found")
+    return estimate
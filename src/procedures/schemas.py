@@ -1,4 +1,5 @@
 # src/procedures/schemas.py
+from datetime import date
 from typing import Optional, List
 from pydantic import BaseModel
 
@@ -19,8 +20,33 @@ class ProcedureOut(ProcedureBase):
 
     model_config = {"from_attributes": True}
 
+
+class PfsLocalityOut(BaseModel):
+    key: str
+    carrier: str
+    locality: str
+    state: Optional[str] = None
+    name: Optional[str] = None
+
+    model_config = {"from_attributes": True}
+
+
+class LocalityPriceOut(BaseModel):
+    code: str
+    locality: PfsLocalityOut
+    reference_cost: float
+
+
+class FeeScheduleVersionOut(BaseModel):
+    code: str
+    effective_from: date
+    reference_cost: float
+    import_run_id: Optional[int] = None
+
+    model_config = {"from_attributes": True}
+
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # ... existing Procedure* schemas above ...
 
@@ -64,9 +90,23 @@ class BundleItemEstimate(BaseModel):
     line_total_reference_cost: Optional[float] = None
 
 
+class BundleEstimateRequest(BaseModel):
+    bundle_ids: List[int] = Field(..., min_length=1, max_length=500)
+    as_of: Optional[date] = None  # price against the fee schedule in effect on this date
+
+    # Locality pricing, most specific wins: a PFS locality ("01112-05"),
+    # a state (average of its localities) or a collective's target_state
+    locality: Optional[str] = None
+    state: Optional[str] = None
+    collective_id: Optional[int] = None
+
+
 class BundleEstimateOut(BaseModel):
     bundle_id: int
     bundle_name: str
     category: Optional[str] = None
+    as_of: Optional[date] = None
+    locality: Optional[str] = None
+    state: Optional[str] = None
     total_reference_cost: float
     items: List[BundleItemEstimate]
@@ -0,0 +1,284 @@
+# src/procedures/search.py
+
+import bisect
+import threading
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..database import engine
+from . import models
+from .checkpoints import latest_import_version
+
+
+MIN_TRIGRAM_TERM = 3  # shorter terms cannot be looked up in a trigram index
+STAMP_CHECK_SECONDS = 5.0  # how often the in-process index checks for new imports
+
+# Ranking only touches the FTS table; code matches are boosted separately
+# through the ordinary code index (see _code_matches).
+SQLITE_SEARCH = """
+    SELECT rowid FROM procedures_fts
+    WHERE procedures_fts MATCH :match
+    ORDER BY bm25(procedures_fts, 10.0, 1.0)
+    LIMIT :limit
+"""
+
+# Postgres: pg_trgm / tsvector GIN indexes (see migration 0004_search_index)
+POSTGRES_SEARCH = """
+    SELECT * FROM procedures
+    WHERE code ILIKE :like ESCAPE '\\'
+       OR description ILIKE :like ESCAPE '\\'
+       OR to_tsvector('simple', description) @@ plainto_tsquery('simple', :q)
+    ORDER BY
+        upper(code) = :code DESC,
+        code ILIKE :prefix ESCAPE '\\' DESC,
+        ts_rank(to_tsvector('simple', description), plainto_tsquery('simple', :q)) DESC,
+        similarity(description, :q) DESC,
+        code
+    LIMIT :limit
+"""
+
+# Detection only reads the catalog; the objects come from migration 0004_search_index
+SQLITE_DETECT = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'procedures_fts'"
+POSTGRES_DETECT = """
+    SELECT to_regclass('ix_procedures_description_trgm') IS NOT NULL
+       AND EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')
+"""
+
+_backends: dict[str, str] = {}
+
+
+def search_backend(bind: Engine = engine) -> str:
+    """
+    The search backend this database supports: "fts5", "pg_trgm" or
+    "memory" when the search index migration has not (or could not) run.
+
+    A catalog read; a found index is remembered per database, a missing
+    one is looked for again on the next call.
+    """
+    key = str(bind.url)
+    backend = _backends.get(key)
+    if backend is not None:
+        return backend
+
+    dialect = bind.dialect.name
+    with bind.connect() as conn:
+        if dialect == "sqlite" and conn.scalar(text(SQLITE_DETECT)):
+            backend = "fts5"
+        elif dialect == "postgresql" and conn.scalar(text(POSTGRES_DETECT)):
+            backend = "pg_trgm"
+        else:
+            return "memory"
+    _backends[key] = backend
+    return backend
+
+
+# ----------------------------------------------------------------------
+# Query parsing
+# ----------------------------------------------------------------------
+
+def _terms(q: str) -> list[str]:
+    return list(dict.fromkeys(t for t in q.split() if len(t) >= MIN_TRIGRAM_TERM))
+
+
+def _fts_match(terms: list[str]) -> str:
+    # Each term as a quoted string: a substring match under the trigram
+    # tokenizer. Space-separated strings are ANDed.
+    return " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _code_prefix(db: Session, prefix: str, limit: int) -> list[models.Procedure]:
+    """
+    Queries too short for trigrams: a range scan on the code index.
+    """
+    code = models.Procedure.code
+    return list(
+        db.scalars(
+            select(models.Procedure)
+            .where(code >= prefix, code < prefix + "\uffff")
+            .order_by(code)
+            .limit(limit)
+        )
+    )
+
+
+def _code_matches(db: Session, prefix: str, limit: int) -> list[int]:
+    """
+    Ids of the exact code match (if any) followed by code prefix matches.
+    """
+    code = models.Procedure.code
+    rows = db.execute(
+        select(models.Procedure.id, code)
+        .where(code >= prefix, code < prefix + "\uffff")
+        .order_by(code)
+        .limit(limit)
+    ).all()
+    return [id_ for id_, _ in sorted(rows, key=lambda r: r[1] != prefix)]
+
+
+def _load(db: Session, ids: list[int]) -> list[models.Procedure]:
+    if not ids:
+        return []
+    by_id = {
+        p.id: p
+        for p in db.scalars(select(models.Procedure).where(models.Procedure.id.in_(ids)))
+    }
+    return [by_id[i] for i in ids if i in by_id]
+
+
+# ----------------------------------------------------------------------
+# Search
+# ----------------------------------------------------------------------
+
+def search_procedures(
+    db: Session,
+    q: str,
+    limit: int = 50,
+    backend: str | None = None,
+) -> list[models.Procedure]:
+    """
+    Ranked substring search over procedure code and description.
+
+    Exact code matches come first, then code prefix matches, then the
+    backend's relevance score (bm25 / ts_rank + similarity / term hits).
+    `backend` overrides the detected backend (e.g. "memory" for benchmarks).
+    """
+    q = q.strip()
+    if not q:
+        return []
+
+    code = q.upper()
+    terms = _terms(q)
+    if not terms:
+        return _code_prefix(db, code, limit)
+
+    backend = backend or search_backend(db.get_bind())
+
+    if backend == "pg_trgm":
+        stmt = select(models.Procedure).from_statement(text(POSTGRES_SEARCH))
+        params = {
+            "q": q,
+            "like": f"%{_like_escape(q)}%",
+            "prefix": f"{_like_escape(q)}%",
+            "code": code,
+            "limit": limit,
+        }
+        return list(db.scalars(stmt, params))
+
+    if backend == "fts5":
+        ranked = db.scalars(
+            text(SQLITE_SEARCH), {"match": _fts_match(terms), "limit": limit}
+        ).all()
+        ids = _code_matches(db, code, limit) if len(terms) == 1 else []
+        seen = set(ids)
+        ids += [i for i in ranked if i not in seen]
+        return _load(db, ids[:limit])
+
+    return _load(db, _memory_index(db).search(q, limit))
+
+
+# ----------------------------------------------------------------------
+# In-process fallback
+# ----------------------------------------------------------------------
+
+def _trigrams(value: str) -> set[str]:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+class TrigramIndex:
+    """
+    Immutable trigram index over (id, code, description) rows.
+
+    Used when the database has no usable search index. Built once per
+    catalog version; searches intersect posting lists and then confirm each
+    candidate with a real substring check.
+    """
+
+    __slots__ = ("ids", "codes", "texts", "postings", "sorted_codes")
+
+    def __init__(self, rows):
+        self.ids: list[int] = []
+        self.codes: list[str] = []
+        self.texts: list[str] = []
+        self.postings: dict[str, list[int]] = {}
+
+        for pos, (id_, code, description) in enumerate(rows):
+            self.ids.append(id_)
+            self.codes.append(code.upper())
+            text_ = f"{code} {description}".lower()
+            self.texts.append(text_)
+            for gram in _trigrams(text_):
+                self.postings.setdefault(gram, []).append(pos)
+
+        self.sorted_codes = sorted(range(len(self.codes)), key=self.codes.__getitem__)
+
+    def _candidates(self, term: str) -> set[int]:
+        grams = sorted(_trigrams(term), key=lambda g: len(self.postings.get(g, ())))
+        if not grams or grams[0] not in self.postings:
+            return set()
+        found = set(self.postings[grams[0]])
+        for gram in grams[1:]:
+            found.intersection_update(self.postings.get(gram, ()))
+            if not found:
+                break
+        return {pos for pos in found if term in self.texts[pos]}
+
+    def search(self, q: str, limit: int) -> list[int]:
+        code = q.strip().upper()
+        terms = [t.lower() for t in _terms(q)]
+
+        if not terms:
+            keys = [self.codes[pos] for pos in self.sorted_codes]
+            start = bisect.bisect_left(keys, code)
+            end = bisect.bisect_left(keys, code + "\uffff")
+            return [self.ids[pos] for pos in self.sorted_codes[start:end][:limit]]
+
+        found = self._candidates(terms[0])
+        for term in terms[1:]:
+            if not found:
+                break
+            found &= self._candidates(term)
+
+        def rank(pos: int):
+            c = self.codes[pos]
+            text_ = self.texts[pos]
+            hits = sum(text_.count(t) for t in terms)
+            return (c != code, not c.startswith(code), -hits, len(text_), c)
+
+        return [self.ids[pos] for pos in sorted(found, key=rank)[:limit]]
+
+
+_memory = {"index": None, "stamp": None, "checked_at": 0.0}
+_memory_lock = threading.Lock()
+
+
+def _catalog_stamp(db: Session) -> tuple[int, int]:
+    return (
+        latest_import_version(db),
+        db.scalar(select(func.count()).select_from(models.Procedure)),
+    )
+
+
+def _memory_index(db: Session) -> TrigramIndex:
+    """
+    Current in-process index, rebuilt when a new import has completed.
+    """
+    now = time.monotonic()
+    if _memory["index"] is not None and now - _memory["checked_at"] < STAMP_CHECK_SECONDS:
+        return _memory["index"]
+
+    with _memory_lock:
+        stamp = _catalog_stamp(db)
+        if _memory["index"] is None or stamp != _memory["stamp"]:
+            table = models.Procedure.__table__
+            rows = db.execute(select(table.c.id, table.c.code, table.c.description))
+            _memory["index"] = TrigramIndex(rows)
+            _memory["stamp"] = stamp
+        _memory["checked_at"] = now
+        return _memory["index"]
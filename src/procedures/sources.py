@@ -0,0 +1,208 @@
+# src/procedures/sources.py
+
+import bz2
+import codecs
+import csv
+import gzip
+import hashlib
+import io
+import sys
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+
+SNIFF_BYTES = 64 * 1024  # prefix buffered up front (rounded up to a full line)
+SNIFF_SAMPLE_CHARS = 4096  # how much of it csv.Sniffer actually looks at
+READ_BUFFER_BYTES = 1024 * 1024
+FINGERPRINT_TAIL_BYTES = 64 * 1024
+
+# Delimiters we expect in CMS releases. Restricting the sniffer keeps it from
+# picking a space or quote character on rows like '"2025","01112","05","G0011","  "'.
+SNIFF_DELIMITERS = ",\t|;"
+
+DATA_MEMBER_SUFFIXES = (".txt", ".csv")
+
+
+class Source:
+    """
+    A single-pass, read-once view over a fee-schedule release.
+
+    The first SNIFF_BYTES (extended to the end of that line) are buffered when
+    the source is opened so the dialect can be sniffed from `sample`;
+    lines() then replays that prefix before continuing with the rest of the
+    stream. Nothing is ever read twice or decompressed to disk.
+
+    `offset` is the position in the (decompressed) byte stream just past the
+    last line handed out by lines(); seek() jumps there to resume an import.
+
+    `path` is set only for plain, uncompressed files on disk, which are the
+    only sources the parallel byte-range parser can work with.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        name: str,
+        path: Path | None = None,
+        disk_path: Path | None = None,
+        zip_info: zipfile.ZipInfo | None = None,
+        closers=(),
+    ):
+        self.stream = stream
+        self.name = name
+        self.path = path
+        self.disk_path = disk_path
+        self.zip_info = zip_info
+        self._closers = [stream, *closers]
+
+        head = stream.read(SNIFF_BYTES)
+        if len(head) == SNIFF_BYTES:
+            head += stream.readline()
+        self._head = head
+
+        bom = len(codecs.BOM_UTF8) if head.startswith(codecs.BOM_UTF8) else 0
+        self.offset = bom
+        self._prefix = io.BytesIO(head[bom:])
+        self.sample = head[bom:].decode("utf-8", errors="replace")[:SNIFF_SAMPLE_CHARS]
+
+    @property
+    def seekable(self) -> bool:
+        return self.disk_path is not None
+
+    def lines(self) -> Iterator[str]:
+        """
+        Decoded text lines: the buffered prefix first, then the rest of the stream.
+        """
+        while True:
+            line = self._prefix.readline() or self.stream.readline()
+            if not line:
+                return
+            self.offset += len(line)
+            yield line.decode("utf-8")
+
+    def seek(self, offset: int) -> None:
+        """
+        Continue lines() from `offset` (as previously reported by self.offset).
+
+        Compressed streams seek by decompressing forward, which is still far
+        cheaper than re-parsing and re-writing the skipped rows.
+        """
+        if not self.seekable:
+            raise ValueError(f"{self.name} is not seekable")
+        self.stream.seek(offset)
+        self._prefix = io.BytesIO()
+        self.offset = offset
+
+    def fingerprint(self) -> str:
+        """
+        Cheap content hash used to recognise the same release across runs.
+
+        ZIP members use their stored CRC-32 and size; files on disk hash their
+        size plus the first and last 64 KiB; stdin only has its prefix.
+        """
+        h = hashlib.sha256()
+        h.update(self._head)
+
+        if self.zip_info is not None:
+            h.update(f"zip:{self.zip_info.CRC}:{self.zip_info.file_size}".encode())
+        elif self.disk_path is not None:
+            size = self.disk_path.stat().st_size
+            h.update(f"size:{size}".encode())
+            with self.disk_path.open("rb") as f:
+                f.seek(max(0, size - FINGERPRINT_TAIL_BYTES))
+                h.update(f.read())
+
+        return h.hexdigest()
+
+    def close(self) -> None:
+        for closer in self._closers:
+            closer.close()
+
+    def __enter__(self) -> "Source":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def pick_zip_member(archive: zipfile.ZipFile, member: str | None = None) -> zipfile.ZipInfo:
+    """
+    Return the requested member, or the largest .txt/.csv file in the archive.
+
+    CMS ZIPs bundle the data file with PDFs and spreadsheets, so without an
+    explicit member we take the biggest text data file.
+    """
+    infos = [i for i in archive.infolist() if not i.is_dir()]
+
+    if member is not None:
+        for info in infos:
+            if info.filename == member or Path(info.filename).name == member:
+                return info
+        raise FileNotFoundError(
+            f"Member '{member}' not found in archive. "
+            f"Available members: {[i.filename for i in infos]}"
+        )
+
+    candidates = [i for i in infos if i.filename.lower().endswith(DATA_MEMBER_SUFFIXES)]
+    if not candidates:
+        raise FileNotFoundError(
+            f"No .txt/.csv member in archive. "
+            f"Available members: {[i.filename for i in infos]}"
+        )
+    return max(candidates, key=lambda i: i.file_size)
+
+
+def source_exists(path_str: str) -> bool:
+    return path_str == "-" or Path(path_str).exists()
+
+
+def open_source(path_str: str, member: str | None = None) -> Source:
+    """
+    Open a plain file, .gz, .bz2, .zip (one member) or '-' for stdin as a Source.
+    """
+    if path_str == "-":
+        return Source(sys.stdin.buffer, name="<stdin>")
+
+    path = Path(path_str)
+    suffix = path.suffix.lower()
+
+    if suffix == ".gz":
+        return Source(gzip.open(path, "rb"), name=str(path), disk_path=path)
+
+    if suffix == ".bz2":
+        return Source(bz2.open(path, "rb"), name=str(path), disk_path=path)
+
+    if suffix == ".zip":
+        archive = zipfile.ZipFile(path)
+        try:
+            info = pick_zip_member(archive, member)
+            print(f"[INFO] Reading ZIP member {info.filename} ({info.file_size} bytes)")
+            stream = archive.open(info)
+        except Exception:
+            archive.close()
+            raise
+        return Source(
+            stream,
+            name=f"{path}:{info.filename}",
+            disk_path=path,
+            zip_info=info,
+            closers=[archive],
+        )
+
+    return Source(
+        open(path, "rb", buffering=READ_BUFFER_BYTES),
+        name=str(path),
+        path=path,
+        disk_path=path,
+    )
+
+
+def sniff_dialect(sample: str):
+    """
+    Sniff the csv dialect from a sample; fall back to comma-separated.
+    """
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=SNIFF_DELIMITERS)
+    except csv.Error:
+        return csv.get_dialect("excel")
@@ -0,0 +1,303 @@
+# src/sql_metrics.py
+
+import contextvars
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+
+class QueryLog:
+    """
+    Statements executed during one request (or one statement_budget block).
+
+    Statements are counted by their SQL text, which still has the bind
+    placeholders in it, so the same query run for different ids counts as
+    one statement repeated: the signature of an N+1 loop.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """
+        Statements run at least `threshold` times, most repeated first.
+        """
+        return [(stmt, n) for stmt, n in self.statements.most_common() if n >= threshold]
+
+
+def _short(statement: str, width: int = 120) -> str:
+    text = " ".join(statement.split())
+    return text if len(text) <= width else text[: width - 3] + "..."
+
+
+# ----------------------------------------------------------------------
+# Engine hooks (every engine: primary, reader, async)
+# ----------------------------------------------------------------------
+
+_current_log: contextvars.ContextVar[QueryLog | None] = contextvars.ContextVar("sql_query_log", default=None)
+
+# statement_budget() blocks in progress; they see statements from every thread
+_budgets: list[QueryLog] = []
+_budgets_lock = threading.Lock()
+
+
+class StatementCapture:
+    """
+    Appends each distinct SELECT/UPDATE/DELETE (with the parameters of its
+    first run) to a JSON-lines file, for src.index_advisor to EXPLAIN.
+    Enabled by SQL_CAPTURE_FILE; meant for test and load-test runs.
+    """
+
+    KINDS = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._seen: set[str] = set()
+
+    def record(self, statement: str, parameters) -> None:
+        if statement in self._seen or not statement.lstrip()[:6].upper().startswith(self.KINDS):
+            return
+        if isinstance(parameters, list):  # executemany
+            parameters = parameters[0] if parameters else ()
+        line = json.dumps({"statement": statement, "parameters": parameters}, default=str)
+        with self._lock:
+            if statement in self._seen:
+                return
+            self._seen.add(statement)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+_capture = StatementCapture(settings.SQL_CAPTURE_FILE) if settings.SQL_CAPTURE_FILE else None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("sql_metrics_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["sql_metrics_started"].pop()
+    if _capture is not None:
+        _capture.record(statement, parameters)
+    log = _current_log.get()
+    if log is None and not _budgets:
+        return
+    elapsed = time.perf_counter() - started
+    if log is not None:
+        log.record(statement, elapsed)
+    if _budgets:
+        with _budgets_lock:
+            for budget in _budgets:
+                budget.record(statement, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("sql_metrics_started"):
+        conn.info["sql_metrics_started"].pop()
+
+
+# ----------------------------------------------------------------------
+# Per-route aggregates (the metrics surface)
+# ----------------------------------------------------------------------
+
+
+class RouteStats:
+    __slots__ = ("requests", "statements", "max_statements", "seconds", "n_plus_one", "worst")
+
+    def __init__(self):
+        self.requests = 0
+        self.statements = 0
+        self.max_statements = 0
+        self.seconds = 0.0
+        self.n_plus_one = 0
+        self.worst: tuple[int, str] | None = None
+
+
+class SQLMetrics:
+    """
+    Statement counts and time per route template ("GET /negotiations/{negotiation_id}").
+    Each N+1 pattern is printed once per route when first seen.
+    """
+
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._routes: dict[str, RouteStats] = {}
+        self._reported: set[tuple[str, str]] = set()
+
+    def observe(self, route: str, log: QueryLog) -> list[tuple[str, int]]:
+        repeated = log.repeated(self.threshold)
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteStats()
+            stats.requests += 1
+            stats.statements += log.count
+            stats.max_statements = max(stats.max_statements, log.count)
+            stats.seconds += log.seconds
+            if repeated:
+                stats.n_plus_one += 1
+                statement, times = repeated[0]
+                if stats.worst is None or times > stats.worst[0]:
+                    stats.worst = (times, _short(statement))
+                new = [(s, n) for s, n in repeated if (route, s) not in self._reported]
+                self._reported.update((route, s) for s, _ in new)
+            else:
+                new = []
+        for statement, times in new:
+            print(f"[WARN] Possible N+1 in {route}: {times}x {_short(statement)}")
+        return repeated
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                route: {
+                    "requests": s.requests,
+                    "statements_per_request": round(s.statements / s.requests, 2),
+                    "max_statements": s.max_statements,
+                    "sql_ms_per_request": round(s.seconds / s.requests * 1000, 2),
+                    "n_plus_one_requests": s.n_plus_one,
+                    "worst_repeat": {"times": s.worst[0], "statement": s.worst[1]} if s.worst else None,
+                }
+                for route, s in sorted(self._routes.items())
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._reported.clear()
+
+
+sql_metrics = SQLMetrics(threshold=settings.SQL_N_PLUS_ONE_THRESHOLD)
+
+
+# ----------------------------------------------------------------------
+# Middleware
+# ----------------------------------------------------------------------
+
+
+def _route_template(scope) -> str:
+    """
+    The matched route's full path template. The route only knows its path
+    within its router, so the include prefix is recovered from the request
+    path by filling the template with the request's path params.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    try:
+        relative = template.format(**{k: str(v) for k, v in scope.get("path_params", {}).items()})
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    if relative and path.endswith(relative):
+        return path[: len(path) - len(relative)] + template
+    return template
+
+
+class SQLMetricsMiddleware:
+    """
+    Counts the statements each HTTP request runs, feeds sql_metrics and,
+    with SQL_METRICS_MODE="headers" (development), adds them to the
+    response:
+
+        X-SQL-Count: 14
+        X-SQL-Time-Ms: 3.2
+        X-SQL-N-Plus-One: 12x SELECT negotiation_rounds.id, ...
+
+    Handlers run in the threadpool with a copy of this context, so the
+    QueryLog set here is the one their statements are recorded in.
+    """
+
+    def __init__(self, app, headers: bool = False):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+        token = _current_log.set(log)
+        observed = False
+
+        def observe():
+            return sql_metrics.observe(f"{scope['method']} {_route_template(scope)}", log)
+
+        async def send_with_metrics(message):
+            nonlocal observed
+            if message["type"] == "http.response.start" and not observed:
+                observed = True
+                repeated = observe()
+                if self.headers:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-sql-count", str(log.count).encode()))
+                    headers.append((b"x-sql-time-ms", f"{log.seconds * 1000:.1f}".encode()))
+                    if repeated:
+                        statement, times = repeated[0]
+                        value = f"{times}x {_short(statement, 200)}"
+                        headers.append((b"x-sql-n-plus-one", value.encode("latin-1", "replace")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _current_log.reset(token)
+
+
+# ----------------------------------------------------------------------
+# Test helper
+# ----------------------------------------------------------------------
+
+
+@contextmanager
+def statement_budget(max_statements: int, max_repeats: int | None = None):
+    """
+    Fail if the block runs more than `max_statements` statements, or any
+    one statement more than `max_repeats` times. Counts statements from
+    every thread, so it works around TestClient calls:
+
+        with statement_budget(4, max_repeats=1):
+            client.get("/dashboard/me", headers=auth)
+
+    Yields the QueryLog for further checks.
+    """
+    log = QueryLog()
+    with _budgets_lock:
+        _budgets.append(log)
+    try:
+        yield log
+    finally:
+        with _budgets_lock:
+            _budgets.remove(log)
+
+    problems = []
+    if log.count > max_statements:
+        problems.append(f"{log.count} statements, budget {max_statements}")
+    if max_repeats is not None:
+        problems.extend(f"{n}x (max {max_repeats}): {_short(s)}" for s, n in log.repeated(max_repeats + 1))
+    if problems:
+        listing = "\n".join(f"  {n}x {_short(s)}" for s, n in log.statements.most_common())
+        raise AssertionError("SQL statement budget exceeded: " + "; ".join(problems) + "\n" + listing)
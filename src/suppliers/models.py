@@ -39,7 +39,7 @@ class SupplierBid(Base):
     supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=False)
 
     # optional target
-    collective_id = Column(Integer, ForeignKey("collectives.id"), nullable=True)
+    collective_id = Column(Integer, ForeignKey("collectives.id"), nullable=True, index=True)
 
     bid_type = Column(
         String, nullable=False
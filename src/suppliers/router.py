@@ -5,7 +5,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, read_only
 from ..auth.deps import get_current_user, require_roles
 from ..users import models as user_models
 from . import models, schemas
@@ -43,6 +43,7 @@ def create_supplier(
     response_model=List[schemas.SupplierOut],
     summary="List all suppliers (authenticated)",
 )
+@read_only
 def list_suppliers(
     db: Session = Depends(get_db),
     current_user: user_models.User = Depends(get_current_user),
@@ -59,6 +60,7 @@ def list_suppliers(
     response_model=schemas.SupplierOut,
     summary="Get supplier by ID (authenticated)",
 )
+@read_only
 def get_supplier(
     supplier_id: int,
     db: Session = Depends(get_db),
@@ -121,6 +123,7 @@ def create_quote_bid(
     response_model=List[schemas.QuoteBidOut],
     summary="List all quote bids for a supplier (authenticated)",
 )
+@read_only
 def list_supplier_quotes(
     supplier_id: int,
     db: Session = Depends(get_db),
@@ -154,6 +157,7 @@ def list_supplier_quotes(
     response_model=List[schemas.QuoteBidOut],
     summary="List all quote bids for a collective (authenticated)",
 )
+@read_only
 def list_collective_quotes(
     collective_id: int,
     db: Session = Depends(get_db),
@@ -175,6 +179,7 @@ def list_collective_quotes(
     "/quotes/by-collective/{collective_id}/compare",
     summary="Compare quotes for a collective (authenticated)",
 )
+@read_only
 def compare_collective_quotes(
     collective_id: int,
     db: Session = Depends(get_db),
@@ -4,7 +4,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, read_only
 from ..users.models import User
 from . import models, schemas, services
 
@@ -157,6 +157,7 @@ def submit_survey_response(
     "/responses/{user_id}",
     response_model=schemas.SurveyResponseOut,
 )
+@read_only
 def get_survey_response(
     user_id: int,
     db: Session = Depends(get_db),
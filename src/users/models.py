@@ -26,7 +26,7 @@ class User(Base):
     household_size = Column(Integer, nullable=True)
 
     # Role of User
-    role = Column(String, default="member", nullable=False)
+    role = Column(String, default="member", nullable=False, index=True)
 
     # Current coverage info
     current_premium_monthly = Column(Float, nullable=True)
@@ -1,8 +1,13 @@
 # src/users/router_admin.py
+import csv
+import io
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..config import settings
+from ..database import get_db, read_only
 from ..auth.deps import require_roles
 from .models import User
 
@@ -14,8 +19,11 @@ router = APIRouter(
 
 # ---------- GET ALL USERS ----------
 @router.get("/")
+@read_only
 def list_users(db: Session = Depends(get_db)):
-    users = db.query(User).all()
+    # Fetched in batches (a server-side cursor on Postgres); each batch's
+    # User objects can be dropped once turned into dicts
+    users = db.query(User).order_by(User.id).yield_per(settings.DB_STREAM_BATCH_SIZE)
     return [
         {
             "id": u.id,
@@ -29,8 +37,47 @@ def list_users(db: Session = Depends(get_db)):
         for u in users
     ]
 
+# ---------- EXPORT ALL USERS (CSV) ----------
+EXPORT_COLUMNS = ("id", "email", "full_name", "role", "user_type", "state", "created_at")
+
+
+@router.get("/export")
+@read_only
+def export_users(db: Session = Depends(get_db)):
+    """
+    Every user as CSV, streamed: rows go out in DB_STREAM_BATCH_SIZE
+    batches as they are read, so memory stays flat however many users
+    there are. The session stays open until the body has been sent.
+    """
+    table = User.__table__
+    result = db.execute(
+        table.select()
+        .with_only_columns(*(table.c[name] for name in EXPORT_COLUMNS))
+        .order_by(table.c.id)
+        .execution_options(yield_per=settings.DB_STREAM_BATCH_SIZE)
+    )
+
+    def lines():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for batch in result.partitions():
+            writer.writerows(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    return StreamingResponse(
+        lines(),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="users.csv"'},
+    )
+
 # ---------- GET ONE USER ----------
 @router.get("/{user_id}")
+@read_only
 def get_user(user_id: int, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user: